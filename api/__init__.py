@@ -0,0 +1,562 @@
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from copy import deepcopy
+from time import monotonic, sleep, time
+from typing import TYPE_CHECKING, Any, Generator, NamedTuple, Protocol
+
+# requests is slow to import, so it is only pulled in once the first call is made
+if TYPE_CHECKING:
+    import requests
+    from .batching import Batch
+    from .cache import ResponseCache
+    from .cassette import Cassette
+    from .codec import Codec
+    from .hedge import Hedger
+    from .limiter import AdaptiveLimiter
+    from .metrics import Sink
+
+DataType = dict[str, Any] | list[Any] | None
+
+class ApiException(Exception):
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class ApiFunction(Protocol):
+    def __call__(self, url: str, data: dict[str, Any] | None = None) -> DataType:
+        ...
+
+
+
+BASE_URL = 'https://postup.lalabuff.ml/api/beta/'
+TOKEN_URL = 'https://oauth.lalabuff.ml/token'
+TOKEN_FILE = '.token'
+SCOPE = '*'
+
+# refresh this many seconds before the token expires, off the request path
+REFRESH_MARGIN = 60.0
+
+# seconds to wait for a connection, or for the server to send anything, before giving up on a call
+TIMEOUT = 30.0
+
+# statuses worth retrying; anything but a 429 is only retried for idempotent methods
+RETRY_STATUSES = (429, 502, 503, 504)
+IDEMPOTENT = ('GET', 'PUT', 'DELETE')
+
+
+class Credentials(NamedTuple):
+    client_id: str
+    client_secret: str
+    token: str
+    refresh_token: str
+    expires_at: float | None = None
+    
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'Credentials':
+        with open(path, 'r') as f:
+            client_id = f.readline().strip()
+            client_secret = f.readline().strip()
+            token = f.readline().strip()
+            refresh_token = f.readline().strip()
+            expires_at = f.readline().strip()
+        return cls(client_id, client_secret, token, refresh_token, float(expires_at) if expires_at else None)
+    
+    
+    @classmethod
+    def from_env(cls) -> 'Credentials | None':
+        if 'LALA_CLIENT_ID' not in os.environ:
+            return None
+        return cls(
+            os.environ['LALA_CLIENT_ID'],
+            os.environ['LALA_CLIENT_SECRET'],
+            os.environ.get('LALA_TOKEN', ''),
+            os.environ['LALA_REFRESH_TOKEN']
+        )
+
+
+class Client:
+    
+    # nothing is read or connected until the first call, so creating a client is free
+    def __init__(self, token_file: str | None = None, base_url: str | None = None, pool_connections: int = 4, pool_maxsize: int = 64, credentials: Credentials | None = None, cache: 'ResponseCache | None' = None, limiter: 'AdaptiveLimiter | None' = None, retries: int = 0, sinks: 'list[Sink] | None' = None, codec: 'Codec | None' = None, binary: bool = False, cassette: 'Cassette | None' = None, timeout: float | None = TIMEOUT, hedger: 'Hedger | None' = None):
+        self.token_file = token_file
+        self.base_url = base_url
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.credentials = credentials
+        self.cache = cache
+        # limiters can be shared between clients to cap the load they put on the server together
+        self.limiter = limiter
+        self.retries = retries
+        # calls are only measured while there is somewhere to send the measurements
+        self.sinks = sinks if sinks is not None else []
+        # bodies go out in the codec's format, and binary responses are asked for but never required
+        self.codec = codec
+        self.binary = binary
+        self.cassette = cassette
+        # every request is bounded by the timeout and whatever is left of the current deadline
+        self.timeout = timeout
+        self.hedger = hedger
+        
+        self.loaded = False
+        self.load_lock = threading.Lock()
+        self._session: 'requests.Session | None' = None
+        self._codecs: 'dict[str, Codec] | None' = None
+        self.accept = ''
+        
+        # only one refresh may be in flight, since each one invalidates the last refresh token
+        self.refresh_lock = threading.Lock()
+        
+        self.get = self.build_api_function('GET')
+        self.post = self.build_api_function('POST')
+        self.patch = self.build_api_function('PATCH')
+        self.delete = self.build_api_function('DELETE')
+        self.put = self.build_api_function('PUT')
+    
+    
+    def load(self) -> None:
+        if self.loaded:
+            return
+        
+        with self.load_lock:
+            if self.loaded:
+                return
+            
+            # explicit credentials, then an explicit file, then the environment, then the default file
+            credentials = self.credentials
+            if credentials is None and self.token_file is None:
+                credentials = Credentials.from_env()
+            if credentials is None:
+                self.token_file = self.token_file or TOKEN_FILE
+                credentials = Credentials.from_file(self.token_file)
+            
+            self.client_id, self.client_secret, self.token, self.refresh_token, self.expires_at = credentials
+            self.loaded = True
+    
+    
+    @property
+    def session(self) -> 'requests.Session':
+        if self._session is None:
+            with self.load_lock:
+                if self._session is None:
+                    import requests
+                    from .transport import CassetteAdapter, TimedAdapter
+                    
+                    # one keep-alive pool per host, shared by every thread using this client
+                    session = requests.Session()
+                    adapter = TimedAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                    if self.cassette is not None:
+                        adapter = CassetteAdapter(self.cassette, adapter)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+    
+    
+    @property
+    def codecs(self) -> 'dict[str, Codec]':
+        # by media type, with the one requests are encoded in first
+        if self._codecs is None:
+            from .codec import JSON, json_codec, msgpack_codec
+            
+            codecs: 'dict[str, Codec]' = {}
+            body = self.codec or json_codec()
+            codecs[body.content_type] = body
+            if self.binary:
+                binary = msgpack_codec()
+                if binary is not None:
+                    codecs.setdefault(binary.content_type, binary)
+            # the server can always fall back to json, so we must always be able to read it
+            if JSON not in codecs:
+                codecs[JSON] = json_codec()
+            
+            self.accept = ', '.join(content_type if i == 0 else f'{content_type};q=0.5' for i, content_type in enumerate(
+                sorted(codecs, key=lambda content_type: content_type == JSON)
+            ))
+            self._codecs = codecs
+        return self._codecs
+    
+    
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    
+    def update(self) -> None:
+        # credentials that didn't come from a file stay in memory
+        if self.token_file is None:
+            return
+        
+        # write the whole file aside and swap it in so readers never see half of it
+        tmp = f'{self.token_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.client_id + '\n')
+            f.write(self.client_secret + '\n')
+            f.write(self.token + '\n')
+            f.write(self.refresh_token + '\n')
+            if self.expires_at is not None:
+                f.write(f'{self.expires_at}\n')
+        os.replace(tmp, self.token_file)
+    
+    
+    def refresh(self, stale: str | None = None) -> None:
+        self.load()
+        with self.refresh_lock:
+            # whoever held the lock before us may already have replaced the stale token
+            if stale is not None and stale != self.token:
+                return
+            
+            if self.token_file is None:
+                self.redeem()
+                return
+            
+            # every client loaded from the same file holds the same refresh token, which the server
+            # takes only once, so whoever gets here second picks up the first one's tokens instead
+            with token_file_lock(self.token_file):
+                latest = Credentials.from_file(self.token_file)
+                if latest.client_id == self.client_id:
+                    self.token, self.refresh_token, self.expires_at = latest.token, latest.refresh_token, latest.expires_at
+                    if stale is not None and stale != self.token:
+                        return
+                self.redeem()
+    
+    
+    def redeem(self) -> None:
+        response = self.session.post(TOKEN_URL,
+            data={
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'grant_type': 'refresh_token',
+                'refresh_token': self.refresh_token,
+                'scope': SCOPE
+            },
+            timeout=self.request_timeout(TOKEN_URL)
+        )
+        
+        if response.ok:
+            json = response.json()
+            self.token = json['access_token']
+            self.refresh_token = json['refresh_token']
+            self.expires_at = time() + json['expires_in'] if 'expires_in' in json else None
+            self.update()
+            if self.sinks:
+                from .metrics import observe_refresh
+                observe_refresh()
+        else:
+            raise Exception(f'Failed to refresh token: {response} {response.text}')
+    
+    
+    def refresh_in_background(self, stale: str) -> None:
+        try:
+            self.refresh(stale)
+        except Exception:
+            pass # the next call refreshes in the foreground or retries on 401
+    
+    
+    def valid_token(self) -> str:
+        self.load()
+        token = self.token
+        if self.expires_at is not None:
+            remaining = self.expires_at - time()
+            if remaining <= 0:
+                self.refresh(token)
+                token = self.token
+            elif remaining < REFRESH_MARGIN and not self.refresh_lock.locked():
+                threading.Thread(target=self.refresh_in_background, args=(token,), daemon=True).start()
+        return token
+    
+    
+    def request_timeout(self, url: str) -> float | None:
+        end = current_deadline.get()
+        if end is None:
+            return self.timeout
+        remaining = end - monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f'Ran out of time before calling "{url}".')
+        return remaining if self.timeout is None else min(self.timeout, remaining)
+    
+    
+    def make_api_call(self, method: str, url: str, data: dict[str, Any] | None = None, token: str | None = None, headers: dict[str, str] | None = None, stream: bool = False) -> 'requests.Response':
+        self.load()
+        codec = next(iter(self.codecs.values()))
+        response = self.session.request(method, (self.base_url or BASE_URL) + url,
+            data=codec.encode({
+                'data': data
+            }) if data else None,
+            headers={
+                'authorization': f'Bearer {token or self.token}, Client {self.client_id}, Secret {self.client_secret}',
+                'accept': self.accept,
+                **({'content-type': codec.content_type} if data else {}),
+                **(headers or {})
+            },
+            stream=stream,
+            timeout=self.request_timeout(url)
+        )
+        
+        if self.sinks:
+            from .metrics import observe_response
+            observe_response(response, stream)
+        return response
+    
+    
+    def limited_api_call(self, method: str, url: str, data: dict[str, Any] | None = None, token: str | None = None, headers: dict[str, str] | None = None, stream: bool = False) -> 'requests.Response':
+        if self.limiter is None:
+            return self.make_api_call(method, url, data, token, headers, stream)
+        
+        from .limiter import retry_after
+        with self.limiter.permit() as permit:
+            response = self.make_api_call(method, url, data, token, headers, stream)
+            permit.record(response.status_code, retry_after(response.headers))
+        return response
+    
+    
+    def attempt_api_call(self, method: str, url: str, data: dict[str, Any] | None = None, headers: dict[str, str] | None = None, stream: bool = False) -> 'requests.Response':
+        token = self.valid_token()
+        response = self.limited_api_call(method, url, data, token, headers, stream)
+        
+        if response.status_code in (401, 403):
+            # a streamed response holds on to its connection until it's closed
+            response.close()
+            self.refresh(token)
+            response = self.limited_api_call(method, url, data, headers=headers, stream=stream)
+        
+        return response
+    
+    
+    def hedged_api_call(self, method: str, url: str, data: dict[str, Any] | None = None, headers: dict[str, str] | None = None, stream: bool = False) -> 'requests.Response':
+        hedger = self.hedger
+        if hedger is None or method != 'GET' or stream or not hedger.applies(url):
+            return self.attempt_api_call(method, url, data, headers, stream)
+        return hedger.run(url, lambda: self.attempt_api_call(method, url, data, headers, stream))
+    
+    
+    def retry_api_call(self, method: str, url: str, data: dict[str, Any] | None = None, headers: dict[str, str] | None = None, stream: bool = False) -> 'requests.Response':
+        response = self.hedged_api_call(method, url, data, headers, stream)
+        
+        attempt = 0
+        while (
+            attempt < self.retries
+            and response.status_code in RETRY_STATUSES
+            and (method in IDEMPOTENT or response.status_code == 429)
+        ):
+            from .limiter import backoff, retry_after
+            delay = backoff(attempt, retry_after(response.headers))
+            # no point waiting to retry if the deadline will have passed by then
+            end = current_deadline.get()
+            if end is not None and monotonic() + delay >= end:
+                break
+            response.close()
+            sleep(delay)
+            attempt += 1
+            if self.sinks:
+                from .metrics import observe_retry
+                observe_retry()
+            response = self.hedged_api_call(method, url, data, headers, stream)
+        
+        if not response.ok:
+            raise ApiException(f'Failed to make api call to "{url}": {response.text}', response.status_code)
+        
+        return response
+    
+    
+    def call(self, method: str, url: str, data: dict[str, Any] | None = None) -> DataType:
+        if not self.sinks:
+            return self.dispatch(method, url, data)
+        
+        from .metrics import measure
+        with measure(self.sinks, method, url):
+            return self.dispatch(method, url, data)
+    
+    
+    def dispatch(self, method: str, url: str, data: dict[str, Any] | None = None) -> DataType:
+        if self.cache is None:
+            return self.get_data(self.retry_api_call(method, url, data))
+        elif method == 'GET':
+            return self.cached_get(self.cache, url)
+        
+        try:
+            return self.get_data(self.retry_api_call(method, url, data))
+        finally:
+            # even a failed write may have changed something
+            self.cache.invalidate(method, url)
+    
+    
+    def cached_get(self, cache: 'ResponseCache', url: str) -> DataType:
+        # callers are free to mutate what they get back, so the cache only ever hands out copies
+        entry = cache.lookup(url)
+        if entry is not None and cache.is_fresh(entry):
+            return deepcopy(entry.data)
+        
+        generation = cache.generation
+        headers = {'If-None-Match': entry.etag} if entry is not None and entry.etag else None
+        response = self.retry_api_call('GET', url, headers=headers)
+        
+        if response.status_code == 304 and entry is not None:
+            cache.revalidated(url, entry, generation)
+            return deepcopy(entry.data)
+        
+        data = self.get_data(response)
+        cache.store(url, data, response.headers.get('ETag'), generation)
+        return deepcopy(data)
+    
+    
+    def decode(self, response: 'requests.Response') -> Any:
+        from .codec import JSON, media_type
+        codecs = self.codecs
+        codec = codecs.get(media_type(response.headers.get('Content-Type'))) or codecs[JSON]
+        return codec.decode(response.content)
+    
+    
+    def get_data(self, response: 'requests.Response') -> DataType:
+        json = self.decode(response)
+        if json.get('ok'):
+            return json.get('data')
+        else:
+            raise Exception(f'Failed to fetch data: [{json.get("status")}] {json.get("message")}')
+    
+    
+    def stream_items(self, url: str) -> Generator[tuple[str, Any], None, None]:
+        # for the uuid -> item maps, which get big enough that holding a whole one (let alone
+        # the text it was decoded from) hurts; pairs come out as the body arrives
+        if not self.sinks:
+            response = self.retry_api_call('GET', url, stream=True)
+        else:
+            # only up to the headers, since the caller's work happens between the items
+            from .metrics import measure
+            with measure(self.sinks, 'GET', url):
+                response = self.retry_api_call('GET', url, stream=True)
+        
+        from .codec import MSGPACK, media_type
+        from .stream import iter_items
+        with response:
+            yield from iter_items(response, media_type(response.headers.get('Content-Type')) == MSGPACK)
+    
+    
+    def batch(self) -> 'Batch':
+        from .batching import Batch
+        return Batch(self)
+    
+    
+    def build_api_function(self, method: str) -> ApiFunction:
+        def api_function(url: str, data: dict[str, Any] | None = None) -> DataType:
+            return self.call(method, url, data)
+        return api_function
+
+
+
+# token files being refreshed in this process; other processes are kept out by a lock file beside it
+_token_file_locks: dict[str, threading.Lock] = {}
+_token_file_locks_lock = threading.Lock()
+
+
+@contextmanager
+def token_file_lock(path: str) -> Generator[None, None, None]:
+    with _token_file_locks_lock:
+        lock = _token_file_locks.setdefault(os.path.abspath(path), threading.Lock())
+    with lock:
+        try:
+            import fcntl
+        except ImportError:
+            # no advisory locks on this platform, so only clients in this process keep in step
+            yield
+            return
+        with open(f'{path}.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+
+client = Client()
+
+# lets a thread or task run against its own client (and token state) without
+# affecting callers that use the module-level functions elsewhere
+_client_override: ContextVar[Client | None] = ContextVar('client', default=None)
+
+
+def current_client() -> Client:
+    return _client_override.get() or client
+
+
+def set_client(new_client: Client | None) -> Token[Client | None]:
+    return _client_override.set(new_client)
+
+
+@contextmanager
+def use_client(new_client: Client) -> Generator[Client, None, None]:
+    token = set_client(new_client)
+    try:
+        yield new_client
+    finally:
+        _client_override.reset(token)
+
+
+# when the current budget runs out, as a monotonic time; it follows the context into batches and tasks
+current_deadline: ContextVar[float | None] = ContextVar('deadline', default=None)
+
+
+@contextmanager
+def deadline(seconds: float) -> Generator[None, None, None]:
+    # a budget for every call in the block, retries and refreshes included; nesting only shrinks it
+    end = monotonic() + seconds
+    outer = current_deadline.get()
+    token = current_deadline.set(end if outer is None else min(outer, end))
+    try:
+        yield
+    finally:
+        current_deadline.reset(token)
+
+
+def update() -> None:
+    current_client().update()
+
+
+def get_data(response: 'requests.Response') -> DataType:
+    return current_client().get_data(response)
+
+
+def stream_items(url: str) -> Generator[tuple[str, Any], None, None]:
+    return current_client().stream_items(url)
+
+
+def batch() -> 'Batch':
+    # independent calls queued in the with block go out together on the way out, as in
+    #   with api.batch() as b:
+    #       active, player = b.get('quests/active'), b.get('player')
+    return current_client().batch()
+
+
+def refresh() -> None:
+    current_client().refresh()
+
+
+def make_api_call(method: str, url: str, data: dict[str, Any] | None = None) -> 'requests.Response':
+    return current_client().make_api_call(method, url, data)
+
+
+def retry_api_call(method: str, url: str, data: dict[str, Any] | None = None) -> 'requests.Response':
+    return current_client().retry_api_call(method, url, data)
+
+
+def build_api_function(method: str) -> ApiFunction:
+    # looks up the current client on every call so it can be swapped out
+    def api_function(url: str, data: dict[str, Any] | None = None) -> DataType:
+        return current_client().call(method, url, data)
+    return api_function
+
+
+get = build_api_function('GET')
+post = build_api_function('POST')
+patch = build_api_function('PATCH')
+delete = build_api_function('DELETE')
+put = build_api_function('PUT')
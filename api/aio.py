@@ -0,0 +1,68 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import TYPE_CHECKING, Any, Awaitable, Protocol
+
+import api
+from api import DataType
+
+if TYPE_CHECKING:
+    import requests
+
+
+class AsyncApiFunction(Protocol):
+    def __call__(self, url: str, data: dict[str, Any] | None = None) -> Awaitable[DataType]:
+        ...
+
+
+class ThreadedAsyncClient:
+    
+    # awaitable calls for asyncio code, not an async transport: requests has no native coroutine
+    # support, so every call in flight holds one of the executor's threads and one of the wrapped
+    # client's pooled connections, which caps it at max_concurrency (and the client's pool_maxsize);
+    # each call carries the caller's context along so client overrides and metrics attribution apply
+    def __init__(self, client: api.Client | None = None, max_concurrency: int = 64):
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix='api-aio')
+        
+        self.get = self.build_api_function('GET')
+        self.post = self.build_api_function('POST')
+        self.patch = self.build_api_function('PATCH')
+        self.delete = self.build_api_function('DELETE')
+        self.put = self.build_api_function('PUT')
+    
+    
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    
+    async def refresh(self) -> None:
+        client = self.client or api.current_client()
+        await asyncio.get_running_loop().run_in_executor(self.executor, copy_context().run, client.refresh)
+    
+    
+    async def retry_api_call(self, method: str, url: str, data: dict[str, Any] | None = None) -> 'requests.Response':
+        client = self.client or api.current_client()
+        context = copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, lambda: context.run(client.retry_api_call, method, url, data))
+    
+    
+    async def call(self, method: str, url: str, data: dict[str, Any] | None = None) -> DataType:
+        client = self.client or api.current_client()
+        context = copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, lambda: context.run(client.call, method, url, data))
+    
+    
+    def build_api_function(self, method: str) -> AsyncApiFunction:
+        async def api_function(url: str, data: dict[str, Any] | None = None) -> DataType:
+            return await self.call(method, url, data)
+        return api_function
+
+
+client = ThreadedAsyncClient()
+
+get = client.get
+post = client.post
+patch = client.patch
+delete = client.delete
+put = client.put
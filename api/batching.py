@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from types import TracebackType
+
+import api
+from api import DataType
+
+from typing import Any, NamedTuple, Protocol
+
+
+WORKERS = 16
+
+
+class QueuedCall(NamedTuple):
+    method: str
+    url: str
+    data: dict[str, Any] | None
+    future: 'Future[DataType]'
+
+
+class BatchFunction(Protocol):
+    def __call__(self, url: str, data: dict[str, Any] | None = None) -> 'Future[DataType]':
+        ...
+
+
+class Batch:
+    
+    # calls are only queued until the batch is dispatched, which the with block does on the way
+    # out; they then all go out at once, so their order isn't guaranteed and waiting on a future
+    # before dispatch blocks forever
+    def __init__(self, client: api.Client | None = None):
+        self.client = client or api.current_client()
+        self.calls: list[QueuedCall] = []
+        
+        self.get = self.build_api_function('GET')
+        self.post = self.build_api_function('POST')
+        self.patch = self.build_api_function('PATCH')
+        self.delete = self.build_api_function('DELETE')
+        self.put = self.build_api_function('PUT')
+    
+    
+    def __enter__(self) -> 'Batch':
+        return self
+    
+    
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        if exc_type is None:
+            self.dispatch()
+        else:
+            self.cancel()
+    
+    
+    def call(self, method: str, url: str, data: dict[str, Any] | None = None) -> 'Future[DataType]':
+        future: Future[DataType] = Future()
+        self.calls.append(QueuedCall(method, url, data, future))
+        return future
+    
+    
+    def run(self, call: QueuedCall) -> None:
+        if not call.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.client.call(call.method, call.url, call.data)
+        except Exception as e:
+            # api errors carry their status, anything else (like a dropped connection) keeps its type
+            call.future.set_exception(e)
+        else:
+            call.future.set_result(result)
+    
+    
+    def dispatch(self) -> None:
+        calls, self.calls = self.calls, []
+        if not calls:
+            return
+        
+        # a batch dispatched from one of the shared workers (a call that batches calls of its own)
+        # can't wait on the others, which may all be waiting on it, so it runs its calls in turn
+        if getattr(worker, 'active', False):
+            for call in calls:
+                self.run(call)
+            return
+        
+        # the caller takes the first call itself rather than sitting idle
+        executor = get_executor()
+        pending = [executor.submit(copy_context().run, self.run, call) for call in calls[1:]]
+        self.run(calls[0])
+        wait(pending)
+    
+    
+    def cancel(self) -> None:
+        calls, self.calls = self.calls, []
+        for call in calls:
+            call.future.cancel()
+    
+    
+    def build_api_function(self, method: str) -> BatchFunction:
+        def api_function(url: str, data: dict[str, Any] | None = None) -> 'Future[DataType]':
+            return self.call(method, url, data)
+        return api_function
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+# marks the executor's own threads
+worker = threading.local()
+
+
+def mark_worker() -> None:
+    worker.active = True
+
+
+def get_executor() -> ThreadPoolExecutor:
+    # shared by every batch, since the connection pool is what bounds them anyway
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(WORKERS, thread_name_prefix='api-batch', initializer=mark_worker)
+        return _executor
@@ -0,0 +1,103 @@
+import re
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from typing import Any, NamedTuple
+
+
+ITEM = re.compile(r'^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$')
+
+# writes to these also show up in the quest lists
+QUEST_ROOTS = ('quests', 'dailies', 'regulars')
+
+
+class CacheEntry(NamedTuple):
+    data: Any
+    etag: str | None
+    expires_at: float
+
+
+def is_item(segment: str) -> bool:
+    return ITEM.match(segment) is not None
+
+
+def is_list(segments: list[str]) -> bool:
+    # 'quests', 'quests/active' and 'quests/daily' but not 'quests/{uuid}/...'
+    return len(segments) <= 2 and not any(is_item(segment) for segment in segments)
+
+
+def is_affected(key: str, method: str, url: str) -> bool:
+    written = url.strip('/').split('/')
+    segments = key.strip('/').split('/')
+    root = written[0]
+    
+    # anything under the written item, which covers checkbox indices shifting after a delete
+    if len(written) >= 2 and is_item(written[1]) and segments[:2] == written[:2]:
+        return True
+    
+    # anything above the written resource
+    if segments == written[:len(segments)]:
+        return True
+    
+    # lists that may contain the written item
+    if is_list(segments) and (segments[0] == root or root in QUEST_ROOTS and segments[0] == 'quests'):
+        return True
+    
+    # creating or deleting a quest changes the prereqs and sequels of its neighbours
+    creates_or_deletes = method == 'POST' and len(written) == 1 or method == 'DELETE' and len(written) == 2
+    if creates_or_deletes and segments[0] == root and segments[-1] in ('prereqs', 'sequels'):
+        return True
+    
+    # completing quests and the like changes what the player has
+    return segments == ['player']
+
+
+class ResponseCache:
+    
+    def __init__(self, ttl: float = 5.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        # bumped on every invalidation so a read that raced a write isn't stored
+        self.generation = 0
+    
+    
+    def lookup(self, url: str) -> CacheEntry | None:
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None:
+                self.entries.move_to_end(url)
+            return entry
+    
+    
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return entry.expires_at > monotonic()
+    
+    
+    def store(self, url: str, data: Any, etag: str | None, generation: int) -> None:
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[url] = CacheEntry(data, etag, monotonic() + self.ttl)
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    
+    def revalidated(self, url: str, entry: CacheEntry, generation: int) -> None:
+        self.store(url, entry.data, entry.etag, generation)
+    
+    
+    def invalidate(self, method: str, url: str) -> None:
+        with self.lock:
+            self.generation += 1
+            for key in [key for key in self.entries if is_affected(key, method, url)]:
+                del self.entries[key]
+    
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
@@ -0,0 +1,179 @@
+import atexit
+import hashlib
+import json
+import mmap
+import struct
+import threading
+import warnings
+from urllib.parse import urlsplit
+
+from .metrics import current_test, route_template
+
+from typing import Any, NamedTuple
+
+
+MAGIC = b'LALACAS1'
+# meta length, body length
+ENTRY = struct.Struct('<II')
+# magic, index offset
+FOOTER = struct.Struct('<8sQ')
+
+# the body is stored decoded, so these would only describe it wrongly on replay
+DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+class Exchange(NamedTuple):
+    method: str
+    url: str
+    status: int
+    reason: str
+    headers: dict[str, str]
+    body: bytes
+
+
+def exchange_keys(method: str, url: str, body: bytes | str | None) -> tuple[str, str]:
+    # exact: the same request down to its body; loose: anything on the same route. both are kept
+    # apart per test, so tests running side by side don't take each other's exchanges
+    test = current_test.get() or '-'
+    parts = urlsplit(url)
+    path = parts.path + ('?' + parts.query if parts.query else '')
+    if isinstance(body, str):
+        body = body.encode()
+    digest = hashlib.sha1(body).hexdigest() if body else '-'
+    return f'{test} {method} {path} {digest}', f'{test} {method} {route_template(parts.path)}'
+
+
+class Cassette:
+    
+    # entries are appended as they happen and indexed at the end, so a replay only parses the
+    # index and reads each entry out of the mapped file when it's asked for. replays only match
+    # on the whole request unless loose, which falls back to the same route with any body
+    def __init__(self, path: str, recording: bool, loose: bool = False):
+        self.path = path
+        self.recording = recording
+        self.loose_matching = loose
+        self.loose_hits = 0
+        self.lock = threading.Lock()
+        self.exact: dict[str, list[int]] = {}
+        self.loose: dict[str, list[int]] = {}
+        self.cursors: dict[str, int] = {}
+        self.closed = False
+        
+        if recording:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+            atexit.register(self.close)
+        else:
+            with open(path, 'rb') as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f'"{path}" is not a cassette.')
+            self.load_index()
+    
+    
+    @classmethod
+    def record(cls, path: str) -> 'Cassette':
+        return cls(path, True)
+    
+    
+    @classmethod
+    def replay(cls, path: str, loose: bool = False) -> 'Cassette':
+        return cls(path, False, loose)
+    
+    
+    def load_index(self) -> None:
+        magic, offset = FOOTER.unpack_from(self.map, len(self.map) - FOOTER.size) if len(self.map) >= len(MAGIC) + FOOTER.size else (b'', 0)
+        if magic == MAGIC:
+            index = json.loads(self.map[offset:len(self.map) - FOOTER.size])
+            self.exact, self.loose = index['exact'], index['loose']
+            return
+        
+        # the recording never got closed, so rebuild the index from whatever entries made it out
+        offset = len(MAGIC)
+        while offset + ENTRY.size <= len(self.map):
+            meta_length, body_length = ENTRY.unpack_from(self.map, offset)
+            end = offset + ENTRY.size + meta_length + body_length
+            if end > len(self.map):
+                break
+            meta = json.loads(self.map[offset + ENTRY.size:offset + ENTRY.size + meta_length])
+            self.index(meta['exact'], meta['loose'], offset)
+            offset = end
+    
+    
+    def index(self, exact: str, loose: str, offset: int) -> None:
+        self.exact.setdefault(exact, []).append(offset)
+        self.loose.setdefault(loose, []).append(offset)
+    
+    
+    def add(self, method: str, url: str, request_body: bytes | str | None, status: int, reason: str, headers: dict[str, str], body: bytes) -> None:
+        exact, loose = exchange_keys(method, url, request_body)
+        meta = json.dumps({
+            'exact': exact,
+            'loose': loose,
+            'method': method,
+            'url': url,
+            'status': status,
+            'reason': reason,
+            'headers': {key: value for key, value in headers.items() if key.lower() not in DROPPED_HEADERS},
+        }).encode()
+        
+        with self.lock:
+            if self.closed:
+                return
+            offset = self.file.tell()
+            self.file.write(ENTRY.pack(len(meta), len(body)))
+            self.file.write(meta)
+            self.file.write(body)
+            self.index(exact, loose, offset)
+    
+    
+    def read(self, offset: int) -> Exchange:
+        meta_length, body_length = ENTRY.unpack_from(self.map, offset)
+        start = offset + ENTRY.size
+        meta: dict[str, Any] = json.loads(self.map[start:start + meta_length])
+        body = self.map[start + meta_length:start + meta_length + body_length]
+        return Exchange(meta['method'], meta['url'], meta['status'], meta['reason'], meta['headers'], body)
+    
+    
+    def next(self, index: dict[str, list[int]], key: str) -> int | None:
+        # each key plays its exchanges back in order and then keeps repeating the last one
+        offsets = index.get(key)
+        if not offsets:
+            return None
+        cursor = self.cursors.get(key, 0)
+        self.cursors[key] = cursor + 1
+        return offsets[min(cursor, len(offsets) - 1)]
+    
+    
+    def find(self, method: str, url: str, request_body: bytes | str | None) -> Exchange:
+        exact, loose = exchange_keys(method, url, request_body)
+        with self.lock:
+            offset = self.next(self.exact, exact)
+            fallback = offset is None and self.loose_matching
+            if fallback:
+                offset = self.next(self.loose, loose)
+                self.loose_hits += offset is not None
+        if offset is None:
+            raise CassetteMiss(f'No recorded exchange for {method} {url} with this body.')
+        if fallback:
+            # the request drifted from the recording, and the answer may not fit it any more
+            warnings.warn(f'Replaying {method} {url} from a recording with a different body.', stacklevel=2)
+        return self.read(offset)
+    
+    
+    def close(self) -> None:
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self.recording:
+                offset = self.file.tell()
+                self.file.write(json.dumps({'exact': self.exact, 'loose': self.loose}).encode())
+                self.file.write(FOOTER.pack(MAGIC, offset))
+                self.file.close()
+            else:
+                self.map.close()
@@ -0,0 +1,83 @@
+import json
+
+from typing import Any, Callable, Protocol
+
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+
+
+class Codec(Protocol):
+    content_type: str
+    
+    def encode(self, value: Any) -> bytes:
+        ...
+    
+    def decode(self, data: bytes) -> Any:
+        ...
+
+
+class StdlibJsonCodec:
+    content_type = JSON
+    
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(',', ':')).encode()
+    
+    
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    content_type = JSON
+    
+    def __init__(self) -> None:
+        import orjson
+        self.dumps = orjson.dumps
+        self.loads = orjson.loads
+    
+    
+    def encode(self, value: Any) -> bytes:
+        return self.dumps(value)
+    
+    
+    def decode(self, data: bytes) -> Any:
+        return self.loads(data)
+
+
+class MsgpackCodec:
+    content_type = MSGPACK
+    
+    def __init__(self) -> None:
+        # msgpack ships without type information, so it's typed here, where it comes in
+        import msgpack # type: ignore[import-untyped]
+        self.packb: Callable[..., bytes] = msgpack.packb # type: ignore
+        self.unpackb: Callable[..., Any] = msgpack.unpackb # type: ignore
+    
+    
+    def encode(self, value: Any) -> bytes:
+        return self.packb(value, use_bin_type=True)
+    
+    
+    def decode(self, data: bytes) -> Any:
+        return self.unpackb(data, raw=False)
+
+
+def json_codec() -> Codec:
+    # orjson decodes straight from bytes several times faster, when it's installed
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return StdlibJsonCodec()
+
+
+def msgpack_codec() -> Codec | None:
+    try:
+        return MsgpackCodec()
+    except ImportError:
+        return None
+
+
+def media_type(content_type: str | None) -> str:
+    # 'application/json; charset=utf-8' -> 'application/json'
+    return (content_type or '').split(';', 1)[0].strip().lower()
@@ -0,0 +1,129 @@
+from time import time
+
+import api
+
+from typing import Any, Container, Iterable
+
+
+class QuestGraph:
+    
+    # a local copy of the player's quests and the prereq links between them, so walking chains
+    # doesn't cost a round trip per quest; keep it current by feeding it the responses of the
+    # calls that change it
+    def __init__(self, quests: dict[str, dict[str, Any]], prereqs: dict[str, list[str]]):
+        self.quests: dict[str, dict[str, Any]] = {}
+        self.prereqs: dict[str, list[str]] = {}
+        self.sequels: dict[str, list[str]] = {}
+        for uuid, quest in quests.items():
+            self.add(uuid, quest, prereqs.get(uuid, []))
+    
+    
+    @classmethod
+    def fetch(cls, client: api.Client | None = None) -> 'QuestGraph':
+        # quest lists don't carry prereqs, so those are all asked for at once after the list
+        client = client or api.current_client()
+        quests = dict(client.stream_items('quests'))
+        with client.batch() as batch:
+            futures = {uuid: batch.get(f'quests/{uuid}/prereqs') for uuid in quests}
+        
+        prereqs: dict[str, list[str]] = {}
+        for uuid, future in futures.items():
+            try:
+                prereqs[uuid] = future.result() # type: ignore
+            except api.ApiException as e:
+                # deleted since the list was read, so it's no longer part of the graph
+                if e.status_code != 404:
+                    raise
+                del quests[uuid]
+        return cls(quests, prereqs)
+    
+    
+    def add(self, uuid: str, quest: dict[str, Any], prereqs: list[str]) -> None:
+        self.quests[uuid] = quest
+        self.prereqs[uuid] = list(prereqs)
+        self.sequels.setdefault(uuid, [])
+        for prereq in prereqs:
+            self.sequels.setdefault(prereq, []).append(uuid)
+    
+    
+    #
+    # UPDATES
+    #
+    
+    def created(self, response: dict[str, Any]) -> str:
+        # the response to post('quests')
+        self.add(response['uuid'], response['quest'], response['prereqs'])
+        return response['uuid']
+    
+    
+    def completed(self, uuid: str, response: dict[str, Any]) -> None:
+        # the response to post(f'quests/{uuid}/complete')
+        self.quests[uuid] = response['quest']
+    
+    
+    def deleted(self, uuid: str) -> None:
+        # the server drops the quest from its sequels' prereqs, and so does this
+        del self.quests[uuid]
+        for prereq in self.prereqs.pop(uuid):
+            self.sequels[prereq].remove(uuid)
+        for sequel in self.sequels.pop(uuid):
+            self.prereqs[sequel].remove(uuid)
+    
+    
+    #
+    # QUERIES
+    #
+    
+    def get_prereqs(self, uuid: str) -> list[str]:
+        return list(self.prereqs[uuid])
+    
+    
+    def get_sequels(self, uuid: str) -> list[str]:
+        return list(self.sequels[uuid])
+    
+    
+    def walk(self, uuid: str, edges: dict[str, list[str]]) -> set[str]:
+        seen: set[str] = set()
+        stack = list(edges[uuid])
+        while stack:
+            other = stack.pop()
+            if other not in seen:
+                seen.add(other)
+                stack.extend(edges.get(other, ()))
+        return seen
+    
+    
+    def ancestors(self, uuid: str) -> set[str]:
+        return self.walk(uuid, self.prereqs)
+    
+    
+    def descendants(self, uuid: str) -> set[str]:
+        return self.walk(uuid, self.sequels)
+    
+    
+    def is_active(self, uuid: str, now: float | None = None, completed: Container[str] = ()) -> bool:
+        # the server's rule, optionally as if some more quests had been completed
+        quest = self.quests[uuid]
+        return (
+            not quest['completed']
+            and uuid not in completed
+            and quest['deadline'] > (time() if now is None else now)
+            and all(self.quests[prereq]['completed'] or prereq in completed for prereq in self.prereqs[uuid] if prereq in self.quests)
+        )
+    
+    
+    def active(self, now: float | None = None, completed: Iterable[str] = ()) -> set[str]:
+        now = time() if now is None else now
+        done = set(completed)
+        return {uuid for uuid in self.quests if self.is_active(uuid, now, done)}
+    
+    
+    def active_after(self, uuid: str, now: float | None = None) -> set[str]:
+        # what quests/active will list once this quest is completed
+        return self.active(now, (uuid,))
+    
+    
+    def unlocks(self, uuid: str, now: float | None = None) -> set[str]:
+        # the sequels that completing this quest makes active
+        now = time() if now is None else now
+        return {sequel for sequel in self.sequels[uuid] if self.is_active(sequel, now, (uuid,)) and not self.is_active(sequel, now)}
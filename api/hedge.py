@@ -0,0 +1,104 @@
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from time import perf_counter
+
+from .metrics import route_template
+
+from typing import TYPE_CHECKING, Callable, Container
+
+if TYPE_CHECKING:
+    import requests
+
+
+# latencies kept per route, and how many it takes before there's a p95 worth trusting
+WINDOW = 256
+MIN_SAMPLES = 20
+WORKERS = 16
+
+
+class Hedger:
+    
+    # sends a duplicate of a slow GET once it has taken longer than most calls to its route do,
+    # and takes whichever answers first; only ever for idempotent calls, since both may land
+    def __init__(self, quantile: float = 0.95, routes: Container[str] | None = None, min_samples: int = MIN_SAMPLES):
+        self.quantile = quantile
+        # route templates like 'quests/{uuid}', or None for every GET
+        self.routes = routes
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+        self.latencies: dict[str, deque[float]] = {}
+        self.hedges = 0
+        self.wins = 0
+        self.executor: ThreadPoolExecutor | None = None
+    
+    
+    def applies(self, url: str) -> bool:
+        return self.routes is None or route_template(url) in self.routes
+    
+    
+    def observe(self, route: str, seconds: float) -> None:
+        with self.lock:
+            if route not in self.latencies:
+                self.latencies[route] = deque(maxlen=WINDOW)
+            self.latencies[route].append(seconds)
+    
+    
+    def delay(self, route: str) -> float | None:
+        with self.lock:
+            window = self.latencies.get(route)
+            if window is None or len(window) < self.min_samples:
+                return None
+            ordered = sorted(window)
+        return ordered[int(self.quantile * (len(ordered) - 1))]
+    
+    
+    def get_executor(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(WORKERS, thread_name_prefix='hedge')
+            return self.executor
+    
+    
+    def timed(self, route: str, send: Callable[[], 'requests.Response']) -> 'requests.Response':
+        start = perf_counter()
+        response = send()
+        self.observe(route, perf_counter() - start)
+        return response
+    
+    
+    def run(self, url: str, send: Callable[[], 'requests.Response']) -> 'requests.Response':
+        route = route_template(url)
+        delay = self.delay(route)
+        if delay is None:
+            return self.timed(route, send)
+        
+        executor = self.get_executor()
+        primary = executor.submit(copy_context().run, self.timed, route, send)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        
+        with self.lock:
+            self.hedges += 1
+        hedge = executor.submit(copy_context().run, self.timed, route, send)
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        loser = hedge if winner is primary else primary
+        
+        # a failure only wins if the other one fails too
+        if winner.exception() is not None:
+            winner, loser = loser, winner
+        
+        if winner is hedge:
+            with self.lock:
+                self.wins += 1
+        loser.add_done_callback(close_response)
+        return winner.result()
+
+
+def close_response(future: 'Future[requests.Response]') -> None:
+    # the slower copy still holds a connection until its response is closed
+    if future.exception() is None:
+        future.result().close()
@@ -0,0 +1,134 @@
+import random
+import threading
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from time import monotonic, time
+
+from typing import Generator, Mapping
+
+
+# responses that mean the server wants less traffic
+OVERLOADED = (429, 503)
+
+# a longer Retry-After is more likely a broken (or hostile) header than a real request, and would
+# hold up a retrying worker, or everything behind a limiter, for that long
+MAX_RETRY_AFTER = 60.0
+
+
+def retry_after(headers: Mapping[str, str]) -> float | None:
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time()
+        except (TypeError, ValueError):
+            return None
+    return min(MAX_RETRY_AFTER, max(0.0, seconds))
+
+
+def timed_out(error: BaseException) -> bool:
+    # only the server being slow to answer says something about load; a deadline running out, or
+    # anything else going wrong on this end, doesn't
+    import requests
+    return isinstance(error, requests.Timeout)
+
+
+def backoff(attempt: int, delay: float | None = None, base: float = 0.1, cap: float = 10.0) -> float:
+    # full jitter, on top of whatever the server asked for
+    jitter = random.uniform(0, min(cap, base * 2 ** attempt))
+    return jitter if delay is None else delay + jitter
+
+
+class Permit:
+    
+    def __init__(self) -> None:
+        self.status: int | None = None
+        self.retry_after: float | None = None
+    
+    
+    def record(self, status: int, retry_after: float | None = None) -> None:
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    
+    # additive increase, multiplicative decrease on the number of requests in flight,
+    # driven by overload responses and by latency rising well above the best seen
+    def __init__(self, limit: float = 8, min_limit: int = 1, max_limit: int = 256, decrease: float = 0.5, tolerance: float = 2.0, drift: float = 0.01):
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.drift = drift
+        
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.resume_at = 0.0
+        self.baseline: float | None = None
+        self.last_decrease = 0.0
+    
+    
+    def acquire(self) -> None:
+        with self.condition:
+            while True:
+                wait = self.resume_at - monotonic()
+                if wait > 0:
+                    self.condition.wait(wait)
+                elif self.in_flight < max(self.min_limit, int(self.limit)):
+                    break
+                else:
+                    self.condition.wait()
+            self.in_flight += 1
+    
+    
+    def release(self, latency: float, overloaded: bool = False, delay: float | None = None) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            now = monotonic()
+            
+            if delay is not None:
+                self.resume_at = max(self.resume_at, now + delay)
+            
+            # let the baseline creep up so one lucky fast response doesn't pin the limit down forever
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += (latency - self.baseline) * self.drift
+            
+            if overloaded or latency > self.baseline * self.tolerance:
+                # at most one decrease per round trip, since everything in flight saw the same congestion
+                if now - self.last_decrease > latency:
+                    self.limit = max(float(self.min_limit), self.limit * self.decrease)
+                    self.last_decrease = now
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            
+            self.condition.notify_all()
+    
+    
+    def cancel(self) -> None:
+        # hands a permit back without a verdict, for calls that failed before the server had its say
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+    
+    
+    @contextmanager
+    def permit(self) -> Generator[Permit, None, None]:
+        self.acquire()
+        permit = Permit()
+        start = monotonic()
+        try:
+            yield permit
+        except BaseException as e:
+            if timed_out(e):
+                self.release(monotonic() - start, True)
+            else:
+                self.cancel()
+            raise
+        self.release(monotonic() - start, permit.status in OVERLOADED, permit.retry_after)
@@ -0,0 +1,378 @@
+import json
+import os
+import re
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter, time
+
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable, NamedTuple, Protocol
+
+if TYPE_CHECKING:
+    import requests
+
+
+UUID = re.compile(r'^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$')
+
+# seconds, roughly the prometheus client defaults shifted down for a fast api
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# whatever is running when a call is made, usually the id of a test
+current_test: ContextVar[str | None] = ContextVar('test', default=None)
+
+
+def route_template(url: str) -> str:
+    # 'quests/1b4e.../checkboxes/3' -> 'quests/{uuid}/checkboxes/{i}'
+    segments = url.strip('/').split('/')
+    return '/'.join(
+        '{uuid}' if UUID.match(segment) else '{i}' if segment.lstrip('-').isdigit() else segment
+        for segment in segments
+    )
+
+
+class CallRecord(NamedTuple):
+    timestamp: float
+    test: str | None
+    method: str
+    route: str
+    url: str
+    # the last response seen, or none if the call never got one (or was served from the cache)
+    status: int | None
+    error: str | None
+    request_bytes: int
+    response_bytes: int
+    # dns resolution and the tcp handshake together, only when the call opened a new connection
+    connect: float | None
+    tls: float | None
+    ttfb: float | None
+    total: float
+    attempts: int
+    retries: int
+    refreshes: int
+
+
+class CallTiming:
+    
+    # filled in by the client and the transport as a call makes its way down
+    def __init__(self) -> None:
+        self.status: int | None = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.connect: float | None = None
+        self.tls: float | None = None
+        self.ttfb: float | None = None
+        self.attempts = 0
+        self.retries = 0
+        self.refreshes = 0
+    
+    
+    def add_connect(self, seconds: float) -> None:
+        self.connect = (self.connect or 0.0) + seconds
+    
+    
+    def add_tls(self, seconds: float) -> None:
+        self.tls = (self.tls or 0.0) + seconds
+
+
+current_call: ContextVar[CallTiming | None] = ContextVar('call', default=None)
+
+
+class Sink(Protocol):
+    def record(self, record: CallRecord) -> None:
+        ...
+
+
+@contextmanager
+def measure(sinks: Iterable[Sink], method: str, url: str) -> Generator[CallTiming, None, None]:
+    timing = CallTiming()
+    token = current_call.set(timing)
+    error = None
+    start = perf_counter()
+    try:
+        yield timing
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        total = perf_counter() - start
+        current_call.reset(token)
+        record = CallRecord(
+            time(), current_test.get(), method, route_template(url), url, timing.status, error,
+            timing.request_bytes, timing.response_bytes, timing.connect, timing.tls, timing.ttfb, total,
+            timing.attempts, timing.retries, timing.refreshes
+        )
+        for sink in sinks:
+            sink.record(record)
+
+
+def observe_response(response: 'requests.Response', stream: bool = False) -> None:
+    timing = current_call.get()
+    if timing is None:
+        return
+    
+    body = response.request.body
+    timing.status = response.status_code
+    # the client only ever sends encoded bodies, never streamed ones
+    timing.request_bytes += len(body) if isinstance(body, (bytes, str)) else 0
+    # reading a streamed body here would defeat the point of streaming it
+    timing.response_bytes += int(response.headers.get('Content-Length') or 0) if stream else len(response.content)
+    # requests times from sending the request to parsing the response headers
+    timing.ttfb = response.elapsed.total_seconds()
+    timing.attempts += 1
+
+
+def observe_retry() -> None:
+    timing = current_call.get()
+    if timing is not None:
+        timing.retries += 1
+
+
+def observe_refresh() -> None:
+    timing = current_call.get()
+    if timing is not None:
+        timing.refreshes += 1
+
+
+#
+# SINKS
+#
+
+class Histogram:
+    
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        # the last count is everything above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+    
+    
+    def quantile(self, q: float) -> float:
+        # the upper bound of the bucket holding the rank, which is all a histogram can promise
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Series:
+    
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.total = Histogram(buckets)
+        self.ttfb = Histogram(buckets)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.connections = 0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.attempts = 0
+        self.retries = 0
+        self.refreshes = 0
+    
+    
+    def add(self, record: CallRecord) -> None:
+        self.total.observe(record.total)
+        if record.ttfb is not None:
+            self.ttfb.observe(record.ttfb)
+        if record.connect is not None:
+            self.connections += 1
+            self.connect += record.connect
+        self.tls += record.tls or 0.0
+        self.request_bytes += record.request_bytes
+        self.response_bytes += record.response_bytes
+        self.attempts += record.attempts
+        self.retries += record.retries
+        self.refreshes += record.refreshes
+
+
+class HistogramSink:
+    
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series: dict[tuple[str, str, str], Series] = {}
+        self.tests: dict[str, Histogram] = {}
+    
+    
+    def record(self, record: CallRecord) -> None:
+        key = (record.method, record.route, str(record.status) if record.status is not None else record.error or 'none')
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = Series(self.buckets)
+            series.add(record)
+            
+            if record.test is not None:
+                histogram = self.tests.get(record.test)
+                if histogram is None:
+                    histogram = self.tests[record.test] = Histogram(self.buckets)
+                histogram.observe(record.total)
+    
+    
+    def summary(self) -> dict[str, dict[str, Any]]:
+        with self.lock:
+            return {
+                f'{method} {route} {status}': {
+                    'count': series.total.count,
+                    'mean': series.total.sum / series.total.count,
+                    'p50': series.total.quantile(0.5),
+                    'p90': series.total.quantile(0.9),
+                    'p99': series.total.quantile(0.99),
+                    'ttfb_p50': series.ttfb.quantile(0.5) if series.ttfb.count else None,
+                    'connections': series.connections,
+                    'request_bytes': series.request_bytes,
+                    'response_bytes': series.response_bytes,
+                    'retries': series.retries,
+                    'refreshes': series.refreshes,
+                }
+                for (method, route, status), series in sorted(self.series.items())
+            }
+    
+    
+    def slowest_tests(self, n: int = 10) -> list[tuple[str, int, float]]:
+        with self.lock:
+            totals = [(test, histogram.count, histogram.sum) for test, histogram in self.tests.items()]
+        return sorted(totals, key=lambda total: total[2], reverse=True)[:n]
+
+
+class JsonLinesSink:
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        # appending whole lines keeps files shared between runner processes readable
+        self.file = open(path, 'a', buffering=1)
+    
+    
+    def record(self, record: CallRecord) -> None:
+        line = json.dumps(record._asdict()) + '\n'
+        with self.lock:
+            self.file.write(line)
+    
+    
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class PrometheusSink(HistogramSink):
+    
+    PREFIX = 'lala_api'
+    
+    def render_histogram(self, name: str, series: Iterable[tuple[dict[str, str], Histogram]]) -> list[str]:
+        lines: list[str] = []
+        for labels, histogram in series:
+            if not histogram.count:
+                continue
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{format_labels({**labels, "le": repr(bound)})} {cumulative}')
+            lines.append(f'{name}_bucket{format_labels({**labels, "le": "+Inf"})} {histogram.count}')
+            lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum!r}')
+            lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+        return lines
+    
+    
+    def render(self) -> str:
+        with self.lock:
+            series = [
+                ({'method': method, 'route': route, 'status': status}, value)
+                for (method, route, status), value in sorted(self.series.items())
+            ]
+            tests = sorted(self.tests.items())
+        
+        histograms = {
+            'request_duration_seconds': ('Wall time of api calls, including retries and refreshes.', [(labels, value.total) for labels, value in series]),
+            'ttfb_seconds': ('Time from sending the last attempt to parsing its response headers.', [(labels, value.ttfb) for labels, value in series]),
+            'test_call_duration_seconds': ('Wall time of api calls, by the test that made them.', [({'test': test}, histogram) for test, histogram in tests]),
+        }
+        counters: dict[str, tuple[str, Callable[[Series], float]]] = {
+            'request_bytes_total': ('Request body bytes sent.', lambda value: value.request_bytes),
+            'response_bytes_total': ('Response body bytes received.', lambda value: value.response_bytes),
+            'connections_total': ('New connections opened.', lambda value: value.connections),
+            'connect_seconds_total': ('Time spent resolving and connecting new connections.', lambda value: value.connect),
+            'tls_seconds_total': ('Time spent in tls handshakes.', lambda value: value.tls),
+            'attempts_total': ('Requests sent, counting retries and refreshes.', lambda value: value.attempts),
+            'retries_total': ('Requests retried after backing off.', lambda value: value.retries),
+            'refreshes_total': ('Token refreshes made during calls.', lambda value: value.refreshes),
+        }
+        
+        lines: list[str] = []
+        for suffix, (help, values) in histograms.items():
+            name = f'{self.PREFIX}_{suffix}'
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} histogram']
+            lines += self.render_histogram(name, values)
+        for suffix, (help, value) in counters.items():
+            name = f'{self.PREFIX}_{suffix}'
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} counter']
+            lines += [f'{name}{format_labels(labels)} {value(series)!r}' for labels, series in series]
+        return '\n'.join(lines) + '\n'
+    
+    
+    def write(self, path: str) -> None:
+        # for the node exporter's textfile collector, which must never see half a file
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+def read_records(path: str) -> Generator[CallRecord, None, None]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield CallRecord(**json.loads(line))
+
+
+def main(argv: list[str] | None = None) -> None:
+    from argparse import ArgumentParser
+    
+    parser = ArgumentParser(description='Summarize api call metrics recorded as json lines.')
+    parser.add_argument('file', help='json lines written by JsonLinesSink (or LALA_METRICS)')
+    parser.add_argument('--prometheus', action='store_true', help='print the prometheus text exposition instead')
+    parser.add_argument('--tests', type=int, default=0, metavar='N', help='also list the N tests that spent the most time in api calls')
+    args = parser.parse_args(argv)
+    
+    sink = PrometheusSink()
+    for record in read_records(args.file):
+        sink.record(record)
+    
+    if args.prometheus:
+        print(sink.render(), end='')
+        return
+    
+    print(f'{"call":<50} {"count":>7} {"mean":>9} {"p50":>9} {"p90":>9} {"p99":>9} {"conns":>6} {"retries":>8}')
+    for name, summary in sink.summary().items():
+        print(
+            f'{name:<50} {summary["count"]:>7} {summary["mean"] * 1000:>7.1f}ms'
+            f' {summary["p50"] * 1000:>7.1f}ms {summary["p90"] * 1000:>7.1f}ms {summary["p99"] * 1000:>7.1f}ms'
+            f' {summary["connections"]:>6} {summary["retries"]:>8}'
+        )
+    
+    if args.tests:
+        print()
+        for test, count, total in sink.slowest_tests(args.tests):
+            print(f'{test:<70} {count:>5} calls {total * 1000:>9.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import threading
+from contextlib import contextmanager
+
+import api
+from api import ApiFunction, Credentials, DataType
+
+from typing import Any, Generator, Hashable, Iterable
+
+
+STRATEGIES = ('round-robin', 'least-loaded')
+
+
+class ClientPool:
+    
+    # several identities, each a client with its own token and refresh cycle, so load isn't
+    # bound by one account's rate limit; calls are spread across them, or pinned to one per key
+    def __init__(self, clients: list[api.Client], strategy: str = 'round-robin'):
+        if not clients:
+            raise ValueError('A client pool needs at least one client.')
+        if strategy not in STRATEGIES:
+            raise ValueError(f'Unknown strategy "{strategy}", expected one of: {", ".join(STRATEGIES)}')
+        self.clients = clients
+        self.strategy = strategy
+        
+        self.lock = threading.Lock()
+        self.turn = 0
+        self.in_flight = [0] * len(clients)
+        self.pins: dict[Hashable, int] = {}
+        self.pinned = [0] * len(clients)
+        
+        self.get = self.build_api_function('GET')
+        self.post = self.build_api_function('POST')
+        self.patch = self.build_api_function('PATCH')
+        self.delete = self.build_api_function('DELETE')
+        self.put = self.build_api_function('PUT')
+    
+    
+    @classmethod
+    def from_credentials(cls, credentials: Iterable[Credentials], strategy: str = 'round-robin', **options: Any) -> 'ClientPool':
+        # options go to every client, so a shared sinks list gets every identity's calls
+        return cls([api.Client(credentials=identity, **options) for identity in credentials], strategy)
+    
+    
+    @classmethod
+    def from_files(cls, token_files: Iterable[str], strategy: str = 'round-robin', **options: Any) -> 'ClientPool':
+        return cls([api.Client(token_file=path, **options) for path in token_files], strategy)
+    
+    
+    def acquire(self) -> int:
+        with self.lock:
+            if self.strategy == 'least-loaded':
+                i = min(range(len(self.clients)), key=self.in_flight.__getitem__)
+            else:
+                i = self.turn
+                self.turn = (i + 1) % len(self.clients)
+            self.in_flight[i] += 1
+            return i
+    
+    
+    def release(self, i: int) -> None:
+        with self.lock:
+            self.in_flight[i] -= 1
+    
+    
+    @contextmanager
+    def lease(self) -> Generator[api.Client, None, None]:
+        # one identity for a run of calls that depend on each other, counted as one load
+        i = self.acquire()
+        try:
+            yield self.clients[i]
+        finally:
+            self.release(i)
+    
+    
+    def call(self, method: str, url: str, data: dict[str, Any] | None = None) -> DataType:
+        with self.lease() as client:
+            return client.call(method, url, data)
+    
+    
+    def pin(self, key: Hashable) -> api.Client:
+        # the same identity for the same key every time, so whatever it creates stays visible to it;
+        # new keys go to whichever identity has the fewest so far
+        with self.lock:
+            if key not in self.pins:
+                i = min(range(len(self.clients)), key=self.pinned.__getitem__)
+                self.pins[key] = i
+                self.pinned[i] += 1
+            return self.clients[self.pins[key]]
+    
+    
+    def build_api_function(self, method: str) -> ApiFunction:
+        def api_function(url: str, data: dict[str, Any] | None = None) -> DataType:
+            return self.call(method, url, data)
+        return api_function
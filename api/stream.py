@@ -0,0 +1,154 @@
+import codecs
+import json
+
+from typing import TYPE_CHECKING, Any, Generator, Iterable, Iterator, Protocol, cast
+
+if TYPE_CHECKING:
+    import requests
+
+
+# big enough to amortize the python overhead per chunk, small enough that memory stays flat
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = ' \t\n\r'
+NUMBER = '0123456789+-.eE'
+
+
+class Unpacker(Protocol):
+    
+    # the part of msgpack.Unpacker used here; msgpack ships without type information
+    def read_map_header(self) -> int:
+        ...
+    
+    def unpack(self) -> Any:
+        ...
+
+
+class Scanner:
+    
+    # walks a json document spread over chunks, keeping only the unconsumed tail of the text
+    def __init__(self, chunks: Iterator[str]):
+        self.chunks = chunks
+        self.buffer = ''
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+    
+    
+    def fill(self) -> bool:
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError('Response body ended unexpectedly.')
+    
+    
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f'Expected "{char}" in response body at "{self.buffer[self.pos:self.pos + 20]}".')
+        self.pos += 1
+    
+    
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            
+            # a number that runs to the end of the buffer may carry on in the next chunk, and so
+            # may one cut off after its point or exponent, which decodes as far as it can ('1.')
+            tail = end
+            while tail < len(self.buffer) and self.buffer[tail] in NUMBER:
+                tail += 1
+            if tail < len(self.buffer) or not self.fill():
+                self.pos = end
+                return value
+    
+    
+    def members(self) -> Generator[str, None, None]:
+        # yields the keys of an object, leaving each value for the caller to consume
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError('Object key in response body is not a string.')
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect('}')
+                return
+
+
+def check_envelope(envelope: dict[str, Any]) -> None:
+    if not envelope.get('ok'):
+        raise Exception(f'Failed to fetch data: [{envelope.get("status")}] {envelope.get("message")}')
+
+
+def iter_json_items(chunks: Iterable[str]) -> Generator[tuple[str, Any], None, None]:
+    scanner = Scanner(iter(chunks))
+    envelope: dict[str, Any] = {}
+    for key in scanner.members():
+        # if the server says it failed before sending the data, don't stream whatever it sent
+        if key == 'data' and envelope.get('ok', True) and scanner.peek() == '{':
+            for uuid in scanner.members():
+                yield uuid, scanner.value()
+            envelope['data'] = {}
+        else:
+            envelope[key] = scanner.value()
+    check_envelope(envelope)
+    if not isinstance(envelope.get('data'), dict):
+        raise Exception(f'Failed to stream data: expected a dictionary, got {envelope.get("data")!r}')
+
+
+def iter_msgpack_items(stream: Any) -> Generator[tuple[str, Any], None, None]:
+    import msgpack # type: ignore[import-untyped]
+    unpacker = cast(Unpacker, msgpack.Unpacker(stream, raw=False, read_size=CHUNK_SIZE)) # type: ignore
+    envelope: dict[str, Any] = {}
+    for _ in range(unpacker.read_map_header()):
+        key = unpacker.unpack()
+        if key == 'data' and envelope.get('ok', True):
+            try:
+                # leaves the header in place if the data isn't a map
+                size = unpacker.read_map_header()
+            except ValueError:
+                envelope[key] = unpacker.unpack()
+                continue
+            for _ in range(size):
+                yield unpacker.unpack(), unpacker.unpack()
+            envelope['data'] = {}
+        else:
+            envelope[key] = unpacker.unpack()
+    check_envelope(envelope)
+    if not isinstance(envelope.get('data'), dict):
+        raise Exception(f'Failed to stream data: expected a dictionary, got {envelope.get("data")!r}')
+
+
+def iter_items(response: 'requests.Response', binary: bool = False) -> Generator[tuple[str, Any], None, None]:
+    if binary:
+        # let urllib3 undo any content encoding, as iter_content would
+        response.raw.decode_content = True
+        yield from iter_msgpack_items(response.raw)
+        return
+    
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    text = (decoder.decode(chunk) for chunk in response.iter_content(CHUNK_SIZE))
+    yield from iter_json_items(text)
@@ -0,0 +1,111 @@
+import io
+from time import perf_counter
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .cassette import Cassette
+from .metrics import current_call
+
+from typing import Any
+
+
+# urllib3 resolves and connects in one step, so dns time is folded into connect time
+
+class TimedHTTPConnection(HTTPConnection):
+    
+    def _new_conn(self) -> Any:
+        start = perf_counter()
+        sock = super()._new_conn()
+        timing = current_call.get()
+        if timing is not None:
+            timing.add_connect(perf_counter() - start)
+        return sock
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    
+    def _new_conn(self) -> Any:
+        start = perf_counter()
+        sock = super()._new_conn()
+        timing = current_call.get()
+        if timing is not None:
+            timing.add_connect(perf_counter() - start)
+        return sock
+    
+    
+    def connect(self) -> None:
+        timing = current_call.get()
+        if timing is None:
+            return super().connect()
+        
+        # whatever connect spends outside of opening the socket is the handshake
+        start = perf_counter()
+        connected = timing.connect or 0.0
+        super().connect()
+        timing.add_tls(perf_counter() - start - ((timing.connect or 0.0) - connected))
+
+
+# urllib3's own connection classes don't satisfy the protocols its stubs declare these as
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection # type: ignore
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection # type: ignore
+
+
+class TimedAdapter(HTTPAdapter):
+    
+    # only new connections pay for the timing, and only while a call is being measured
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+class CassetteAdapter(HTTPAdapter):
+    
+    # records what the wrapped adapter sends and receives, or answers from the cassette without it
+    def __init__(self, cassette: Cassette, adapter: HTTPAdapter):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+    
+    
+    def send(self, request: PreparedRequest, stream: bool = False, timeout: Any = None, verify: Any = True, cert: Any = None, proxies: Any = None) -> Response:
+        method = request.method or 'GET'
+        url = request.url or ''
+        # bodies the client sends are always encoded up front
+        body = request.body if isinstance(request.body, (bytes, str)) else None
+        
+        if self.cassette.recording:
+            response = self.adapter.send(request, stream, timeout, verify, cert, proxies)
+            body = response.content
+            # streamed readers go to raw, which reading the content just drained
+            response.raw = io.BytesIO(body)
+            self.cassette.add(method, url, body, response.status_code, response.reason, dict(response.headers), body)
+            return response
+        
+        exchange = self.cassette.find(method, url, body)
+        response = Response()
+        response.status_code = exchange.status
+        response.reason = exchange.reason
+        response.headers = CaseInsensitiveDict(exchange.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(exchange.body)
+        response.url = url
+        response.request = request
+        response.connection = self
+        return response
+    
+    
+    def close(self) -> None:
+        self.adapter.close()
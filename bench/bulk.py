@@ -0,0 +1,51 @@
+from argparse import ArgumentParser
+from time import perf_counter
+
+from test import LalaTestCase
+from test.util import BulkGenerator, seed, write_jsonl
+
+
+KINDS = ('quests', 'dailies', 'regulars', 'checkboxes')
+
+
+def one_at_a_time(kind: str, count: int) -> None:
+    # how the suite's own helpers build payloads, for reference
+    shapes = LalaTestCase()
+    make = {'quests': shapes.quest_fields, 'dailies': shapes.daily_fields, 'regulars': shapes.regular_fields}[kind]
+    for _ in range(count):
+        make()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(prog='python -m bench.bulk', description='Generate payloads in bulk, and compare with making them one at a time.')
+    parser.add_argument('-n', '--count', type=int, default=100000, help='payloads to generate')
+    parser.add_argument('-k', '--kind', choices=KINDS, default='quests')
+    parser.add_argument('-b', '--batch-size', type=int, default=1024)
+    parser.add_argument('-o', '--output', help='write the payloads to this file as json lines instead of timing them')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    
+    bulk = BulkGenerator(args.seed, args.batch_size)
+    if args.output:
+        start = perf_counter()
+        written = write_jsonl(args.output, bulk.batches(args.kind, args.count))
+        elapsed = perf_counter() - start
+        print(f'wrote {written} {args.kind} to {args.output} in {elapsed:.2f}s ({written / elapsed:,.0f}/s)')
+        return
+    
+    start = perf_counter()
+    for _ in bulk.batches(args.kind, args.count):
+        pass
+    fast = perf_counter() - start
+    print(f'{"bulk":<14} {fast * 1000:>9.1f}ms {args.count / fast:>12,.0f}/s')
+    
+    if args.kind != 'checkboxes':
+        seed(args.seed)
+        start = perf_counter()
+        one_at_a_time(args.kind, args.count)
+        slow = perf_counter() - start
+        print(f'{"one at a time":<14} {slow * 1000:>9.1f}ms {args.count / slow:>12,.0f}/s  ({slow / fast:.1f}x slower)')
+
+
+if __name__ == '__main__':
+    main()
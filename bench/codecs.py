@@ -0,0 +1,99 @@
+import random
+import sys
+from argparse import ArgumentParser
+from time import perf_counter, time
+
+import api
+from api.codec import JSON, Codec, MsgpackCodec, OrjsonCodec, StdlibJsonCodec
+from test.fake_server import FakeState
+from test.util import random_bool, random_int, random_str, seed as seed_random
+
+from typing import Any, Callable
+
+
+def make_payload(quests: int, seed: int) -> dict[str, Any]:
+    # the envelope 'GET quests' returns for a player with this many quests, built by the fake's own handlers
+    random.seed(seed)
+    seed_random(seed)
+    state = FakeState()
+    uuids: list[str] = []
+    for _ in range(quests):
+        created = state.create_quest({}, {
+            'name': random_str(random.randint(8, 40)),
+            'description': random_str(random.randint(20, 200)),
+            'deadline': time() + random_int(6),
+            'difficulty': random.randint(1, 5),
+            'checkboxes': [random_str(random.randint(5, 30)) for _ in range(random.randint(0, 8))],
+            'prereqs': random.sample(uuids, min(len(uuids), random.randint(0, 3))),
+        })
+        for checkbox in created['quest']['checkboxes']:
+            checkbox['checked'] = random_bool()
+        uuids.append(created['uuid'])
+    return {'ok': True, 'status': 200, 'data': state.list_quests({}, None)}
+
+
+def best_of(runs: int, fn: Callable[[], Any]) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        start = perf_counter()
+        fn()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def available_codecs() -> dict[str, Codec]:
+    codecs: dict[str, Codec] = {'json': StdlibJsonCodec()}
+    for name, cls in (('orjson', OrjsonCodec), ('msgpack', MsgpackCodec)):
+        try:
+            codecs[name] = cls()
+        except ImportError:
+            print(f'{name} is not installed, skipping', file=sys.stderr)
+    return codecs
+
+
+def response_for(payload: bytes, content_type: str) -> Any:
+    import requests
+    response = requests.Response()
+    response._content = payload # type: ignore
+    response.status_code = 200
+    response.headers['Content-Type'] = content_type
+    return response
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(prog='python -m bench.codecs', description='Compare codecs on a large quest list.')
+    parser.add_argument('-n', '--quests', type=int, default=2000, help='quests in the payload')
+    parser.add_argument('-r', '--runs', type=int, default=20, help='runs per measurement, best is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    
+    payload = make_payload(args.quests, args.seed)
+    codecs = available_codecs()
+    
+    # what get_data did before there were codecs, for reference
+    text = StdlibJsonCodec().encode(payload)
+    baseline = best_of(args.runs, response_for(text, JSON).json)
+    print(f'{args.quests} quests, {len(text) / 1024:.0f} KiB as json')
+    print(f'{"codec":<10} {"size":>9} {"encode":>10} {"decode":>10} {"get_data":>10} {"speedup":>8}')
+    print(f'{"requests":<10} {len(text) / 1024:>6.0f}KiB {"":>10} {baseline * 1000:>8.2f}ms {baseline * 1000:>8.2f}ms {1:>7.2f}x')
+    
+    for name, codec in codecs.items():
+        encoded = codec.encode(payload)
+        assert codec.decode(encoded) == payload, f'{name} does not round trip the payload.'
+        
+        encode = best_of(args.runs, lambda: codec.encode(payload))
+        decode = best_of(args.runs, lambda: codec.decode(encoded))
+        
+        # the whole client path: picking a codec by content type, decoding and unwrapping the envelope
+        client = api.Client(codec=codec, binary=name == 'msgpack')
+        response = response_for(encoded, codec.content_type)
+        full = best_of(args.runs, lambda: client.get_data(response))
+        
+        print(
+            f'{name:<10} {len(encoded) / 1024:>6.0f}KiB {encode * 1000:>8.2f}ms {decode * 1000:>8.2f}ms'
+            f' {full * 1000:>8.2f}ms {baseline / full:>7.2f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
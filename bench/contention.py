@@ -0,0 +1,266 @@
+import json
+import threading
+from argparse import ArgumentParser
+from time import perf_counter
+
+import api
+from load.stats import percentile
+from test import RUN_TAG
+
+from typing import Any, Callable, NamedTuple
+
+
+# far enough out that quests stay active for the whole run
+DEADLINE = 9999999999.0
+
+# tagged like the suite's fixtures, so a sweep finds whatever an interrupted run left behind
+DESCRIPTION = f'contention benchmark {RUN_TAG}'
+
+
+class Result(NamedTuple):
+    workload: str
+    writers: int
+    ops: int
+    errors: int
+    anomalies: int
+    elapsed: float
+    latencies: list[float]
+    
+    @property
+    def throughput(self) -> float:
+        return self.ops / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class Writers:
+    
+    # k threads released at once against the same target, each timing every call it makes
+    def __init__(self, client: api.Client, count: int):
+        self.client = client
+        self.count = count
+        self.barrier = threading.Barrier(count)
+        self.lock = threading.Lock()
+        self.latencies: list[float] = []
+        self.errors = 0
+    
+    
+    def call(self, method: str, url: str, data: dict[str, Any] | None = None) -> api.DataType:
+        start = perf_counter()
+        try:
+            return self.client.call(method, url, data)
+        except api.ApiException:
+            with self.lock:
+                self.errors += 1
+            raise
+        finally:
+            elapsed = perf_counter() - start
+            with self.lock:
+                self.latencies.append(elapsed)
+    
+    
+    def run(self, writer: Callable[[int], None]) -> float:
+        def target(w: int) -> None:
+            self.barrier.wait()
+            writer(w)
+        
+        threads = [threading.Thread(target=target, args=(w,), name=f'writer-{w}') for w in range(self.count)]
+        start = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return perf_counter() - start
+
+
+def make_quest(client: api.Client, name: str, checkboxes: list[str] | None = None, prereqs: list[str] | None = None) -> str:
+    response = client.post('quests', {
+        'name': name,
+        'description': DESCRIPTION,
+        'deadline': DEADLINE,
+        'difficulty': 1,
+        'checkboxes': checkboxes or [],
+        'prereqs': prereqs or [],
+    })
+    return response['uuid'] # type: ignore
+
+
+#
+# WORKLOADS
+#
+
+def checkbox_patch(client: api.Client, k: int, n: int) -> Result:
+    # every writer patches its own checkboxes on one quest, so nothing it wrote should be missing
+    uuid = make_quest(client, 'checkbox patch', [f'box-{i}' for i in range(k * n)])
+    writers = Writers(client, k)
+    
+    def writer(w: int) -> None:
+        for j in range(n):
+            try:
+                writers.call('PATCH', f'quests/{uuid}/checkboxes/{w * n + j}', {'name': f'w{w}-{j}', 'checked': True})
+            except api.ApiException:
+                pass
+    
+    try:
+        elapsed = writers.run(writer)
+        final = client.get(f'quests/{uuid}/checkboxes')
+    finally:
+        client.delete(f'quests/{uuid}')
+    
+    expected = [{'name': f'w{i // n}-{i % n}', 'checked': True} for i in range(k * n)]
+    lost = sum(1 for got, want in zip(final, expected) if got != want) + abs(len(final) - len(expected)) # type: ignore
+    return Result('checkbox-patch', k, k * n, writers.errors, lost, elapsed, writers.latencies)
+
+
+def checkbox_delete(client: api.Client, k: int, n: int) -> Result:
+    # every writer deletes its own checkboxes by looking up their index first, which is exactly
+    # what goes wrong when someone else's delete shifts the list in between
+    names = [f'w{i % k}-{i // k}' for i in range(k * n)] + [f'keep-{i}' for i in range(k)]
+    uuid = make_quest(client, 'checkbox delete', names)
+    writers = Writers(client, k)
+    
+    def writer(w: int) -> None:
+        for j in range(n):
+            try:
+                checkboxes = writers.call('GET', f'quests/{uuid}/checkboxes')
+                index = [checkbox['name'] for checkbox in checkboxes].index(f'w{w}-{j}') # type: ignore
+                writers.call('DELETE', f'quests/{uuid}/checkboxes/{index}')
+            except (api.ApiException, ValueError):
+                pass
+    
+    try:
+        elapsed = writers.run(writer)
+        final = {checkbox['name'] for checkbox in client.get(f'quests/{uuid}/checkboxes')} # type: ignore
+    finally:
+        client.delete(f'quests/{uuid}')
+    
+    # targets still there, plus bystanders that were deleted in their place
+    kept = {f'keep-{i}' for i in range(k)}
+    anomalies = len(final - kept) + len(kept - final)
+    return Result('checkbox-delete', k, k * n * 2, writers.errors, anomalies, elapsed, writers.latencies)
+
+
+def quest_complete(client: api.Client, k: int, n: int) -> Result:
+    # writers complete the same quest while renaming it; the completion mustn't be written over
+    uuid = make_quest(client, 'complete')
+    writers = Writers(client, k)
+    written = {f'w{w}-{j}' for w in range(k) for j in range(n)}
+    
+    def writer(w: int) -> None:
+        for j in range(n):
+            try:
+                writers.call('PATCH', f'quests/{uuid}', {'name': f'w{w}-{j}'})
+                writers.call('POST', f'quests/{uuid}/complete')
+            except api.ApiException:
+                pass
+    
+    try:
+        elapsed = writers.run(writer)
+        final: dict[str, Any] = client.get(f'quests/{uuid}') # type: ignore
+    finally:
+        client.delete(f'quests/{uuid}')
+    
+    anomalies = (not final['completed']) + (final['name'] not in written) + (final['difficulty'] != 1) + (final['deadline'] != DEADLINE)
+    return Result('complete', k, k * n * 2, writers.errors, anomalies, elapsed, writers.latencies)
+
+
+def chain(client: api.Client, k: int, n: int) -> Result:
+    # writers add sibling sequels to one quest and complete them; none of the links may go missing
+    root = make_quest(client, 'chain root')
+    writers = Writers(client, k)
+    created: list[str] = []
+    
+    def writer(w: int) -> None:
+        for j in range(n):
+            try:
+                response: dict[str, Any] = writers.call('POST', 'quests', { # type: ignore
+                    'name': f'w{w}-{j}',
+                    'description': DESCRIPTION,
+                    'deadline': DEADLINE,
+                    'difficulty': 1,
+                    'prereqs': [root],
+                })
+                uuid = response['uuid']
+                with writers.lock:
+                    created.append(uuid)
+                writers.call('POST', f'quests/{uuid}/complete')
+            except api.ApiException:
+                pass
+    
+    try:
+        elapsed = writers.run(writer)
+        sequels = set(client.get(f'quests/{root}/sequels')) # type: ignore
+        anomalies = len(sequels ^ set(created))
+        for uuid in created:
+            if client.get(f'quests/{uuid}/prereqs') != [root]:
+                anomalies += 1
+    finally:
+        # sequels first, since they depend on the root
+        for uuid in created:
+            client.delete(f'quests/{uuid}')
+        client.delete(f'quests/{root}')
+    return Result('chain', k, k * n * 2, writers.errors, anomalies, elapsed, writers.latencies)
+
+
+WORKLOADS: dict[str, Callable[[api.Client, int, int], Result]] = {
+    'checkbox-patch': checkbox_patch,
+    'checkbox-delete': checkbox_delete,
+    'complete': quest_complete,
+    'chain': chain,
+}
+
+
+def summarize(result: Result) -> dict[str, Any]:
+    ordered = sorted(result.latencies)
+    return {
+        'workload': result.workload,
+        'writers': result.writers,
+        'ops': result.ops,
+        'throughput': result.throughput,
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+        'errors': result.errors,
+        'anomalies': result.anomalies,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(prog='python -m bench.contention', description='Point concurrent writers at the same quest and look for where it breaks.')
+    parser.add_argument('-k', '--writers', default='1,2,4,8,16,32', help='comma separated writer counts to step through')
+    parser.add_argument('-n', '--ops', type=int, default=20, help='operations per writer')
+    parser.add_argument('-w', '--workload', action='append', choices=list(WORKLOADS), help='workloads to run (default: all)')
+    parser.add_argument('--fake', action='store_true', help='run against an in-process fake server')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+    
+    if args.fake:
+        from test.fake_server import install
+        install()
+    counts = [int(count) for count in args.writers.split(',')]
+    client = api.Client(pool_maxsize=max(counts))
+    
+    rows: list[dict[str, Any]] = []
+    print(f'{"workload":<16} {"writers":>7} {"ops/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>7} {"anomalies":>9}')
+    for name in args.workload or WORKLOADS:
+        peak: dict[str, Any] | None = None
+        for k in counts:
+            row = summarize(WORKLOADS[name](client, k, args.ops))
+            rows.append(row)
+            print(
+                f'{name:<16} {k:>7} {row["throughput"]:>9.1f} {row["p50"] * 1000:>9.2f} {row["p95"] * 1000:>9.2f}'
+                f' {row["p99"] * 1000:>9.2f} {row["errors"]:>7} {row["anomalies"]:>9}'
+            )
+            if peak is None or row['throughput'] > peak['throughput']:
+                peak = row
+        if peak is not None:
+            print(f'{name}: throughput peaks at {peak["writers"]} writers ({peak["throughput"]:.1f} ops/s)')
+        print()
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=4)
+    # anomalies are lost or misplaced writes, which a benchmark run shouldn't shrug off
+    return 1 if any(row['anomalies'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
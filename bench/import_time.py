@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from argparse import ArgumentParser
+
+
+# seconds, best of several fresh interpreters
+BUDGETS = {
+    'api': 0.02,
+    'test': 0.05,
+}
+
+# importing these should never drag in the transport
+FORBIDDEN = ('requests', 'urllib3', 'asyncio')
+
+SCRIPT = '''
+import sys
+from time import perf_counter
+start = perf_counter()
+import {module}
+elapsed = perf_counter() - start
+print(elapsed)
+print(','.join(name for name in {forbidden!r} if name in sys.modules))
+'''
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    script = SCRIPT.format(module=module, forbidden=FORBIDDEN)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout.split('\n')
+    return float(output[0]), [name for name in output[1].split(',') if name]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(prog='python -m bench.import_time', description='Check that importing the client stays cheap.')
+    parser.add_argument('-n', '--runs', type=int, default=5, help='fresh interpreters per module')
+    args = parser.parse_args(argv)
+    
+    ok = True
+    for module, budget in BUDGETS.items():
+        runs = [measure(module) for _ in range(args.runs)]
+        best = min(elapsed for elapsed, _ in runs)
+        loaded = sorted({name for _, names in runs for name in names})
+        
+        status = 'ok' if best <= budget and not loaded else 'FAIL'
+        ok = ok and status == 'ok'
+        print(f'{module:<8} {best * 1000:8.2f} ms  (budget {budget * 1000:.0f} ms)  {status}')
+        if loaded:
+            print(f'         imported {", ".join(loaded)}')
+    
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import json
+import sys
+import threading
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
+
+import api
+from api.pool import STRATEGIES, ClientPool
+from .scenarios import SCENARIOS, Scenario, VirtualUser
+from .stats import Stats, format_report
+
+from typing import Any, Callable
+
+
+class LoadGenerator:
+    
+    def __init__(self, weights: dict[str, float], users: int, duration: float, iteration_rate: float | None = None, client: api.Client | ClientPool | None = None, pin: bool = False, scenarios: dict[str, Scenario] = SCENARIOS):
+        self.scenarios = scenarios
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.users = users
+        self.duration = duration
+        # iterations started per second, or None to keep every user busy back to back; requests
+        # per second follow from however many calls the scenarios picked happen to make
+        self.iteration_rate = iteration_rate
+        self.client = client
+        # with a pool, each user either keeps one identity or takes one per iteration
+        self.pool = client if isinstance(client, ClientPool) else None
+        self.pin = pin
+        
+        self.stats = Stats()
+        self.stop = threading.Event()
+        self.vus = [VirtualUser(i, self.stats, self.user_client(i)) for i in range(users)]
+        self.free: list[VirtualUser] = list(self.vus)
+        self.free_lock = threading.Lock()
+    
+    
+    def user_client(self, i: int) -> api.Client | None:
+        if self.pool is None:
+            return self.client # type: ignore
+        return self.pool.pin(i) if self.pin else None
+    
+    
+    def run_scenario(self, scenario: Callable[[VirtualUser], None], vu: VirtualUser) -> None:
+        if self.pool is None or self.pin:
+            scenario(vu)
+            return
+        # a scenario's calls build on each other, so they all go through the same identity
+        with self.pool.lease() as client:
+            vu.client = client
+            scenario(vu)
+    
+    
+    def iterate(self, vu: VirtualUser) -> None:
+        name = vu.random.choices(self.names, self.weights)[0]
+        scenario = self.scenarios[name][0]
+        
+        start = perf_counter()
+        try:
+            self.run_scenario(scenario, vu)
+        except Exception:
+            self.stats.record_scenario(name, perf_counter() - start, False)
+        else:
+            self.stats.record_scenario(name, perf_counter() - start, True)
+    
+    
+    def closed_loop(self, vu: VirtualUser) -> None:
+        while not self.stop.is_set():
+            self.iterate(vu)
+    
+    
+    def open_loop_iteration(self, vu: VirtualUser) -> None:
+        try:
+            self.iterate(vu)
+        finally:
+            with self.free_lock:
+                self.free.append(vu)
+    
+    
+    def run(self) -> dict[str, Any]:
+        start = perf_counter()
+        timer = threading.Timer(self.duration, self.stop.set)
+        timer.start()
+        
+        with ThreadPoolExecutor(self.users, thread_name_prefix='vu') as executor:
+            if self.iteration_rate is None:
+                for vu in self.free:
+                    executor.submit(self.closed_loop, vu)
+            else:
+                self.dispatch(executor)
+        
+        timer.cancel()
+        return self.stats.report(perf_counter() - start)
+    
+    
+    def dispatch(self, executor: ThreadPoolExecutor) -> None:
+        assert self.iteration_rate is not None
+        interval = 1 / self.iteration_rate
+        next_start = perf_counter()
+        
+        while not self.stop.is_set():
+            delay = next_start - perf_counter()
+            if delay > 0:
+                sleep(delay)
+            next_start += interval
+            
+            with self.free_lock:
+                vu = self.free.pop() if self.free else None
+            # a late start would hide the backlog, so count it instead
+            if vu is None:
+                self.stats.drop()
+            else:
+                executor.submit(self.open_loop_iteration, vu)
+
+
+def parse_weights(specs: list[str], scenarios: dict[str, Scenario] = SCENARIOS) -> dict[str, float]:
+    if not specs:
+        return {name: weight for name, (_, weight) in scenarios.items()}
+    
+    weights: dict[str, float] = {}
+    for spec in specs:
+        name, _, weight = spec.partition('=')
+        if name not in scenarios:
+            raise SystemExit(f'Unknown scenario "{name}", expected one of: {", ".join(scenarios)}')
+        weights[name] = float(weight) if weight else scenarios[name][1]
+    return weights
+
+
+def add_arguments(parser: ArgumentParser, scenarios: dict[str, Scenario]) -> None:
+    # shared with the soak runner, which puts the same kind of load on for much longer
+    parser.add_argument('-s', '--scenario', action='append', default=[], metavar='NAME[=WEIGHT]', help=f'scenarios to run (default: all of {", ".join(scenarios)})')
+    parser.add_argument('-u', '--users', type=int, default=10, help='virtual users')
+    parser.add_argument('-r', '--iterations-per-second', type=float, metavar='N', help='scenario iterations started per second, whatever requests they make (default: closed loop)')
+    parser.add_argument('--adaptive', action='store_true', help='let an adaptive limiter find the concurrency the server can take')
+    parser.add_argument('--retries', type=int, default=0, help='retries for throttled or failed requests')
+    parser.add_argument('--timeout', type=float, default=api.TIMEOUT, help='seconds before a stalled request is given up on')
+    parser.add_argument('--hedge', action='store_true', help='duplicate GETs that take longer than the p95 for their route')
+    parser.add_argument('--fake', action='store_true', help='run against an in-process fake server')
+    parser.add_argument('--token-file', action='append', default=[], help='an identity to spread load across, repeat for more (default: the usual credentials)')
+    parser.add_argument('--identities', type=int, default=1, help='with --fake, how many identities to spread load across')
+    parser.add_argument('--spread', choices=STRATEGIES, default='round-robin', help='how iterations are spread across identities')
+    parser.add_argument('--pin', action='store_true', help='keep each virtual user on one identity for the whole run')
+
+
+def make_client(args: Namespace) -> api.Client | ClientPool:
+    identities: list[api.Credentials] = []
+    if args.fake:
+        from test.fake_server import install
+        server = install()
+        identities = [api.Credentials.from_file(api.TOKEN_FILE)] + [server.add_identity() for _ in range(args.identities - 1)]
+    
+    hedger = None
+    if args.hedge:
+        from api.hedge import Hedger
+        hedger = Hedger()
+    
+    def make_identity(**identity: Any) -> api.Client:
+        # each identity is limited on its own, so each gets its own limiter
+        limiter = None
+        if args.adaptive:
+            from api.limiter import AdaptiveLimiter
+            limiter = AdaptiveLimiter(max_limit=args.users)
+        return api.Client(pool_maxsize=args.users, limiter=limiter, retries=args.retries, timeout=args.timeout, hedger=hedger, **identity)
+    
+    if len(identities) > 1:
+        return ClientPool([make_identity(credentials=identity) for identity in identities], args.spread)
+    if len(args.token_file) > 1:
+        return ClientPool([make_identity(token_file=path) for path in args.token_file], args.spread)
+    return make_identity(token_file=args.token_file[0]) if args.token_file else make_identity()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(prog='python -m load.generator', description='Put weighted scenario load on the api.')
+    add_arguments(parser, SCENARIOS)
+    parser.add_argument('-d', '--duration', type=float, default=30, help='seconds to run for')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args(argv)
+    
+    generator = LoadGenerator(parse_weights(args.scenario), args.users, args.duration, args.iterations_per_second, make_client(args), args.pin)
+    report = generator.run()
+    
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+import random
+from contextlib import contextmanager
+from time import perf_counter
+
+import api
+from test import RUN_TAG, schema
+from test.util import BulkGenerator
+from .stats import Stats
+
+from typing import Any, Callable, Generator
+
+
+# far enough out that quests stay active for the whole run
+DEADLINE = 9999999999.0
+
+# validation is cheap enough to leave on, so a server that answers fast but wrong shows up as errors
+CREATED = {'quests': schema.CREATED_QUEST, 'dailies': schema.CREATED_DAILY, 'regulars': schema.CREATED_REGULAR}
+
+
+class VirtualUser:
+    
+    def __init__(self, id: int, stats: Stats, client: api.Client | None = None):
+        self.id = id
+        self.stats = stats
+        self.client = client
+        self.random = random.Random(id)
+        # quests left behind on purpose, and who made them, for whoever runs the scenarios to clean up
+        self.kept: list[tuple[api.Client, str]] = []
+        # payloads come out of seeded batches, so making them stays well ahead of sending them; they're
+        # tagged like the suite's fixtures, so a sweep finds whatever a crashed or interrupted run left
+        self.data = BulkGenerator(id, tag=RUN_TAG)
+    
+    
+    def call(self, method: str, url: str, data: dict[str, Any] | None = None) -> api.DataType:
+        client = self.client or api.current_client()
+        start = perf_counter()
+        try:
+            result = client.call(method, url, data)
+        except Exception:
+            self.stats.record_request(method, url, perf_counter() - start, False)
+            raise
+        self.stats.record_request(method, url, perf_counter() - start, True)
+        return result
+    
+    
+    def get(self, url: str) -> api.DataType:
+        return self.call('GET', url)
+    
+    
+    def post(self, url: str, data: dict[str, Any] | None = None) -> api.DataType:
+        return self.call('POST', url, data)
+    
+    
+    def patch(self, url: str, data: dict[str, Any] | None = None) -> api.DataType:
+        return self.call('PATCH', url, data)
+    
+    
+    def put(self, url: str, data: dict[str, Any] | None = None) -> api.DataType:
+        return self.call('PUT', url, data)
+    
+    
+    def delete(self, url: str) -> api.DataType:
+        return self.call('DELETE', url)
+    
+    
+    def stream(self, url: str) -> Generator[tuple[str, Any], None, None]:
+        # timed through to the last item, since that's when the caller has the whole list
+        client = self.client or api.current_client()
+        start = perf_counter()
+        ok = False
+        try:
+            yield from client.stream_items(url)
+            ok = True
+        finally:
+            self.stats.record_request('GET', url, perf_counter() - start, ok)
+    
+    
+    def create(self, collection: str, fields: dict[str, Any]) -> str:
+        return CREATED[collection].parse(self.post(collection, fields)).uuid
+    
+    
+    @contextmanager
+    def temp(self, collection: str, fields: dict[str, Any]) -> Generator[str, None, None]:
+        # deleted however the scenario ends, so failed iterations don't pile up on the server
+        uuid = self.create(collection, fields)
+        try:
+            yield uuid
+        finally:
+            self.delete(f'{collection}/{uuid}')
+
+
+#
+# SCENARIOS
+#
+
+def create_quest(vu: VirtualUser) -> None:
+    with vu.temp('quests', vu.data.next('quests')) as uuid:
+        vu.get(f'quests/{uuid}')
+
+
+def create_daily(vu: VirtualUser) -> None:
+    with vu.temp('dailies', vu.data.next('dailies')) as uuid:
+        vu.patch(f'dailies/{uuid}', {'name': vu.data.strings(1)[0]})
+
+
+def create_regular(vu: VirtualUser) -> None:
+    with vu.temp('regulars', vu.data.next('regulars')) as uuid:
+        vu.patch(f'regulars/{uuid}', {'name': vu.data.strings(1)[0]})
+
+
+def checkboxes(vu: VirtualUser) -> None:
+    n = vu.random.randint(2, 10)
+    with vu.temp('quests', vu.data.next('quests', checkboxes=vu.data.strings(n))) as uuid:
+        vu.put(f'quests/{uuid}/checkboxes', vu.data.checkboxes(1, n)[0])
+        vu.patch(f'quests/{uuid}/checkboxes/{vu.random.randrange(n)}', {'name': vu.data.strings(1)[0], 'checked': True})
+        vu.get(f'quests/{uuid}/checkboxes')
+        vu.delete(f'quests/{uuid}/checkboxes/{vu.random.randrange(n)}')
+
+
+def complete(vu: VirtualUser) -> None:
+    with vu.temp('quests', vu.data.next('quests', deadline=DEADLINE)) as uuid:
+        vu.post(f'quests/{uuid}/complete')
+
+
+def chain(vu: VirtualUser) -> None:
+    # nested, so the sequel is deleted before the quest it depends on
+    with vu.temp('quests', vu.data.next('quests', deadline=DEADLINE)) as first:
+        with vu.temp('quests', vu.data.next('quests', deadline=DEADLINE, prereqs=[first])) as second:
+            vu.get(f'quests/{first}/sequels')
+            vu.get(f'quests/{second}/prereqs')
+            vu.post(f'quests/{first}/complete')
+            vu.get('quests/active')
+
+
+def browse(vu: VirtualUser) -> None:
+    active = vu.get('quests/active')
+    # raised rather than asserted, so python -O doesn't skip it
+    if not isinstance(active, dict):
+        error = schema.SchemaError(f'is not a dictionary (got {schema.describe(active)})')
+        error.root = 'Active quest list'
+        raise error
+    for quest in active.values():
+        schema.QUEST.check(quest)
+    schema.PLAYER.check(vu.get('player'))
+
+
+# a scenario and its default weight
+Scenario = tuple[Callable[[VirtualUser], None], float]
+
+SCENARIOS: dict[str, Scenario] = {
+    'create_quest': (create_quest, 2),
+    'create_daily': (create_daily, 1),
+    'create_regular': (create_regular, 1),
+    'checkboxes': (checkboxes, 2),
+    'complete': (complete, 1),
+    'chain': (chain, 1),
+    'browse': (browse, 4),
+}
+
+
+#
+# SOAK
+#
+
+def quest_lifecycle(vu: VirtualUser) -> None:
+    with vu.temp('quests', vu.data.next('quests', deadline=DEADLINE)) as uuid:
+        vu.patch(f'quests/{uuid}', {'name': vu.data.strings(1)[0]})
+        vu.post(f'quests/{uuid}/complete')
+
+
+def daily_lifecycle(vu: VirtualUser) -> None:
+    with vu.temp('dailies', vu.data.next('dailies')) as uuid:
+        vu.get(f'dailies/{uuid}')
+        vu.patch(f'dailies/{uuid}', {'name': vu.data.strings(1)[0]})
+
+
+def regular_lifecycle(vu: VirtualUser) -> None:
+    with vu.temp('regulars', vu.data.next('regulars')) as uuid:
+        vu.get(f'regulars/{uuid}')
+        vu.patch(f'regulars/{uuid}', {'name': vu.data.strings(1)[0]})
+
+
+def list_quests(vu: VirtualUser) -> None:
+    for _, quest in vu.stream('quests'):
+        schema.QUEST.check(quest)
+    vu.get('quests/active')
+
+
+def grow(vu: VirtualUser) -> None:
+    # the dataset only grows as fast as this is weighted, so list latency can be watched against it
+    uuid = vu.create('quests', vu.data.next('quests', deadline=DEADLINE))
+    vu.kept.append((vu.client or api.current_client(), uuid))
+
+
+SOAK_SCENARIOS: dict[str, Scenario] = {
+    'quest_lifecycle': (quest_lifecycle, 3),
+    'daily_lifecycle': (daily_lifecycle, 1),
+    'regular_lifecycle': (regular_lifecycle, 1),
+    'list_quests': (list_quests, 2),
+    'grow': (grow, 0.5),
+}
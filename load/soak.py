@@ -0,0 +1,214 @@
+import json
+import os
+import sys
+import threading
+import tracemalloc
+from argparse import ArgumentParser
+from time import perf_counter
+
+import api
+from .generator import LoadGenerator, add_arguments, make_client, parse_weights
+from .scenarios import SOAK_SCENARIOS
+from .stats import format_report
+
+from typing import Any
+
+
+# a metric is flagged once it rises this consistently (kendall's tau) by at least this much overall
+RISING_TAU = 0.6
+RISING_GROWTH = 0.1
+MIN_SAMPLES = 5
+
+# the endpoints whose latency is expected to track the size of the dataset
+WATCHED = ('GET quests', 'GET quests/active')
+
+
+def rss() -> int:
+    # current resident memory where /proc has it, otherwise the peak, which can only grow anyway
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot, count: int) -> list[dict[str, Any]]:
+    # what has grown the most since the start, by line
+    return [
+        {'where': str(stat.traceback[0]), 'size': stat.size, 'growth': stat.size_diff, 'count': stat.count}
+        for stat in snapshot.compare_to(baseline, 'lineno')[:count]
+    ]
+
+
+def trend(points: list[tuple[float, float]]) -> dict[str, Any]:
+    # least squares for the slope, kendall's tau for whether it keeps going the same way
+    n = len(points)
+    if n < 2:
+        return {'first': points[0][1] if points else 0.0, 'last': points[-1][1] if points else 0.0, 'per_hour': 0.0, 'tau': 0.0, 'rising': False}
+    
+    mean_t = sum(t for t, _ in points) / n
+    mean_v = sum(v for _, v in points) / n
+    spread = sum((t - mean_t) ** 2 for t, _ in points)
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / spread if spread else 0.0
+    
+    concordant = discordant = 0
+    for i in range(n):
+        for j in range(i + 1, n):
+            step = (points[j][1] - points[i][1]) * (points[j][0] - points[i][0])
+            if step > 0:
+                concordant += 1
+            elif step < 0:
+                discordant += 1
+    tau = (concordant - discordant) / (n * (n - 1) / 2)
+    
+    start = mean_v + slope * (points[0][0] - mean_t)
+    end = mean_v + slope * (points[-1][0] - mean_t)
+    growth = (end - start) / start if start > 0 else 0.0
+    return {
+        'first': points[0][1],
+        'last': points[-1][1],
+        'per_hour': slope * 3600,
+        'tau': tau,
+        'rising': n >= MIN_SAMPLES and tau >= RISING_TAU and growth >= RISING_GROWTH,
+    }
+
+
+class Soak:
+    
+    # keeps the load on and, every interval, samples the client's memory next to the latency of
+    # that interval alone; trends are worked out from the samples, not from everything at once
+    def __init__(self, generator: LoadGenerator, interval: float, traced: bool = False, top: int = 10, output: str | None = None):
+        self.generator = generator
+        self.interval = interval
+        self.traced = traced
+        self.top = top
+        self.output = output
+        self.samples: list[dict[str, Any]] = []
+        self.baseline: tracemalloc.Snapshot | None = None
+    
+    
+    def sample(self, elapsed: float, window: float) -> dict[str, Any]:
+        report = self.generator.stats.drain(window)
+        sample: dict[str, Any] = {
+            'elapsed': elapsed,
+            'window': window,
+            'dropped': report['dropped'],
+            'rss': rss(),
+            'kept': sum(len(vu.kept) for vu in self.generator.vus),
+            'endpoints': report['endpoints'],
+            'scenarios': report['scenarios'],
+        }
+        if self.traced and self.baseline is not None:
+            snapshot = tracemalloc.take_snapshot()
+            sample['traced'] = tracemalloc.get_traced_memory()[0]
+            sample['top'] = top_allocations(snapshot, self.baseline, self.top)
+        return sample
+    
+    
+    def record(self, sample: dict[str, Any]) -> None:
+        self.samples.append(sample)
+        if self.output:
+            with open(self.output, 'a') as f:
+                f.write(json.dumps(sample) + '\n')
+        
+        lists = '  '.join(
+            f'{name} p95 {sample["endpoints"][name]["p95"] * 1000:.1f}ms'
+            for name in WATCHED if name in sample['endpoints']
+        )
+        traced = f'  traced {sample["traced"] / 2 ** 20:.1f}MiB' if 'traced' in sample else ''
+        print(f'[{sample["elapsed"]:>8.0f}s] rss {sample["rss"] / 2 ** 20:.1f}MiB{traced}  kept {sample["kept"]}  {lists}', file=sys.stderr)
+    
+    
+    def trends(self) -> dict[str, dict[str, Any]]:
+        series: dict[str, list[tuple[float, float]]] = {'rss': [], 'traced': []}
+        for sample in self.samples:
+            series['rss'].append((sample['elapsed'], sample['rss']))
+            if 'traced' in sample:
+                series['traced'].append((sample['elapsed'], sample['traced']))
+            for name, row in sample['endpoints'].items():
+                for p in ('p50', 'p95'):
+                    series.setdefault(f'{name} {p}', []).append((sample['elapsed'], row[p]))
+        return {name: trend(points) for name, points in series.items() if points}
+    
+    
+    def run(self) -> dict[str, dict[str, Any]]:
+        if self.traced:
+            tracemalloc.start()
+            self.baseline = tracemalloc.take_snapshot()
+        
+        thread = threading.Thread(target=self.generator.run, name='soak-load', daemon=True)
+        start = last = perf_counter()
+        thread.start()
+        try:
+            while not self.generator.stop.wait(self.interval):
+                now = perf_counter()
+                self.record(self.sample(now - start, now - last))
+                last = now
+        except KeyboardInterrupt:
+            self.generator.stop.set()
+        thread.join()
+        
+        now = perf_counter()
+        if now - last > self.interval / 2:
+            self.record(self.sample(now - start, now - last))
+        self.cleanup()
+        return self.trends()
+    
+    
+    def cleanup(self) -> None:
+        for vu in self.generator.vus:
+            for client, uuid in vu.kept:
+                try:
+                    client.delete(f'quests/{uuid}')
+                except api.ApiException:
+                    pass
+            vu.kept.clear()
+
+
+def format_trends(trends: dict[str, dict[str, Any]]) -> str:
+    width = max(len(name) for name in trends)
+    lines = [f'{"metric":<{width}}  {"first":>12} {"last":>12} {"per hour":>12} {"tau":>6}']
+    for name, row in trends.items():
+        # memory in MiB, latency in ms
+        scale = 2 ** -20 if name in ('rss', 'traced') else 1000
+        flag = '  RISING' if row['rising'] else ''
+        lines.append(
+            f'{name:<{width}}  {row["first"] * scale:>12.2f} {row["last"] * scale:>12.2f}'
+            f' {row["per_hour"] * scale:>+12.2f} {row["tau"]:>6.2f}{flag}'
+        )
+    return '\n'.join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(prog='python -m load.soak', description='Keep lifecycle load on the api for hours and watch for anything that keeps growing.')
+    add_arguments(parser, SOAK_SCENARIOS)
+    parser.add_argument('-d', '--duration', type=float, default=3600, help='seconds to run for')
+    parser.add_argument('-i', '--interval', type=float, default=60, help='seconds between samples')
+    parser.add_argument('--tracemalloc', action='store_true', help='also sample python allocations (slows the client down)')
+    parser.add_argument('--top', type=int, default=10, help='allocation sites to keep per sample')
+    parser.add_argument('-o', '--output', help='append each sample to this file as a json line')
+    parser.add_argument('--json', help='also write the trends to this file')
+    args = parser.parse_args(argv)
+    
+    weights = parse_weights(args.scenario, SOAK_SCENARIOS)
+    generator = LoadGenerator(weights, args.users, args.duration, args.iterations_per_second, make_client(args), args.pin, SOAK_SCENARIOS)
+    soak = Soak(generator, args.interval, args.tracemalloc, args.top, args.output)
+    trends = soak.run()
+    
+    if soak.samples:
+        last = soak.samples[-1]
+        print('last interval:')
+        print(format_report(last | {'elapsed': last['window']}))
+        print()
+    print(format_trends(trends))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(trends, f, indent=4)
+    # a rise is a finding, not a failure of the run itself, but scripts may want to know
+    return 1 if any(row['rising'] for row in trends.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
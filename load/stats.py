@@ -0,0 +1,111 @@
+import math
+import threading
+
+from api.metrics import route_template
+
+from typing import Any
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    # nearest rank: the smallest value with at least p percent of the samples at or below it
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(p * len(ordered) / 100) - 1))
+    return ordered[rank]
+
+
+class Series:
+    
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.errors = 0
+    
+    
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            'count': len(ordered),
+            'errors': self.errors,
+            'throughput': len(ordered) / elapsed if elapsed > 0 else 0.0,
+            'p50': percentile(ordered, 50),
+            'p95': percentile(ordered, 95),
+            'p99': percentile(ordered, 99),
+            'max': ordered[-1] if ordered else 0.0,
+        }
+
+
+class Stats:
+    
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.endpoints: dict[str, Series] = {}
+        self.scenarios: dict[str, Series] = {}
+        self.dropped = 0
+    
+    
+    def record(self, table: dict[str, Series], name: str, latency: float, ok: bool) -> None:
+        with self.lock:
+            series = table.get(name)
+            if series is None:
+                series = table[name] = Series()
+            series.latencies.append(latency)
+            if not ok:
+                series.errors += 1
+    
+    
+    def record_request(self, method: str, url: str, latency: float, ok: bool) -> None:
+        self.record(self.endpoints, f'{method} {route_template(url)}', latency, ok)
+    
+    
+    def record_scenario(self, name: str, latency: float, ok: bool) -> None:
+        self.record(self.scenarios, name, latency, ok)
+    
+    
+    def drop(self) -> None:
+        with self.lock:
+            self.dropped += 1
+    
+    
+    def report(self, elapsed: float) -> dict[str, Any]:
+        with self.lock:
+            return {
+                'elapsed': elapsed,
+                'dropped': self.dropped,
+                'endpoints': {name: series.summary(elapsed) for name, series in sorted(self.endpoints.items())},
+                'scenarios': {name: series.summary(elapsed) for name, series in sorted(self.scenarios.items())},
+            }
+    
+    
+    def drain(self, elapsed: float) -> dict[str, Any]:
+        # the report for everything since the last drain, so long runs hold one window at a time
+        with self.lock:
+            report = {
+                'elapsed': elapsed,
+                'dropped': self.dropped,
+                'endpoints': {name: series.summary(elapsed) for name, series in sorted(self.endpoints.items())},
+                'scenarios': {name: series.summary(elapsed) for name, series in sorted(self.scenarios.items())},
+            }
+            self.endpoints, self.scenarios, self.dropped = {}, {}, 0
+        return report
+
+
+def format_table(title: str, rows: dict[str, dict[str, Any]]) -> str:
+    width = max([len(title)] + [len(name) for name in rows])
+    lines = [f'{title:<{width}}  {"count":>8} {"errors":>7} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}']
+    for name, row in rows.items():
+        lines.append(
+            f'{name:<{width}}  {row["count"]:>8} {row["errors"]:>7} {row["throughput"]:>9.1f} '
+            f'{row["p50"] * 1000:>9.2f} {row["p95"] * 1000:>9.2f} {row["p99"] * 1000:>9.2f}'
+        )
+    return '\n'.join(lines)
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [
+        format_table('endpoint', report['endpoints']),
+        '',
+        format_table('scenario', report['scenarios']),
+        '',
+        f'elapsed {report["elapsed"]:.1f}s, dropped {report["dropped"]} iterations',
+    ]
+    return '\n'.join(lines)
@@ -1,17 +1,99 @@
-from contextlib import contextmanager
+import os
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from time import time
 from unittest import TestCase
 
 import api
+from api import metrics
+from . import schema, teardown, util
 from .util import random_str, random_float, random_int
 
-from typing import Any, Container, Generator, Iterable, TypeVar
-from types import GenericAlias
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Container, Generator, Iterable, TypeVar
+from types import EllipsisType, GenericAlias
+
+if TYPE_CHECKING:
+    from .fake_server import FakeServer
+
+
+# the run this session's fixtures are tagged with; LALA_RUN names one, otherwise each session
+# starts its own, and only the process that started it sweeps
+RUN = os.environ.get('LALA_RUN') or os.urandom(4).hex()
+RUN_STARTED = int(os.environ.get('LALA_RUN_STARTED') or time())
+RUN_OWNER = os.environ.get('LALA_RUN_OWNER', str(os.getpid())) == str(os.getpid())
+RUN_TAG = util.run_tag(RUN, RUN_STARTED)
+
+
+def share_run() -> None:
+    # for whatever starts worker processes, so they join this run rather than starting their own
+    os.environ['LALA_RUN'] = RUN
+    os.environ['LALA_RUN_STARTED'] = str(RUN_STARTED)
+    os.environ.setdefault('LALA_RUN_OWNER', str(os.getpid()))
+
+
+# the fake the suite runs against, if any, for tests that need to reach behind the api
+fake_server: 'FakeServer | None' = None
+if os.environ.get('LALA_FAKE_SERVER'):
+    from .fake_server import install
+    fake_server = install()
+
+if os.environ.get('LALA_METRICS'):
+    api.client.sinks.append(metrics.JsonLinesSink(os.environ['LALA_METRICS']))
+
+# a replay never reaches the server, so it gets by without a token file
+REPLAY_CREDENTIALS = api.Credentials('replay', 'replay', 'replay', 'replay')
+
+if os.environ.get('LALA_RECORD') or os.environ.get('LALA_REPLAY'):
+    from api.cassette import Cassette
+    if os.environ.get('LALA_RECORD'):
+        api.client = api.Client(sinks=api.client.sinks, cassette=Cassette.record(os.environ['LALA_RECORD']))
+    else:
+        # LALA_REPLAY_LOOSE lets requests whose bodies drifted from the recording replay anyway, with a warning
+        cassette = Cassette.replay(os.environ['LALA_REPLAY'], loose=bool(os.environ.get('LALA_REPLAY_LOOSE')))
+        api.client = api.Client(sinks=api.client.sinks, credentials=REPLAY_CREDENTIALS, cassette=cassette)
+
+if os.environ.get('LALA_HEDGE'):
+    from api.hedge import Hedger
+    api.client.hedger = Hedger()
+
+# LALA_SWEEP=start,end deletes what crashed runs left behind before the session starts, and what
+# this run didn't clean up once it's over; registered first, so it runs after the fixture pools close
+if os.environ.get('LALA_SWEEP') and RUN_OWNER and api.client.cassette is None:
+    from . import sweep
+    sweeps = os.environ['LALA_SWEEP'].split(',')
+    if 'start' in sweeps:
+        sweep.sweep_session('start')
+    if 'end' in sweeps:
+        import atexit
+        atexit.register(sweep.sweep_session, 'end')
 
 
 T = TypeVar('T')
 
 class LalaTestCase(TestCase):
     
+    # queue fixture deletions and their checks until the class is done instead of blocking each test
+    deferred_teardown = bool(os.environ.get('LALA_DEFERRED_TEARDOWN'))
+    # recordings only line up with their replays if both make the same random data
+    seed = os.environ.get('LALA_SEED') or ('0' if api.client.cassette is not None else None)
+    # seconds each test gets for all of its calls, fixtures included
+    budget = float(os.environ['LALA_TEST_BUDGET']) if os.environ.get('LALA_TEST_BUDGET') else None
+    # lets a sweep find fixtures whose test never got to delete them; recordings go untagged,
+    # since they have to match what later runs send
+    run_tag = RUN_TAG if api.client.cassette is None else None
+    
+    
+    def run(self, result: Any = None) -> Any:
+        # lets metrics sinks attribute calls to the test that made them
+        token = metrics.current_test.set(self.id())
+        seed_token = util.seed(f'{self.seed}:{self.id()}') if self.seed is not None else None
+        try:
+            with api.deadline(self.budget) if self.budget is not None else nullcontext():
+                return super().run(result)
+        finally:
+            if seed_token is not None:
+                util.generator.reset(seed_token)
+            metrics.current_test.reset(token)
+    
     #
     # ASSERTIONS
     #
@@ -57,160 +139,358 @@ class LalaTestCase(TestCase):
     # API CALLS
     #
     
-    def make_quest(self, name: str = ..., description: str = ..., deadline: float = ..., difficulty: int = ..., checkboxes: list[str] = ..., prereqs: list[str] = ...) -> tuple[str, dict[str, Any], list[str]]:
-        name = random_str() if name is ... else name
-        description = random_str() if description is ... else description
-        deadline = random_float() if deadline is ... else deadline
-        difficulty = random_int() if difficulty is ... else difficulty
-        checkboxes = [] if checkboxes is ... else checkboxes
-        prereqs = [] if prereqs is ... else prereqs
-        
-        response = api.post('quests', {
-            'name': name,
-            'description': description,
-            'deadline': deadline,
-            'difficulty': difficulty,
-            'checkboxes': checkboxes,
-            'prereqs': prereqs
-        })
-        
-        response = self.cast(response, dict[str, Any], 'Quest creation response is not a dictionary.')
-        
-        uuid, quest, prereqs = self.getItems(response, ('uuid', 'quest', 'prereqs'), 'Quest creation response missing keys.')
-                
-        uuid = self.cast(uuid, str, 'Created quest UUID is not a string.')
-        quest = self.cast(quest, dict[str, Any], 'Created quest data is not a dictionary.')
-        prereqs = self.cast(prereqs, list[str], 'Created quest prerequisites are not a list of UUIDs.')
+    def describe(self) -> str:
+        return random_str() if self.run_tag is None else f'{random_str()} {self.run_tag}'
+    
+    
+    def defer_deletion(self, path: str, message: str) -> None:
+        teardown.defer(type(self), teardown.Deletion(path, message, self))
+    
+    
+    def quest_fields(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., deadline: float | EllipsisType = ..., difficulty: int | EllipsisType = ..., checkboxes: list[str] | EllipsisType = ..., prereqs: list[str] | EllipsisType = ...) -> dict[str, Any]:
+        return {
+            'name': random_str() if name is ... else name,
+            'description': self.describe() if description is ... else description,
+            'deadline': random_float() if deadline is ... else deadline,
+            'difficulty': random_int() if difficulty is ... else difficulty,
+            'checkboxes': [] if checkboxes is ... else checkboxes,
+            'prereqs': [] if prereqs is ... else prereqs
+        }
+    
+    
+    def check_quest(self, response: api.DataType, fields: dict[str, Any]) -> tuple[str, dict[str, Any], list[str]]:
+        created = schema.CREATED_QUEST.check(response)
+        uuid, quest, prereqs = created['uuid'], created['quest'], created['prereqs']
         
         self.assertDictHas(
             quest,
             'Created quest doesn\'t match inputs.',
-            name=name,
-            description=description,
-            deadline=deadline,
-            difficulty=difficulty
+            name=fields['name'],
+            description=fields['description'],
+            deadline=fields['deadline'],
+            difficulty=fields['difficulty']
         )
         
-        checkboxes_obj = self.getItem(quest, 'checkboxes', 'Checkboxes missing from quests response.')
-        checkboxes_obj = self.cast(checkboxes_obj, list[dict[str, Any]], 'Checkboxes is not a dictionary.')
-        self.assertEqual(checkboxes, [checkbox_obj['name'] for checkbox_obj in checkboxes_obj])
+        self.assertEqual(fields['checkboxes'], [checkbox['name'] for checkbox in quest['checkboxes']])
         
         return uuid, quest, prereqs
     
     
+    def make_quest(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., deadline: float | EllipsisType = ..., difficulty: int | EllipsisType = ..., checkboxes: list[str] | EllipsisType = ..., prereqs: list[str] | EllipsisType = ...) -> tuple[str, dict[str, Any], list[str]]:
+        fields = self.quest_fields(name, description, deadline, difficulty, checkboxes, prereqs)
+        return self.check_quest(api.post('quests', fields), fields)
+    
+    
+    async def make_quest_async(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., deadline: float | EllipsisType = ..., difficulty: int | EllipsisType = ..., checkboxes: list[str] | EllipsisType = ..., prereqs: list[str] | EllipsisType = ...) -> tuple[str, dict[str, Any], list[str]]:
+        # asyncio is slow to import, so only async callers pay for it
+        import api.aio
+        fields = self.quest_fields(name, description, deadline, difficulty, checkboxes, prereqs)
+        return self.check_quest(await api.aio.post('quests', fields), fields)
+    
+    
     def delete_quest(self, uuid: str) -> None:
+        teardown.settle(type(self), f'quests/{uuid}')
         api.delete(f'quests/{uuid}')
         
         with self.assertApiError(404, 'Quest still exists after deletion.'):
             api.get(f'quests/{uuid}')
     
     
+    def dispose_quest(self, uuid: str) -> None:
+        if self.deferred_teardown:
+            self.defer_deletion(f'quests/{uuid}', 'Quest still exists after deletion.')
+        else:
+            self.delete_quest(uuid)
+    
+    
     @contextmanager
-    def temp_quest(self, name: str = ..., description: str = ..., deadline: float = ..., difficulty: int = ..., checkboxes: list[str] = ..., prereqs: list[str] = ...) -> Generator[tuple[str, dict[str, Any], list[str]], None, None]:
+    def temp_quest(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., deadline: float | EllipsisType = ..., difficulty: int | EllipsisType = ..., checkboxes: list[str] | EllipsisType = ..., prereqs: list[str] | EllipsisType = ...) -> Generator[tuple[str, dict[str, Any], list[str]], None, None]:
         uuid, quest, prereqs = self.make_quest(name, description, deadline, difficulty, checkboxes, prereqs)
         try:
             yield uuid, quest, prereqs
         finally:
-            self.delete_quest(uuid)
+            self.dispose_quest(uuid)
     
     
-    def make_daily(self, name: str = ..., description: str = ...):
-        name = random_str() if name is ... else name
-        description = random_str() if description is ... else description
-        
-        response = api.post('dailies', {
-            'name': name,
-            'description': description
-        })
+    async def delete_quest_async(self, uuid: str) -> None:
+        import api.aio
+        teardown.settle(type(self), f'quests/{uuid}')
+        await api.aio.delete(f'quests/{uuid}')
         
-        response = self.cast(response, dict[str, Any], 'Daily creation response is not a dictionary.')
-        
-        uuid, daily = self.getItems(response, ('uuid', 'daily'), 'Daily creation response missing keys.')
-        
-        uuid = self.cast(uuid, str, 'Created daily UUID is not a string.')
-        daily = self.cast(daily, dict[str, Any], 'Created daily data is not a dictionary.')
+        with self.assertApiError(404, 'Quest still exists after deletion.'):
+            await api.aio.get(f'quests/{uuid}')
+    
+    
+    async def dispose_quest_async(self, uuid: str) -> None:
+        if self.deferred_teardown:
+            self.defer_deletion(f'quests/{uuid}', 'Quest still exists after deletion.')
+        else:
+            await self.delete_quest_async(uuid)
+    
+    
+    @asynccontextmanager
+    async def temp_quest_async(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., deadline: float | EllipsisType = ..., difficulty: int | EllipsisType = ..., checkboxes: list[str] | EllipsisType = ..., prereqs: list[str] | EllipsisType = ...) -> AsyncGenerator[tuple[str, dict[str, Any], list[str]], None]:
+        uuid, quest, prereqs = await self.make_quest_async(name, description, deadline, difficulty, checkboxes, prereqs)
+        try:
+            yield uuid, quest, prereqs
+        finally:
+            await self.dispose_quest_async(uuid)
+    
+    
+    def daily_fields(self, name: str | EllipsisType = ..., description: str | EllipsisType = ...) -> dict[str, Any]:
+        return {
+            'name': random_str() if name is ... else name,
+            'description': self.describe() if description is ... else description
+        }
+    
+    
+    def check_daily(self, response: api.DataType, fields: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        created = schema.CREATED_DAILY.check(response)
+        uuid, daily = created['uuid'], created['daily']
         
         self.assertDictHas(
             daily,
             'Created daily doesn\'t match inputs.',
-            name=name,
-            description=description
+            name=fields['name'],
+            description=fields['description']
         )
         
         return uuid, daily
     
     
+    def make_daily(self, name: str | EllipsisType = ..., description: str | EllipsisType = ...) -> tuple[str, dict[str, Any]]:
+        fields = self.daily_fields(name, description)
+        return self.check_daily(api.post('dailies', fields), fields)
+    
+    
+    async def make_daily_async(self, name: str | EllipsisType = ..., description: str | EllipsisType = ...) -> tuple[str, dict[str, Any]]:
+        import api.aio
+        fields = self.daily_fields(name, description)
+        return self.check_daily(await api.aio.post('dailies', fields), fields)
+    
+    
     def delete_daily(self, uuid: str) -> None:
+        teardown.settle(type(self), f'dailies/{uuid}')
         api.delete(f'dailies/{uuid}')
         
         with self.assertApiError(404, 'Daily still exists after deletion.'):
             api.get(f'dailies/{uuid}')
     
     
+    def dispose_daily(self, uuid: str) -> None:
+        if self.deferred_teardown:
+            self.defer_deletion(f'dailies/{uuid}', 'Daily still exists after deletion.')
+        else:
+            self.delete_daily(uuid)
+    
+    
     @contextmanager
-    def temp_daily(self, name: str = ..., description: str = ...) -> Generator[tuple[str, dict[str, Any]], None, None]:
+    def temp_daily(self, name: str | EllipsisType = ..., description: str | EllipsisType = ...) -> Generator[tuple[str, dict[str, Any]], None, None]:
         uuid, daily = self.make_daily(name, description)
         try:
             yield uuid, daily
         finally:
-            self.delete_daily(uuid)
+            self.dispose_daily(uuid)
     
     
-    def make_regular(self, name: str = ..., description: str = ..., difficulty: int = ..., min_cooldown: float = ..., max_cooldown: float = ...):
-        name = random_str() if name is ... else name
-        description = random_str() if description is ... else description
-        difficulty = random_int() if difficulty is ... else difficulty
-        min_cooldown = random_float() if min_cooldown is ... else min_cooldown
-        max_cooldown = min_cooldown + random_float() if max_cooldown is ... else max_cooldown
+    async def delete_daily_async(self, uuid: str) -> None:
+        import api.aio
+        teardown.settle(type(self), f'dailies/{uuid}')
+        await api.aio.delete(f'dailies/{uuid}')
         
-        response = api.post('regulars', {
-            'name': name,
-            'description': description,
-            'difficulty': difficulty,
+        with self.assertApiError(404, 'Daily still exists after deletion.'):
+            await api.aio.get(f'dailies/{uuid}')
+    
+    
+    async def dispose_daily_async(self, uuid: str) -> None:
+        if self.deferred_teardown:
+            self.defer_deletion(f'dailies/{uuid}', 'Daily still exists after deletion.')
+        else:
+            await self.delete_daily_async(uuid)
+    
+    
+    @asynccontextmanager
+    async def temp_daily_async(self, name: str | EllipsisType = ..., description: str | EllipsisType = ...) -> AsyncGenerator[tuple[str, dict[str, Any]], None]:
+        uuid, daily = await self.make_daily_async(name, description)
+        try:
+            yield uuid, daily
+        finally:
+            await self.dispose_daily_async(uuid)
+    
+    
+    def regular_fields(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., difficulty: int | EllipsisType = ..., min_cooldown: float | EllipsisType = ..., max_cooldown: float | EllipsisType = ...) -> dict[str, Any]:
+        min_cooldown = random_float() if min_cooldown is ... else min_cooldown
+        return {
+            'name': random_str() if name is ... else name,
+            'description': self.describe() if description is ... else description,
+            'difficulty': random_int() if difficulty is ... else difficulty,
             'min_cooldown': min_cooldown,
-            'max_cooldown': max_cooldown
-        })
-        
-        response = self.cast(response, dict[str, Any], 'Regular creation response is not a dictionary.')
-        
-        uuid, regular = self.getItems(response, ('uuid', 'regular'), 'Regular creation response missing keys.')
-        
-        uuid = self.cast(uuid, str, 'Created regular UUID is not a string.')
-        regular = self.cast(regular, dict[str, Any], 'Created regular data is not a dictionary.')
+            'max_cooldown': min_cooldown + random_float() if max_cooldown is ... else max_cooldown
+        }
+    
+    
+    def check_regular(self, response: api.DataType, fields: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        created = schema.CREATED_REGULAR.check(response)
+        uuid, regular = created['uuid'], created['regular']
         
         self.assertDictHas(
             regular,
             'Created regular doesn\'t match inputs.',
-            min_cooldown=min_cooldown,
-            max_cooldown=max_cooldown,
+            min_cooldown=fields['min_cooldown'],
+            max_cooldown=fields['max_cooldown'],
             times_completed=0
         )
         
-        quest = self.getItem(regular, 'quest', 'Created regular is missing quest.')
-        quest = self.cast(quest, dict[str, Any], 'Quest of created regular is not a dictionary.')
-        
         self.assertDictHas(
-            quest,
+            regular['quest'],
             'Quest of created regular doesn\'t match inputs.',
-            name=name,
-            description=description,
-            difficulty=difficulty
+            name=fields['name'],
+            description=fields['description'],
+            difficulty=fields['difficulty']
         )
         
         return uuid, regular
     
     
+    def make_regular(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., difficulty: int | EllipsisType = ..., min_cooldown: float | EllipsisType = ..., max_cooldown: float | EllipsisType = ...) -> tuple[str, dict[str, Any]]:
+        fields = self.regular_fields(name, description, difficulty, min_cooldown, max_cooldown)
+        return self.check_regular(api.post('regulars', fields), fields)
+    
+    
+    async def make_regular_async(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., difficulty: int | EllipsisType = ..., min_cooldown: float | EllipsisType = ..., max_cooldown: float | EllipsisType = ...) -> tuple[str, dict[str, Any]]:
+        import api.aio
+        fields = self.regular_fields(name, description, difficulty, min_cooldown, max_cooldown)
+        return self.check_regular(await api.aio.post('regulars', fields), fields)
+    
+    
     def delete_regular(self, uuid: str) -> None:
+        teardown.settle(type(self), f'regulars/{uuid}')
         api.delete(f'regulars/{uuid}')
         
         with self.assertApiError(404, 'Regular still exists after deletion.'):
             api.get(f'regulars/{uuid}')
     
     
+    def dispose_regular(self, uuid: str) -> None:
+        if self.deferred_teardown:
+            self.defer_deletion(f'regulars/{uuid}', 'Regular still exists after deletion.')
+        else:
+            self.delete_regular(uuid)
+    
+    
     @contextmanager
-    def temp_regular(self, name: str = ..., description: str = ..., difficulty: int = ..., min_cooldown: float = ..., max_cooldown: float = ...) -> Generator[tuple[str, dict[str, Any]], None, None]:
+    def temp_regular(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., difficulty: int | EllipsisType = ..., min_cooldown: float | EllipsisType = ..., max_cooldown: float | EllipsisType = ...) -> Generator[tuple[str, dict[str, Any]], None, None]:
         uuid, regular = self.make_regular(name, description, difficulty, min_cooldown, max_cooldown)
         try:
             yield uuid, regular
         finally:
-            self.delete_regular(uuid)
+            self.dispose_regular(uuid)
+    
+    
+    async def delete_regular_async(self, uuid: str) -> None:
+        import api.aio
+        teardown.settle(type(self), f'regulars/{uuid}')
+        await api.aio.delete(f'regulars/{uuid}')
+        
+        with self.assertApiError(404, 'Regular still exists after deletion.'):
+            await api.aio.get(f'regulars/{uuid}')
+    
+    
+    async def dispose_regular_async(self, uuid: str) -> None:
+        if self.deferred_teardown:
+            self.defer_deletion(f'regulars/{uuid}', 'Regular still exists after deletion.')
+        else:
+            await self.delete_regular_async(uuid)
+    
+    
+    @asynccontextmanager
+    async def temp_regular_async(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., difficulty: int | EllipsisType = ..., min_cooldown: float | EllipsisType = ..., max_cooldown: float | EllipsisType = ...) -> AsyncGenerator[tuple[str, dict[str, Any]], None]:
+        uuid, regular = await self.make_regular_async(name, description, difficulty, min_cooldown, max_cooldown)
+        try:
+            yield uuid, regular
+        finally:
+            await self.dispose_regular_async(uuid)
+    
+    #
+    # POOLED FIXTURES
+    #
+    
+    @classmethod
+    def warm_pool(cls, kind: str, count: int | None = None, **props: Any) -> None:
+        # for setUpClass, with what the class is about to lease; seeded runs never lease from the pool
+        if cls.seed is None:
+            from .fixtures import get_pool
+            get_pool().warm(kind, count, **props)
+    
+    
+    @contextmanager
+    def pooled_fixture(self, kind: str, **props: Any) -> Generator[tuple[Any, ...], None, None]:
+        from .fixtures import get_pool
+        
+        # unspecified properties are random anyway, so any pooled fixture will do
+        props = {key: value for key, value in props.items() if value is not ...}
+        if self.seed is not None:
+            # pools fill in the background, in no particular order, so seeded runs make their own
+            makers = {'quest': self.temp_quest, 'daily': self.temp_daily, 'regular': self.temp_regular}
+            with makers[kind](**props) as value:
+                yield value
+            return
+        
+        value = get_pool().lease(kind, **props)
+        try:
+            yield value
+        finally:
+            get_pool().release(kind, props, value)
+    
+    
+    @contextmanager
+    def pooled_quest(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., deadline: float | EllipsisType = ..., difficulty: int | EllipsisType = ..., checkboxes: list[str] | EllipsisType = ...) -> Generator[tuple[str, dict[str, Any], list[str]], None, None]:
+        with self.pooled_fixture('quest', name=name, description=description, deadline=deadline, difficulty=difficulty, checkboxes=checkboxes) as value:
+            yield value # type: ignore
+    
+    
+    @contextmanager
+    def pooled_daily(self, name: str | EllipsisType = ..., description: str | EllipsisType = ...) -> Generator[tuple[str, dict[str, Any]], None, None]:
+        with self.pooled_fixture('daily', name=name, description=description) as value:
+            yield value # type: ignore
+    
+    
+    @contextmanager
+    def pooled_regular(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., difficulty: int | EllipsisType = ..., min_cooldown: float | EllipsisType = ..., max_cooldown: float | EllipsisType = ...) -> Generator[tuple[str, dict[str, Any]], None, None]:
+        with self.pooled_fixture('regular', name=name, description=description, difficulty=difficulty, min_cooldown=min_cooldown, max_cooldown=max_cooldown) as value:
+            yield value # type: ignore
+    
+    #
+    # SHARED FIXTURES
+    #
+    
+    @contextmanager
+    def shared_fixture(self, kind: str, mutate: bool = False, scope: str = 'session', **props: Any) -> Generator[tuple[Any, ...], None, None]:
+        from .fixtures import get_shared
+        
+        props = {key: value for key, value in props.items() if value is not ...}
+        if mutate or self.seed is not None:
+            # copy on write: a test that changes the fixture gets a private one with the same properties
+            with self.pooled_fixture(kind, **props) as value:
+                yield value
+            return
+        
+        yield get_shared(type(self) if scope == 'class' else None).get(kind, **props)
+    
+    
+    @contextmanager
+    def shared_quest(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., deadline: float | EllipsisType = ..., difficulty: int | EllipsisType = ..., checkboxes: list[str] | EllipsisType = ..., mutate: bool = False, scope: str = 'session') -> Generator[tuple[str, dict[str, Any], list[str]], None, None]:
+        with self.shared_fixture('quest', mutate, scope, name=name, description=description, deadline=deadline, difficulty=difficulty, checkboxes=checkboxes) as value:
+            yield value # type: ignore
+    
+    
+    @contextmanager
+    def shared_daily(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., mutate: bool = False, scope: str = 'session') -> Generator[tuple[str, dict[str, Any]], None, None]:
+        with self.shared_fixture('daily', mutate, scope, name=name, description=description) as value:
+            yield value # type: ignore
+    
+    
+    @contextmanager
+    def shared_regular(self, name: str | EllipsisType = ..., description: str | EllipsisType = ..., difficulty: int | EllipsisType = ..., min_cooldown: float | EllipsisType = ..., max_cooldown: float | EllipsisType = ..., mutate: bool = False, scope: str = 'session') -> Generator[tuple[str, dict[str, Any]], None, None]:
+        with self.shared_fixture('regular', mutate, scope, name=name, description=description, difficulty=difficulty, min_cooldown=min_cooldown, max_cooldown=max_cooldown) as value:
+            yield value # type: ignore
@@ -0,0 +1,783 @@
+import atexit
+import hashlib
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from secrets import token_hex
+from time import sleep, time
+from urllib.parse import parse_qs
+from uuid import uuid4
+
+import api
+from api.codec import MSGPACK, Codec, StdlibJsonCodec, media_type, msgpack_codec
+
+from typing import Any, Callable, NamedTuple
+
+
+class FakeError(Exception):
+    def __init__(self, message: str, status_code: int, retry_after: float | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class Fault(NamedTuple):
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: float | None = None
+
+
+Handler = Callable[['FakeState', dict[str, str], Any], Any]
+
+
+#
+# VALIDATION
+#
+
+def require(data: Any, key: str, cls: type | tuple[type, ...]) -> Any:
+    if not isinstance(data, dict) or key not in data:
+        raise FakeError(f'Missing argument "{key}".', 400)
+    return check(data, key, cls) # type: ignore
+
+
+def check(data: dict[str, Any], key: str, cls: type | tuple[type, ...]) -> Any:
+    value = data[key]
+    # bools are ints as far as isinstance is concerned, but not as far as json is
+    if isinstance(value, bool) and cls is not bool or not isinstance(value, cls):
+        raise FakeError(f'Argument "{key}" has the wrong type.', 400)
+    return value
+
+
+def optional(data: Any, key: str, cls: type | tuple[type, ...]) -> Any:
+    if isinstance(data, dict) and key in data:
+        return check(data, key, cls) # type: ignore
+    return None
+
+
+def string_list(data: Any, key: str) -> list[str] | None:
+    value = optional(data, key, list)
+    if value is not None and not all(isinstance(item, str) for item in value):
+        raise FakeError(f'Argument "{key}" has the wrong type.', 400)
+    return value
+
+
+NUMBER = (int, float)
+
+
+#
+# STATE
+#
+
+class FakeState:
+    
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.quests: dict[str, dict[str, Any]] = {}
+        self.prereqs: dict[str, list[str]] = {}
+        self.dailies: dict[str, dict[str, Any]] = {}
+        # the quest each daily turns up as today
+        self.daily_quests: dict[str, str] = {}
+        self.regulars: dict[str, dict[str, Any]] = {}
+        self.last_seen = time()
+    
+    
+    def quest(self, uuid: str) -> dict[str, Any]:
+        if uuid not in self.quests:
+            raise FakeError('Quest not found.', 404)
+        return self.quests[uuid]
+    
+    
+    def checkbox_index(self, quest: dict[str, Any], index: str) -> int:
+        try:
+            i = int(index)
+        except ValueError:
+            raise FakeError('Checkbox not found.', 404)
+        if not 0 <= i < len(quest['checkboxes']):
+            raise FakeError('Checkbox not found.', 404)
+        return i
+    
+    
+    def is_active(self, uuid: str) -> bool:
+        quest = self.quests[uuid]
+        return (
+            not quest['completed']
+            and quest['deadline'] > time()
+            and all(self.quests[prereq]['completed'] for prereq in self.prereqs[uuid] if prereq in self.quests)
+        )
+    
+    
+    #
+    # QUESTS
+    #
+    
+    def list_quests(self, params: dict[str, str], data: Any) -> Any:
+        return dict(self.quests)
+    
+    
+    def list_active(self, params: dict[str, str], data: Any) -> Any:
+        return {uuid: quest for uuid, quest in self.quests.items() if self.is_active(uuid)}
+    
+    
+    def list_daily(self, params: dict[str, str], data: Any) -> Any:
+        return {uuid: self.quests[uuid] for uuid in self.daily_quests.values() if uuid in self.quests}
+    
+    
+    def create_quest(self, params: dict[str, str], data: Any) -> Any:
+        quest: dict[str, Any] = {
+            'name': require(data, 'name', str),
+            'description': require(data, 'description', str),
+            'deadline': require(data, 'deadline', NUMBER),
+            'difficulty': require(data, 'difficulty', int),
+            'checkboxes': [{'name': name, 'checked': False} for name in string_list(data, 'checkboxes') or []],
+            'completed': False
+        }
+        prereqs = string_list(data, 'prereqs') or []
+        for prereq in prereqs:
+            self.quest(prereq)
+        
+        uuid = str(uuid4())
+        self.quests[uuid] = quest
+        self.prereqs[uuid] = list(prereqs)
+        return {'uuid': uuid, 'quest': quest, 'prereqs': list(prereqs)}
+    
+    
+    def get_quest(self, params: dict[str, str], data: Any) -> Any:
+        return self.quest(params['uuid'])
+    
+    
+    def patch_quest(self, params: dict[str, str], data: Any) -> Any:
+        quest = self.quest(params['uuid'])
+        updates = {
+            key: value for key, cls in (('name', str), ('description', str), ('deadline', NUMBER), ('difficulty', int))
+            if (value := optional(data, key, cls)) is not None
+        }
+        quest.update(updates)
+        return quest
+    
+    
+    def delete_quest(self, params: dict[str, str], data: Any) -> Any:
+        uuid = params['uuid']
+        self.quest(uuid)
+        del self.quests[uuid]
+        del self.prereqs[uuid]
+        for prereqs in self.prereqs.values():
+            if uuid in prereqs:
+                prereqs.remove(uuid)
+        return None
+    
+    
+    def complete_quest(self, params: dict[str, str], data: Any) -> Any:
+        quest = self.quest(params['uuid'])
+        quest['completed'] = True
+        return {'quest': quest, 'rewards': {'experience': quest['difficulty']}}
+    
+    
+    def get_prereqs(self, params: dict[str, str], data: Any) -> Any:
+        self.quest(params['uuid'])
+        return list(self.prereqs[params['uuid']])
+    
+    
+    def get_sequels(self, params: dict[str, str], data: Any) -> Any:
+        uuid = params['uuid']
+        self.quest(uuid)
+        return [sequel for sequel, prereqs in self.prereqs.items() if uuid in prereqs]
+    
+    
+    #
+    # CHECKBOXES
+    #
+    
+    def get_checkboxes(self, params: dict[str, str], data: Any) -> Any:
+        return self.quest(params['uuid'])['checkboxes']
+    
+    
+    def put_checkboxes(self, params: dict[str, str], data: Any) -> Any:
+        quest = self.quest(params['uuid'])
+        names = string_list(data, 'names')
+        if names is None:
+            raise FakeError('Missing argument "names".', 400)
+        checked = require(data, 'checked', list)
+        if len(checked) != len(names) or not all(isinstance(item, bool) for item in checked):
+            raise FakeError('Argument "checked" has the wrong type.', 400)
+        quest['checkboxes'] = [{'name': name, 'checked': check} for name, check in zip(names, checked)]
+        return quest['checkboxes']
+    
+    
+    def get_checkbox(self, params: dict[str, str], data: Any) -> Any:
+        quest = self.quest(params['uuid'])
+        return quest['checkboxes'][self.checkbox_index(quest, params['i'])]
+    
+    
+    def patch_checkbox(self, params: dict[str, str], data: Any) -> Any:
+        quest = self.quest(params['uuid'])
+        checkbox = quest['checkboxes'][self.checkbox_index(quest, params['i'])]
+        name = optional(data, 'name', str)
+        checked = optional(data, 'checked', bool)
+        if name is not None:
+            checkbox['name'] = name
+        if checked is not None:
+            checkbox['checked'] = checked
+        return checkbox
+    
+    
+    def delete_checkbox(self, params: dict[str, str], data: Any) -> Any:
+        quest = self.quest(params['uuid'])
+        del quest['checkboxes'][self.checkbox_index(quest, params['i'])]
+        return quest['checkboxes']
+    
+    
+    #
+    # DAILIES
+    #
+    
+    def daily(self, uuid: str) -> dict[str, Any]:
+        if uuid not in self.dailies:
+            raise FakeError('Daily not found.', 404)
+        return self.dailies[uuid]
+    
+    
+    def list_dailies(self, params: dict[str, str], data: Any) -> Any:
+        return dict(self.dailies)
+    
+    
+    def create_daily(self, params: dict[str, str], data: Any) -> Any:
+        daily = {
+            'name': require(data, 'name', str),
+            'description': require(data, 'description', str)
+        }
+        uuid = str(uuid4())
+        self.dailies[uuid] = daily
+        
+        # due by the end of the (utc) day, and listed with every other quest
+        quest_uuid = str(uuid4())
+        self.quests[quest_uuid] = {
+            'name': daily['name'],
+            'description': daily['description'],
+            'deadline': float((time() // 86400 + 1) * 86400),
+            'difficulty': 1,
+            'checkboxes': [],
+            'completed': False
+        }
+        self.prereqs[quest_uuid] = []
+        self.daily_quests[uuid] = quest_uuid
+        return {'uuid': uuid, 'daily': daily}
+    
+    
+    def get_daily(self, params: dict[str, str], data: Any) -> Any:
+        return self.daily(params['uuid'])
+    
+    
+    def patch_daily(self, params: dict[str, str], data: Any) -> Any:
+        daily = self.daily(params['uuid'])
+        quest = self.quests.get(self.daily_quests[params['uuid']])
+        for key in ('name', 'description'):
+            if (value := optional(data, key, str)) is not None:
+                daily[key] = value
+                if quest is not None:
+                    quest[key] = value
+        return daily
+    
+    
+    def delete_daily(self, params: dict[str, str], data: Any) -> Any:
+        self.daily(params['uuid'])
+        del self.dailies[params['uuid']]
+        quest_uuid = self.daily_quests.pop(params['uuid'])
+        if quest_uuid in self.quests:
+            self.delete_quest({'uuid': quest_uuid}, None)
+        return None
+    
+    
+    #
+    # REGULARS
+    #
+    
+    def regular(self, uuid: str) -> dict[str, Any]:
+        if uuid not in self.regulars:
+            raise FakeError('Regular not found.', 404)
+        return self.regulars[uuid]
+    
+    
+    def check_cooldowns(self, min_cooldown: float, max_cooldown: float) -> None:
+        if min_cooldown < 0:
+            raise FakeError('Minimum cooldown is negative.', 400)
+        if max_cooldown <= min_cooldown:
+            raise FakeError('Maximum cooldown is not greater than minimum cooldown.', 400)
+    
+    
+    def list_regulars(self, params: dict[str, str], data: Any) -> Any:
+        return dict(self.regulars)
+    
+    
+    def create_regular(self, params: dict[str, str], data: Any) -> Any:
+        regular: dict[str, Any] = {
+            'quest': {
+                'name': require(data, 'name', str),
+                'description': require(data, 'description', str),
+                'difficulty': require(data, 'difficulty', int)
+            },
+            'min_cooldown': require(data, 'min_cooldown', NUMBER),
+            'max_cooldown': require(data, 'max_cooldown', NUMBER),
+            'times_completed': 0
+        }
+        self.check_cooldowns(regular['min_cooldown'], regular['max_cooldown'])
+        
+        uuid = str(uuid4())
+        self.regulars[uuid] = regular
+        return {'uuid': uuid, 'regular': regular}
+    
+    
+    def get_regular(self, params: dict[str, str], data: Any) -> Any:
+        return self.regular(params['uuid'])
+    
+    
+    def patch_regular(self, params: dict[str, str], data: Any) -> Any:
+        regular = self.regular(params['uuid'])
+        min_cooldown = optional(data, 'min_cooldown', NUMBER)
+        max_cooldown = optional(data, 'max_cooldown', NUMBER)
+        self.check_cooldowns(
+            regular['min_cooldown'] if min_cooldown is None else min_cooldown,
+            regular['max_cooldown'] if max_cooldown is None else max_cooldown
+        )
+        quest_updates = {
+            key: value for key, cls in (('name', str), ('description', str), ('difficulty', int))
+            if (value := optional(data, key, cls)) is not None
+        }
+        
+        if min_cooldown is not None:
+            regular['min_cooldown'] = min_cooldown
+        if max_cooldown is not None:
+            regular['max_cooldown'] = max_cooldown
+        regular['quest'].update(quest_updates)
+        return regular
+    
+    
+    def delete_regular(self, params: dict[str, str], data: Any) -> Any:
+        self.regular(params['uuid'])
+        del self.regulars[params['uuid']]
+        return None
+    
+    
+    #
+    # PLAYER
+    #
+    
+    def get_player(self, params: dict[str, str], data: Any) -> Any:
+        return {'last_seen': self.last_seen}
+
+
+ROUTES: list[tuple[str, str, Handler]] = [
+    ('GET', 'quests', FakeState.list_quests),
+    ('POST', 'quests', FakeState.create_quest),
+    ('GET', 'quests/active', FakeState.list_active),
+    ('GET', 'quests/daily', FakeState.list_daily),
+    ('GET', 'quests/{uuid}', FakeState.get_quest),
+    ('PATCH', 'quests/{uuid}', FakeState.patch_quest),
+    ('DELETE', 'quests/{uuid}', FakeState.delete_quest),
+    ('POST', 'quests/{uuid}/complete', FakeState.complete_quest),
+    ('GET', 'quests/{uuid}/prereqs', FakeState.get_prereqs),
+    ('GET', 'quests/{uuid}/sequels', FakeState.get_sequels),
+    ('GET', 'quests/{uuid}/checkboxes', FakeState.get_checkboxes),
+    ('PUT', 'quests/{uuid}/checkboxes', FakeState.put_checkboxes),
+    ('GET', 'quests/{uuid}/checkboxes/{i}', FakeState.get_checkbox),
+    ('PATCH', 'quests/{uuid}/checkboxes/{i}', FakeState.patch_checkbox),
+    ('DELETE', 'quests/{uuid}/checkboxes/{i}', FakeState.delete_checkbox),
+    ('GET', 'dailies', FakeState.list_dailies),
+    ('POST', 'dailies', FakeState.create_daily),
+    ('GET', 'dailies/{uuid}', FakeState.get_daily),
+    ('PATCH', 'dailies/{uuid}', FakeState.patch_daily),
+    ('DELETE', 'dailies/{uuid}', FakeState.delete_daily),
+    ('GET', 'regulars', FakeState.list_regulars),
+    ('POST', 'regulars', FakeState.create_regular),
+    ('GET', 'regulars/{uuid}', FakeState.get_regular),
+    ('PATCH', 'regulars/{uuid}', FakeState.patch_regular),
+    ('DELETE', 'regulars/{uuid}', FakeState.delete_regular),
+    ('GET', 'player', FakeState.get_player),
+]
+
+
+def compile_route(template: str) -> re.Pattern[str]:
+    return re.compile('^' + re.sub(r'\\{(\w+)\\}', r'(?P<\1>[^/]+)', re.escape(template)) + '$')
+
+
+COMPILED_ROUTES = [(method, compile_route(template), template, handler) for method, template, handler in ROUTES]
+
+
+def match_route(method: str, path: str) -> tuple[str, Handler, dict[str, str]]:
+    allowed = False
+    for route_method, pattern, template, handler in COMPILED_ROUTES:
+        match = pattern.match(path)
+        if match:
+            if route_method == method:
+                return template, handler, match.groupdict()
+            allowed = True
+    raise FakeError('Method not allowed.' if allowed else 'Not found.', 405 if allowed else 404)
+
+
+#
+# SERVER
+#
+
+class FakeServer:
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, token_lifetime: float = 3600, seed: int | None = None, capacity: int | None = None, retry_after: float | None = None, account_capacity: int | None = None):
+        self.host = host
+        self.port = port
+        self.token_lifetime = token_lifetime
+        # requests beyond this many at once are turned away with a 429
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.active = 0
+        self.active_lock = threading.Lock()
+        # the same again for each identity, like the real api's per-account rate limit
+        self.account_capacity = account_capacity
+        self.account_active: dict[str, int] = {}
+        self.random = random.Random(seed)
+        
+        self.state = FakeState()
+        self.faults: dict[str, Fault] = {}
+        self.requests = 0
+        
+        # every identity is its own account, with its own quests
+        self.client_id = token_hex(8)
+        self.client_secret = token_hex(16)
+        self.clients = {self.client_id: self.client_secret}
+        self.states = {self.client_id: self.state}
+        self.token_lock = threading.Lock()
+        # tokens and refresh tokens, to their expiry and identity
+        self.tokens: dict[str, tuple[float, str]] = {}
+        self.refresh_tokens: dict[str, str] = {}
+        self.token, self.refresh_token, _ = self.issue_token(self.client_id)
+        
+        self.httpd: ThreadingHTTPServer | None = None
+        self.thread: threading.Thread | None = None
+        self.token_file: str | None = None
+    
+    
+    @property
+    def url(self) -> str:
+        assert self.httpd is not None, 'Fake server is not running.'
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+    
+    
+    @property
+    def base_url(self) -> str:
+        return self.url + 'api/beta/'
+    
+    
+    @property
+    def token_url(self) -> str:
+        return self.url + 'token'
+    
+    
+    def start(self) -> 'FakeServer':
+        self.httpd = ThreadingHTTPServer((self.host, self.port), make_handler(self))
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fake-server', daemon=True)
+        self.thread.start()
+        return self
+    
+    
+    def stop(self) -> None:
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+        if self.token_file is not None:
+            # along with the lock file refreshes leave beside it
+            for path in (self.token_file, f'{self.token_file}.lock'):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.token_file = None
+    
+    
+    def __enter__(self) -> 'FakeServer':
+        return self.start()
+    
+    
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+    
+    
+    def fault(self, route: str = '*', latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503, retry_after: float | None = None) -> None:
+        # route is '*', a template like 'quests/{uuid}' or a method and template like 'GET quests/{uuid}'
+        self.faults[route] = Fault(latency, jitter, error_rate, error_status, retry_after)
+    
+    
+    def admit(self) -> bool:
+        with self.active_lock:
+            if self.capacity is not None and self.active >= self.capacity:
+                return False
+            self.active += 1
+            return True
+    
+    
+    def leave(self) -> None:
+        with self.active_lock:
+            self.active -= 1
+    
+    
+    def admit_account(self, client_id: str) -> bool:
+        with self.active_lock:
+            active = self.account_active.get(client_id, 0)
+            if self.account_capacity is not None and active >= self.account_capacity:
+                return False
+            self.account_active[client_id] = active + 1
+            self.requests += 1
+            return True
+    
+    
+    def leave_account(self, client_id: str) -> None:
+        with self.active_lock:
+            self.account_active[client_id] -= 1
+    
+    
+    def find_fault(self, method: str, template: str) -> Fault | None:
+        return self.faults.get(f'{method} {template}') or self.faults.get(template) or self.faults.get('*')
+    
+    
+    def issue_token(self, client_id: str) -> tuple[str, str, float]:
+        token, refresh_token = token_hex(16), token_hex(16)
+        with self.token_lock:
+            self.tokens[token] = (time() + self.token_lifetime, client_id)
+            self.refresh_tokens[refresh_token] = client_id
+        return token, refresh_token, self.token_lifetime
+    
+    
+    def add_identity(self) -> api.Credentials:
+        # another account, for spreading load across identities
+        client_id, client_secret = token_hex(8), token_hex(16)
+        with self.state.lock:
+            self.clients[client_id] = client_secret
+            self.states[client_id] = FakeState()
+        token, refresh_token, _ = self.issue_token(client_id)
+        return api.Credentials(client_id, client_secret, token, refresh_token)
+    
+    
+    def client(self, **options: Any) -> api.Client:
+        # a client of the server's own identity, for tests that want a server (and its faults) to themselves
+        credentials = api.Credentials(self.client_id, self.client_secret, self.token, self.refresh_token)
+        return api.Client(base_url=self.base_url, credentials=credentials, **options)
+    
+    
+    def expire_tokens(self) -> None:
+        with self.token_lock:
+            self.tokens.clear()
+    
+    
+    def authorized(self, header: str) -> str | None:
+        # the identity the header belongs to, if it's a valid one
+        parts = dict(part.strip().split(' ', 1) for part in header.split(',') if ' ' in part.strip())
+        with self.token_lock:
+            expiry, client_id = self.tokens.get(parts.get('Bearer', ''), (0.0, ''))
+        if expiry > time() and parts.get('Client') == client_id and parts.get('Secret') == self.clients.get(client_id):
+            return client_id
+        return None
+    
+    
+    def exchange(self, form: dict[str, str]) -> tuple[int, dict[str, Any]]:
+        client_id = form.get('client_id', '')
+        if client_id not in self.clients or form.get('client_secret') != self.clients[client_id]:
+            return 401, {'error': 'invalid_client'}
+        if form.get('grant_type') != 'refresh_token':
+            return 400, {'error': 'unsupported_grant_type'}
+        
+        with self.token_lock:
+            # refresh tokens are single use, just like the real server's
+            valid = self.refresh_tokens.pop(form.get('refresh_token', ''), None) == client_id
+        if not valid:
+            return 400, {'error': 'invalid_grant'}
+        
+        token, refresh_token, expires_in = self.issue_token(client_id)
+        return 200, {
+            'access_token': token,
+            'refresh_token': refresh_token,
+            'expires_in': expires_in,
+            'token_type': 'Bearer'
+        }
+    
+    
+    def write_token_file(self) -> str:
+        if self.token_file is None:
+            fd, self.token_file = tempfile.mkstemp(prefix='lala-fake-', suffix='.token')
+            with os.fdopen(fd, 'w') as f:
+                f.write(f'{self.client_id}\n{self.client_secret}\n{self.token}\n{self.refresh_token}\n')
+        return self.token_file
+
+
+def make_handler(server: FakeServer) -> type[BaseHTTPRequestHandler]:
+    # plain json unless the client asks for msgpack and it's installed
+    text = StdlibJsonCodec()
+    binary = msgpack_codec()
+    
+    class FakeHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # headers and body go out in separate writes, which nagle would hold back
+        disable_nagle_algorithm = True
+        
+        
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+        
+        
+        def negotiate(self) -> Codec:
+            # msgpack for clients that ask for it, when we can speak it
+            if binary is not None and MSGPACK in (media_type(part) for part in self.headers.get('Accept', '').split(',')):
+                return binary
+            return text
+        
+        
+        def send(self, status: int, body: Any, retry_after: float | None = None) -> None:
+            codec = self.negotiate()
+            self.send_payload(status, codec.encode(body), codec.content_type, retry_after=retry_after)
+        
+        
+        def send_payload(self, status: int, payload: bytes, content_type: str, etag: str | None = None, retry_after: float | None = None) -> None:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            if etag is not None:
+                self.send_header('ETag', etag)
+                self.send_header('Vary', 'Accept')
+            if retry_after is not None:
+                self.send_header('Retry-After', str(retry_after))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        
+        def send_not_modified(self, etag: str) -> None:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        
+        
+        def read_body(self) -> bytes:
+            length = int(self.headers.get('Content-Length') or 0)
+            return self.rfile.read(length) if length else b''
+        
+        
+        def handle_token(self) -> None:
+            form = {key: values[0] for key, values in parse_qs(self.read_body().decode()).items()}
+            self.send(*server.exchange(form))
+        
+        
+        def handle_api(self, path: str) -> None:
+            body = self.read_body()
+            if not server.admit():
+                self.send(429, {'ok': False, 'status': 429, 'message': 'Too many requests.'}, server.retry_after)
+                return
+            try:
+                self.respond(path, body)
+            finally:
+                server.leave()
+        
+        
+        def respond(self, path: str, body: bytes) -> None:
+            try:
+                template, handler, params = match_route(self.command, path)
+                
+                fault = server.find_fault(self.command, template)
+                if fault is not None:
+                    delay = fault.latency + server.random.uniform(-fault.jitter, fault.jitter)
+                    if delay > 0:
+                        sleep(delay)
+                    if server.random.random() < fault.error_rate:
+                        raise FakeError('Injected error.', fault.error_status, fault.retry_after)
+                
+                client_id = server.authorized(self.headers.get('authorization', ''))
+                if client_id is None:
+                    raise FakeError('Unauthorized.', 401)
+                if not server.admit_account(client_id):
+                    raise FakeError('Too many requests for this account.', 429, server.retry_after)
+                try:
+                    state = server.states[client_id]
+                    try:
+                        body_codec = binary if binary is not None and media_type(self.headers.get('Content-Type')) == MSGPACK else text
+                        data = body_codec.decode(body).get('data') if body else None
+                    except (ValueError, AttributeError):
+                        raise FakeError('Malformed request body.', 400)
+                    
+                    with state.lock:
+                        result = handler(state, params, data)
+                        state.last_seen = time()
+                        codec = self.negotiate()
+                        payload = codec.encode({'ok': True, 'status': 200, 'data': result})
+                finally:
+                    server.leave_account(client_id)
+            except FakeError as e:
+                self.send(e.status_code, {'ok': False, 'status': e.status_code, 'message': str(e)}, e.retry_after)
+                return
+            
+            if self.command != 'GET':
+                self.send_payload(200, payload, codec.content_type)
+                return
+            
+            # each representation gets its own tag
+            etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_not_modified(etag)
+            else:
+                self.send_payload(200, payload, codec.content_type, etag)
+        
+        
+        def dispatch(self) -> None:
+            path = self.path.split('?', 1)[0]
+            if path == '/token' and self.command == 'POST':
+                self.handle_token()
+            elif path.startswith('/api/beta/'):
+                self.handle_api(path[len('/api/beta/'):])
+            else:
+                self.read_body()
+                self.send(404, {'ok': False, 'status': 404, 'message': 'Not found.'})
+        
+        
+        do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = dispatch
+    
+    
+    return FakeHandler
+
+
+def install(server: FakeServer | None = None) -> FakeServer:
+    # points the api module (and any clients created afterwards) at the fake
+    if server is None:
+        server = FakeServer().start()
+        # registered before anything that cleans up through the api, so it runs after all of it
+        atexit.register(server.stop)
+    api.BASE_URL = server.base_url
+    api.TOKEN_URL = server.token_url
+    api.TOKEN_FILE = server.write_token_file()
+    api.client = api.Client()
+    return server
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(prog='python -m test.fake_server', description='Serve an in-memory stand-in for the Lalaverse API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every api request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random deviation from the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of api requests that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    args = parser.parse_args(argv)
+    
+    server = FakeServer(args.host, args.port)
+    server.fault('*', args.latency, args.jitter, args.error_rate, args.error_status)
+    server.start()
+    print(f'Serving fake api at {server.base_url}', file=sys.stderr)
+    print(f'Token file: {server.write_token_file()}', file=sys.stderr)
+    try:
+        server.thread.join() # type: ignore
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+import atexit
+import threading
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from copy import deepcopy
+
+import api
+
+from typing import Any, Callable, Hashable
+
+
+# what each kind of fixture can be patched back to, as (response path, patch key)
+RESETTABLE: dict[str, tuple[tuple[tuple[str, ...], str], ...]] = {
+    'quest': ((('name',), 'name'), (('description',), 'description'), (('deadline',), 'deadline'), (('difficulty',), 'difficulty')),
+    'daily': ((('name',), 'name'), (('description',), 'description')),
+    'regular': (
+        (('quest', 'name'), 'name'),
+        (('quest', 'description'), 'description'),
+        (('quest', 'difficulty'), 'difficulty'),
+        (('min_cooldown',), 'min_cooldown'),
+        (('max_cooldown',), 'max_cooldown')
+    ),
+}
+
+COLLECTIONS = {'quest': 'quests', 'daily': 'dailies', 'regular': 'regulars'}
+
+Key = tuple[str, tuple[tuple[str, Hashable], ...]]
+
+
+def freeze(value: Any) -> Hashable:
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value) # type: ignore
+    return value
+
+
+def make_key(kind: str, props: dict[str, Any]) -> Key:
+    return kind, tuple(sorted((name, freeze(value)) for name, value in props.items()))
+
+
+def lookup(data: dict[str, Any], path: tuple[str, ...]) -> Any:
+    for part in path:
+        data = data[part]
+    return data
+
+
+class FixturePool:
+    
+    def __init__(self, target: int = 2, workers: int = 4):
+        from . import LalaTestCase
+        
+        self.target = target
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='fixture-pool')
+        self.lock = threading.Lock()
+        self.ready: defaultdict[Key, deque[Future[tuple[Any, ...]]]] = defaultdict(deque)
+        self.leases: Counter[Key] = Counter()
+        self.closed = False
+        
+        # borrow the suite's own creation checks so pooled fixtures are validated the same way
+        self.checker = LalaTestCase()
+        self.makers: dict[str, Callable[..., tuple[Any, ...]]] = {
+            'quest': self.checker.make_quest,
+            'daily': self.checker.make_daily,
+            'regular': self.checker.make_regular,
+        }
+        # and its deletion checks, so a fixture the api fails to delete doesn't go unnoticed
+        self.deleters: dict[str, Callable[[str], None]] = {
+            'quest': self.checker.delete_quest,
+            'daily': self.checker.delete_daily,
+            'regular': self.checker.delete_regular,
+        }
+    
+    
+    def create(self, kind: str, props: dict[str, Any]) -> tuple[Any, ...]:
+        return self.makers[kind](**props)
+    
+    
+    def warm(self, kind: str, count: int | None = None, **props: Any) -> None:
+        key = make_key(kind, props)
+        with self.lock:
+            if self.closed:
+                return
+            ready = self.ready[key]
+            for _ in range((self.target if count is None else count) - len(ready)):
+                ready.append(self.executor.submit(self.create, kind, props))
+    
+    
+    def lease(self, kind: str, **props: Any) -> tuple[Any, ...]:
+        key = make_key(kind, props)
+        with self.lock:
+            ready = self.ready[key]
+            future = ready.popleft() if ready else None
+            self.leases[key] += 1
+            repeated = self.leases[key] > 1
+        
+        # released fixtures come back recycled, so only top up a key that is wanted again while
+        # none is ready; anything known to be wanted up front can be warmed explicitly instead
+        if future is None and repeated:
+            self.warm(kind, **props)
+        value = self.create(kind, props) if future is None else future.result()
+        return deepcopy(value)
+    
+    
+    def release(self, kind: str, props: dict[str, Any], value: tuple[Any, ...]) -> None:
+        with self.lock:
+            if not self.closed:
+                self.ready[make_key(kind, props)].append(self.executor.submit(self.recycle, kind, props, value))
+                return
+        self.discard(kind, value)
+    
+    
+    def recycle(self, kind: str, props: dict[str, Any], value: tuple[Any, ...]) -> tuple[Any, ...]:
+        uuid, original = value[0], value[1]
+        collection = COLLECTIONS[kind]
+        
+        try:
+            current = api.get(f'{collection}/{uuid}')
+            if current != original and isinstance(current, dict):
+                # fields the api can patch get patched back, anything else means a fresh fixture
+                changes = {
+                    key: lookup(original, path) for path, key in RESETTABLE[kind]
+                    if lookup(current, path) != lookup(original, path)
+                }
+                if changes:
+                    current = api.patch(f'{collection}/{uuid}', changes)
+            if kind == 'quest' and isinstance(current, dict) and current.get('checkboxes') != original['checkboxes']:
+                # checkboxes can't be patched as a field, but the whole list can be put back
+                checkboxes: list[dict[str, Any]] = original['checkboxes']
+                api.put(f'quests/{uuid}/checkboxes', {
+                    'names': [checkbox['name'] for checkbox in checkboxes],
+                    'checked': [checkbox.get('checked', False) for checkbox in checkboxes]
+                })
+                current = api.get(f'{collection}/{uuid}')
+            if current == original:
+                return value
+        except api.ApiException:
+            pass
+        
+        self.discard(kind, value)
+        return self.create(kind, props)
+    
+    
+    def discard(self, kind: str, value: tuple[Any, ...]) -> None:
+        try:
+            self.deleters[kind](value[0])
+        except api.ApiException as e:
+            # the test that leased it may have deleted it itself
+            if e.status_code != 404:
+                raise
+    
+    
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+            pending = [(key[0], future) for key, ready in self.ready.items() for future in ready]
+            self.ready.clear()
+        
+        wait([future for _, future in pending])
+        
+        failures: list[str] = []
+        
+        def discard(kind: str, value: tuple[Any, ...]) -> None:
+            try:
+                self.discard(kind, value)
+            except Exception as e:
+                failures.append(f'{COLLECTIONS[kind]}/{value[0]}: {e}')
+        
+        # executors refuse new work once the interpreter starts exiting, so use plain threads
+        cleanup = [
+            threading.Thread(target=discard, args=(kind, future.result()))
+            for kind, future in pending if future.exception() is None
+        ]
+        for thread in cleanup:
+            thread.start()
+        for thread in cleanup:
+            thread.join()
+        self.executor.shutdown()
+        if failures:
+            raise AssertionError('Discarding pooled fixtures failed:\n' + '\n'.join(failures))
+
+
+class SharedFixtures:
+    
+    # one fixture per kind and properties, made the first time a test asks for it and handed to
+    # every test after that; only for tests that leave it as it is on the server
+    def __init__(self) -> None:
+        from . import LalaTestCase
+        
+        self.lock = threading.Lock()
+        self.fixtures: dict[Key, Future[tuple[Any, ...]]] = {}
+        self.checker = LalaTestCase()
+        self.makers: dict[str, Callable[..., tuple[Any, ...]]] = {
+            'quest': self.checker.make_quest,
+            'daily': self.checker.make_daily,
+            'regular': self.checker.make_regular,
+        }
+    
+    
+    def get(self, kind: str, **props: Any) -> tuple[Any, ...]:
+        key = make_key(kind, props)
+        with self.lock:
+            future = self.fixtures.get(key)
+            owner = future is None
+            if future is None:
+                future = self.fixtures[key] = Future()
+        
+        # whoever asks first makes it, anyone asking meanwhile waits for them
+        if owner:
+            try:
+                future.set_result(self.makers[kind](**props))
+            except BaseException as e:
+                future.set_exception(e)
+                with self.lock:
+                    del self.fixtures[key]
+                raise
+        
+        # tests are free to change their copy of the data, just not the fixture itself
+        return deepcopy(future.result())
+    
+    
+    def close(self) -> None:
+        with self.lock:
+            made = [(key[0], future.result()) for key, future in self.fixtures.items() if future.done() and future.exception() is None]
+            self.fixtures.clear()
+        for kind, value in made:
+            try:
+                api.delete(f'{COLLECTIONS[kind]}/{value[0]}')
+            except api.ApiException as e:
+                if e.status_code != 404:
+                    raise
+
+
+_pool: FixturePool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> FixturePool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = FixturePool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+_shared: SharedFixtures | None = None
+_class_shared: dict[type, SharedFixtures] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared(cls: type | None = None) -> SharedFixtures:
+    # for the whole session, or just for one test class and cleaned up after it
+    global _shared
+    with _shared_lock:
+        if cls is not None:
+            if cls not in _class_shared:
+                _class_shared[cls] = SharedFixtures()
+                cls.addClassCleanup(release_class_shared, cls) # type: ignore
+            return _class_shared[cls]
+        if _shared is None:
+            _shared = SharedFixtures()
+            atexit.register(_shared.close)
+        return _shared
+
+
+def release_class_shared(cls: type) -> None:
+    with _shared_lock:
+        shared = _class_shared.pop(cls, None)
+    if shared is not None:
+        shared.close()
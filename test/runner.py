@@ -0,0 +1,260 @@
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+import unittest
+from argparse import ArgumentParser
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from time import perf_counter
+
+import api
+
+from typing import Any, Iterable, NamedTuple
+
+
+DURATIONS_FILE = '.test_durations.json'
+
+
+class Outcome(NamedTuple):
+    test_id: str
+    duration: float
+    errors: list[str]
+    failures: list[str]
+    skipped: list[str]
+    expected_failures: list[str]
+    unexpected_success: bool
+
+
+def iter_tests(suite: unittest.TestSuite | unittest.TestCase) -> Iterable[unittest.TestCase]:
+    if isinstance(suite, unittest.TestSuite):
+        for test in suite:
+            yield from iter_tests(test)
+    else:
+        yield suite
+
+
+def load_durations(path: str) -> dict[str, float]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_durations(path: str, durations: dict[str, float]) -> None:
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(durations, f, indent=4, sort_keys=True)
+    os.replace(tmp, path)
+
+
+class OutcomeResult(unittest.TestResult):
+    
+    # keeps each test's outcome apart, along with those of class and module fixtures, which unittest
+    # reports against stand-ins named after the fixture rather than any one test
+    def __init__(self) -> None:
+        super().__init__()
+        self.started: dict[str, float] = {}
+        self.outcomes: dict[str, Outcome] = {}
+    
+    
+    def outcome(self, test: unittest.TestCase) -> Outcome:
+        test_id = test.id()
+        if test_id not in self.outcomes:
+            self.outcomes[test_id] = Outcome(test_id, 0.0, [], [], [], [], False)
+        return self.outcomes[test_id]
+    
+    
+    def startTest(self, test: unittest.TestCase) -> None:
+        super().startTest(test)
+        self.started[test.id()] = perf_counter()
+        self.outcome(test)
+    
+    
+    def stopTest(self, test: unittest.TestCase) -> None:
+        super().stopTest(test)
+        outcome = self.outcome(test)
+        self.outcomes[outcome.test_id] = outcome._replace(duration=perf_counter() - self.started[outcome.test_id])
+    
+    
+    def addError(self, test: unittest.TestCase, err: Any) -> None:
+        super().addError(test, err)
+        self.outcome(test).errors.append(self.errors[-1][1])
+    
+    
+    def addFailure(self, test: unittest.TestCase, err: Any) -> None:
+        super().addFailure(test, err)
+        self.outcome(test).failures.append(self.failures[-1][1])
+    
+    
+    def addSkip(self, test: unittest.TestCase, reason: str) -> None:
+        super().addSkip(test, reason)
+        self.outcome(test).skipped.append(reason)
+    
+    
+    def addExpectedFailure(self, test: unittest.TestCase, err: Any) -> None:
+        super().addExpectedFailure(test, err)
+        self.outcome(test).expected_failures.append(self.expectedFailures[-1][1])
+    
+    
+    def addUnexpectedSuccess(self, test: unittest.TestCase) -> None:
+        super().addUnexpectedSuccess(test)
+        outcome = self.outcome(test)
+        self.outcomes[outcome.test_id] = outcome._replace(unexpected_success=True)
+
+
+def run_tests(test_ids: list[str]) -> list[Outcome]:
+    # a whole class runs in one suite, so its class fixtures are set up and cleaned up once
+    loader = unittest.defaultTestLoader
+    suite = unittest.TestSuite([loader.loadTestsFromName(test_id) for test_id in test_ids])
+    result = OutcomeResult()
+    suite.run(result)
+    return list(result.outcomes.values())
+
+
+def init_thread_worker() -> None:
+    # every worker thread gets its own connection pool and token state, but reports to the same sinks,
+    # hedges from the same latencies and records to (or replays from) the same cassette
+    from . import REPLAY_CREDENTIALS
+    cassette = api.client.cassette
+    credentials = REPLAY_CREDENTIALS if cassette is not None and not cassette.recording else None
+    api.set_client(api.Client(sinks=api.client.sinks, credentials=credentials, cassette=cassette, hedger=api.client.hedger))
+
+
+class MergedTestResult(unittest.TextTestResult):
+    
+    # outcomes from workers arrive already formatted
+    def _exc_info_to_string(self, err: Any, test: unittest.TestCase) -> str:
+        if isinstance(err, str):
+            return err
+        return ''.join(traceback.format_exception(*err))
+    
+    
+    def addOutcome(self, test: unittest.TestCase, outcome: Outcome) -> None:
+        self.startTest(test)
+        
+        if outcome.errors:
+            for err in outcome.errors:
+                self.addError(test, err) # type: ignore
+        elif outcome.failures:
+            for err in outcome.failures:
+                self.addFailure(test, err) # type: ignore
+        elif outcome.skipped:
+            self.addSkip(test, outcome.skipped[0])
+        elif outcome.expected_failures:
+            self.addExpectedFailure(test, outcome.expected_failures[0]) # type: ignore
+        elif outcome.unexpected_success:
+            self.addUnexpectedSuccess(test)
+        else:
+            self.addSuccess(test)
+        
+        self.stopTest(test)
+    
+    
+    def addFixtureOutcome(self, outcome: Outcome) -> None:
+        # a class or module fixture that failed or skipped outside of any test, which like unittest we
+        # report without counting it as a test run
+        fixture = FixtureOutcome(outcome.test_id)
+        for err in outcome.errors:
+            self.addError(fixture, err) # type: ignore
+        for reason in outcome.skipped:
+            self.addSkip(fixture, reason) # type: ignore
+
+
+class FixtureOutcome:
+    
+    # stands in for a class or module fixture when its outcome is reported, as unittest's own does
+    def __init__(self, description: str):
+        self.description = description
+    
+    
+    def id(self) -> str:
+        return self.description
+    
+    
+    def shortDescription(self) -> None:
+        return None
+    
+    
+    def __str__(self) -> str:
+        return self.description
+
+
+class ParallelSuite:
+    
+    def __init__(self, tests: Iterable[unittest.TestCase], workers: int, processes: bool = False, durations_file: str = DURATIONS_FILE):
+        self.tests = {test.id(): test for test in tests}
+        self.workers = workers
+        self.processes = processes
+        self.durations_file = durations_file
+    
+    
+    def countTestCases(self) -> int:
+        return len(self.tests)
+    
+    
+    def schedule(self, durations: dict[str, float]) -> list[list[str]]:
+        # classes are the unit of work, longest first; unknown tests count as the slowest known one
+        default = max(durations.values(), default=0.0)
+        classes: dict[str, list[str]] = {}
+        for test_id in self.tests:
+            classes.setdefault(test_id.rpartition('.')[0], []).append(test_id)
+        return sorted(classes.values(), key=lambda test_ids: sum(durations.get(test_id, default) for test_id in test_ids), reverse=True)
+    
+    
+    def executor(self) -> Executor:
+        if self.processes:
+            from . import share_run
+            share_run()
+            # forked children would share the parent's pooled sockets
+            return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return ThreadPoolExecutor(self.workers, thread_name_prefix='test-worker', initializer=init_thread_worker)
+    
+    
+    def __call__(self, result: MergedTestResult) -> MergedTestResult:
+        durations = load_durations(self.durations_file)
+        
+        with self.executor() as executor:
+            futures = [executor.submit(run_tests, test_ids) for test_ids in self.schedule(durations)]
+            for future in as_completed(futures):
+                for outcome in future.result():
+                    test = self.tests.get(outcome.test_id)
+                    if test is None:
+                        result.addFixtureOutcome(outcome)
+                        continue
+                    durations[outcome.test_id] = outcome.duration
+                    result.addOutcome(test, outcome)
+                
+                if result.shouldStop:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        
+        save_durations(self.durations_file, durations)
+        return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(prog='python -m test.runner', description='Run the test suite across a pool of workers.')
+    parser.add_argument('tests', nargs='*', help='test modules, classes or methods (default: discover everything in test/)')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 4, help='number of workers')
+    parser.add_argument('-p', '--processes', action='store_true', help='use worker processes instead of threads')
+    parser.add_argument('-d', '--durations', default=DURATIONS_FILE, help='file of recorded test durations')
+    parser.add_argument('-v', '--verbose', action='store_const', const=2, default=1, help='verbose output')
+    parser.add_argument('-f', '--failfast', action='store_true', help='stop on the first failure or error')
+    args = parser.parse_args(argv)
+    
+    loader = unittest.defaultTestLoader
+    if args.tests:
+        suite = loader.loadTestsFromNames(args.tests)
+    else:
+        suite = loader.discover('test', top_level_dir='.')
+    
+    runner = unittest.TextTestRunner(verbosity=args.verbose, failfast=args.failfast, resultclass=MergedTestResult) # type: ignore
+    result = runner.run(ParallelSuite(iter_tests(suite), args.workers, args.processes, args.durations)) # type: ignore
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
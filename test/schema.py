@@ -0,0 +1,252 @@
+from typing import Any, Callable, NamedTuple
+
+
+NUMBER = (int, float)
+
+# how types read in error messages
+LABELS: dict[Any, str] = {
+    str: 'a string',
+    int: 'an integer',
+    float: 'a float',
+    bool: 'a boolean',
+    NUMBER: 'a number',
+    list: 'a list',
+    dict: 'a dictionary',
+}
+
+
+class SchemaError(AssertionError):
+    
+    # raised from deep inside a response, picking up where it was on the way out
+    def __init__(self, problem: str):
+        super().__init__(problem)
+        self.problem = problem
+        self.path: list[str] = []
+        self.root = 'Response'
+    
+    
+    def at(self, segment: str) -> 'SchemaError':
+        self.path.insert(0, segment)
+        return self
+    
+    
+    def __str__(self) -> str:
+        if not self.path:
+            return f'{self.root} {self.problem}.'
+        return f'{self.root}: {".".join(self.path)} {self.problem}.'
+
+
+def describe(value: Any) -> str:
+    text = repr(value)
+    return f'{type(value).__name__} {text if len(text) <= 40 else text[:37] + "..."}'
+
+
+def bad_item(items: list[Any], item: Any, segment: str, label: str) -> SchemaError:
+    return SchemaError(f'is not {label} (got {describe(item)})').at(f'{segment}[{items.index(item)}]')
+
+
+class ListOf(NamedTuple):
+    item: Any
+
+
+class Optional(NamedTuple):
+    # a field the api may leave out, None in records when it does
+    kind: Any
+
+
+#
+# RECORDS
+#
+
+class Record:
+    
+    __slots__ = ()
+    
+    def values(self) -> tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+    
+    
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and self.values() == other.values() # type: ignore
+    
+    
+    __hash__ = None # type: ignore
+    
+    
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)})'
+    
+    
+    def to_dict(self) -> dict[str, Any]:
+        return {name: plain(getattr(self, name)) for name in self.__slots__}
+
+
+def plain(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [plain(item) for item in value] # type: ignore
+    return value
+
+
+def make_record(name: str, fields: tuple[str, ...]) -> type[Record]:
+    namespace: dict[str, Any] = {}
+    body = ''.join(f'\n    self.{field} = {field}' for field in fields) or '\n    pass'
+    exec(f'def __init__(self, {", ".join(fields)}):{body}', namespace)
+    return type(name, (Record,), {'__slots__': fields, '__match_args__': fields, '__init__': namespace['__init__']})
+
+
+#
+# SCHEMAS
+#
+
+class Schema:
+    
+    # fields map to a type, a tuple of types, another schema, or a ListOf or Optional one of those; the
+    # validators are generated as straight-line python the first time they're needed
+    def __init__(self, name: str, description: str, fields: dict[str, Any]):
+        self.name = name
+        self.description = description
+        self.fields = fields
+        self.record = make_record(name, tuple(fields))
+        self.validators: dict[bool, Callable[[Any], Any]] = {}
+    
+    
+    def validator(self, build: bool) -> Callable[[Any], Any]:
+        if build not in self.validators:
+            self.validators[build] = Compiler(build).compile(self)
+        return self.validators[build]
+    
+    
+    def check(self, data: Any, description: str | None = None) -> dict[str, Any]:
+        # hands the data back as is, for callers that want to keep working with dictionaries
+        try:
+            return self.validator(False)(data)
+        except SchemaError as e:
+            e.root = description or self.description
+            raise
+    
+    
+    def parse(self, data: Any, description: str | None = None) -> Any:
+        try:
+            return self.validator(True)(data)
+        except SchemaError as e:
+            e.root = description or self.description
+            raise
+
+
+MISSING = object()
+
+
+class Compiler:
+    
+    def __init__(self, build: bool):
+        self.build = build
+        self.namespace: dict[str, Any] = {'SchemaError': SchemaError, 'describe': describe, 'bad_item': bad_item, 'MISSING': MISSING}
+    
+    
+    def constant(self, value: Any) -> str:
+        name = f'c{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+    
+    
+    def type_test(self, var: str, kind: Any) -> str:
+        # exact types, so that booleans don't pass for numbers
+        if isinstance(kind, tuple):
+            return f'type({var}) not in {self.constant(frozenset(kind))}' # type: ignore
+        return f'type({var}) is not {self.constant(kind)}'
+    
+    
+    def check_value(self, var: str, kind: Any, segment: str, indent: str) -> list[str]:
+        if isinstance(kind, Optional):
+            lines = self.check_value(var, kind.kind, segment, indent + '    ')
+            if self.build:
+                return [f'{indent}if {var} is MISSING:', f'{indent}    {var} = None', f'{indent}else:', *lines]
+            return [f'{indent}if {var} is not MISSING:', *lines]
+        
+        if isinstance(kind, Schema):
+            validator = self.constant(kind.validator(self.build))
+            return [
+                f'{indent}try:',
+                f'{indent}    {var} = {validator}({var})',
+                f'{indent}except SchemaError as e:',
+                f'{indent}    raise e.at({segment!r}) from None',
+            ]
+        
+        if isinstance(kind, ListOf):
+            lines = [
+                f'{indent}if type({var}) is not list:',
+                f'{indent}    raise SchemaError(f"is not a list (got {{describe({var})}})").at({segment!r})',
+            ]
+            if isinstance(kind.item, Schema):
+                validator = self.constant(kind.item.validator(self.build))
+                call = f'items.append({validator}(item))' if self.build else f'{validator}(item)'
+                lines += [
+                    f'{indent}items = []',
+                    f'{indent}for i, item in enumerate({var}):',
+                    f'{indent}    try:',
+                    f'{indent}        {call}',
+                    f'{indent}    except SchemaError as e:',
+                    f'{indent}        raise e.at(f"{segment}[{{i}}]") from None',
+                ]
+                if self.build:
+                    lines.append(f'{indent}{var} = items')
+            else:
+                lines += [
+                    f'{indent}for item in {var}:',
+                    f'{indent}    if {self.type_test("item", kind.item)}:',
+                    f'{indent}        raise bad_item({var}, item, {segment!r}, {LABELS[kind.item]!r})',
+                ]
+            return lines
+        
+        return [
+            f'{indent}if {self.type_test(var, kind)}:',
+            f'{indent}    raise SchemaError(f"is not {LABELS[kind]} (got {{describe({var})}})").at({segment!r})',
+        ]
+    
+    
+    def compile(self, schema: Schema) -> Callable[[Any], Any]:
+        names = [f'v{i}' for i in range(len(schema.fields))]
+        lines = [
+            'def validate(data):',
+            '    if type(data) is not dict:',
+            '        raise SchemaError(f"is not a dictionary (got {describe(data)})")',
+            '    try:',
+            *(
+                f'        {var} = data.get({field!r}, MISSING)' if isinstance(kind, Optional) else f'        {var} = data[{field!r}]'
+                for var, (field, kind) in zip(names, schema.fields.items())
+            ),
+            '    except KeyError as e:',
+            '        raise SchemaError(f"is missing {e.args[0]!r}") from None',
+        ]
+        for var, (field, kind) in zip(names, schema.fields.items()):
+            lines += self.check_value(var, kind, field, '    ')
+        lines.append(f'    return {self.constant(schema.record)}({", ".join(names)})' if self.build else '    return data')
+        
+        exec('\n'.join(lines), self.namespace)
+        return self.namespace['validate']
+
+
+CHECKBOX = Schema('Checkbox', 'Checkbox', {'name': str, 'checked': Optional(bool)})
+QUEST = Schema('Quest', 'Quest', {
+    'name': str,
+    'description': str,
+    'deadline': NUMBER,
+    'difficulty': int,
+    'checkboxes': ListOf(CHECKBOX),
+    'completed': Optional(bool)
+})
+DAILY = Schema('Daily', 'Daily', {'name': str, 'description': str})
+REGULAR_QUEST = Schema('RegularQuest', 'Quest of regular', {'name': str, 'description': str, 'difficulty': int})
+REGULAR = Schema('Regular', 'Regular', {
+    'quest': REGULAR_QUEST,
+    'min_cooldown': NUMBER,
+    'max_cooldown': NUMBER,
+    'times_completed': int
+})
+PLAYER = Schema('Player', 'Player', {'last_seen': float})
+
+CREATED_QUEST = Schema('CreatedQuest', 'Quest creation response', {'uuid': str, 'quest': QUEST, 'prereqs': ListOf(str)})
+CREATED_DAILY = Schema('CreatedDaily', 'Daily creation response', {'uuid': str, 'daily': DAILY})
+CREATED_REGULAR = Schema('CreatedRegular', 'Regular creation response', {'uuid': str, 'regular': REGULAR})
@@ -0,0 +1,124 @@
+import sys
+import threading
+from time import time
+
+import api
+from . import RUN
+from .util import RUN_TAG_PATTERN
+
+from typing import Any, Container, NamedTuple, cast
+
+
+# regulars first, in case deleting one takes its quest with it
+COLLECTIONS = ('regulars', 'dailies', 'quests')
+
+# how long another run's fixtures are left alone, since that run may still be going
+MAX_AGE = 3600
+WORKERS = 8
+
+
+class Orphan(NamedTuple):
+    path: str
+    run: str
+    started: int
+
+
+def description_of(collection: str, item: Any) -> str:
+    if not isinstance(item, dict):
+        return ''
+    item = cast(dict[str, Any], item)
+    fields = item.get('quest', item) if collection == 'regulars' else item
+    description = cast(dict[str, Any], fields).get('description') if isinstance(fields, dict) else None
+    return description if isinstance(description, str) else ''
+
+
+def find_orphans(runs: Container[str] | None = None, max_age: float = MAX_AGE, now: float | None = None) -> list[Orphan]:
+    # one listing pass per collection; with runs, everything those runs tagged, otherwise
+    # everything other runs tagged more than max_age after they started
+    now = time() if now is None else now
+    orphans: list[Orphan] = []
+    for collection in COLLECTIONS:
+        for uuid, item in api.stream_items(collection):
+            match = RUN_TAG_PATTERN.search(description_of(collection, item))
+            if match is None:
+                continue
+            started, run = int(match[1]), match[2]
+            if (run in runs) if runs is not None else (run != RUN and now - started > max_age):
+                orphans.append(Orphan(f'{collection}/{uuid}', run, started))
+    return orphans
+
+
+def delete_orphans(orphans: list[Orphan], workers: int = WORKERS) -> list[str]:
+    # plain threads taking turns on one iterator, since executors refuse new work once the
+    # interpreter is exiting and the end of session sweep runs from atexit
+    client = api.current_client()
+    pending = iter(orphans)
+    lock = threading.Lock()
+    failures: list[str] = []
+    
+    def work() -> None:
+        while True:
+            with lock:
+                orphan = next(pending, None)
+            if orphan is None:
+                return
+            try:
+                client.delete(orphan.path)
+            except api.ApiException as e:
+                # gone already, or went with the regular it belonged to
+                if e.status_code != 404:
+                    with lock:
+                        failures.append(f'Failed to delete "{orphan.path}" left by run {orphan.run}: {e}')
+    
+    threads = [threading.Thread(target=work, name=f'sweep-{i}') for i in range(min(workers, len(orphans)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return failures
+
+
+def sweep(runs: Container[str] | None = None, max_age: float = MAX_AGE, workers: int = WORKERS) -> tuple[int, list[str]]:
+    orphans = find_orphans(runs, max_age)
+    return len(orphans), delete_orphans(orphans, workers)
+
+
+def sweep_session(when: str) -> None:
+    # before the session, what crashed runs left behind; after it, whatever this run didn't clean up
+    try:
+        count, failures = sweep({RUN} if when == 'end' else None)
+    except api.ApiException as e:
+        print(f'Sweep at session {when} failed: {e}', file=sys.stderr)
+        return
+    if count:
+        print(f'Swept {count - len(failures)} of {count} orphaned fixtures at session {when}.', file=sys.stderr)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from argparse import ArgumentParser
+    
+    parser = ArgumentParser(prog='python -m test.sweep', description='Delete fixtures that test runs left behind.')
+    parser.add_argument('runs', nargs='*', help='runs to sweep whatever their age (default: every other run older than --max-age)')
+    parser.add_argument('--max-age', type=float, default=MAX_AGE, help='seconds after it started that a run counts as over')
+    parser.add_argument('-j', '--workers', type=int, default=WORKERS, help='deletions in flight at once')
+    parser.add_argument('-n', '--dry-run', action='store_true', help='list the orphans without deleting them')
+    args = parser.parse_args(argv)
+    
+    orphans = find_orphans(set(args.runs) or None, args.max_age)
+    now = time()
+    for orphan in orphans:
+        print(f'{orphan.path}  run {orphan.run}, {(now - orphan.started) / 3600:.1f}h old')
+    if args.dry_run:
+        return 0
+    
+    failures = delete_orphans(orphans, args.workers)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    print(f'swept {len(orphans) - len(failures)} of {len(orphans)}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import threading
+
+import api
+
+from typing import NamedTuple
+from unittest import TestCase
+
+
+WORKERS = 8
+
+
+class Deletion(NamedTuple):
+    path: str
+    message: str
+    # the test that made the fixture, which failures are reported under
+    test: TestCase
+
+
+class TeardownQueue:
+    
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.deletions: dict[str, Deletion] = {}
+    
+    
+    def add(self, deletion: Deletion) -> None:
+        with self.lock:
+            self.deletions[deletion.path] = deletion
+    
+    
+    def take(self, path: str) -> Deletion | None:
+        with self.lock:
+            return self.deletions.pop(path, None)
+    
+    
+    def drain(self) -> list[Deletion]:
+        with self.lock:
+            deletions = list(self.deletions.values())
+            self.deletions.clear()
+        return deletions
+
+
+def verify_deletion(deletion: Deletion) -> tuple[Deletion, str] | None:
+    try:
+        api.delete(deletion.path)
+    except api.ApiException as e:
+        return deletion, f'Failed to delete "{deletion.path}": {e}'
+    
+    try:
+        api.get(deletion.path)
+    except api.ApiException as e:
+        if e.status_code == 404:
+            return None
+        return deletion, f'{deletion.message} ({e})'
+    return deletion, deletion.message
+
+
+def run_deletions(deletions: list[Deletion]) -> list[tuple[Deletion, str]]:
+    if not deletions:
+        return []
+    
+    # importing concurrent.futures up front would slow down importing the test package
+    from concurrent.futures import ThreadPoolExecutor
+    from contextvars import copy_context
+    with ThreadPoolExecutor(min(WORKERS, len(deletions)), thread_name_prefix='teardown') as executor:
+        # each check goes through the same client as the test that queued it
+        futures = [executor.submit(copy_context().run, verify_deletion, deletion) for deletion in deletions]
+        return [failure for future in futures if (failure := future.result()) is not None]
+
+
+def report_failures(failures: list[tuple[Deletion, str]]) -> None:
+    # the owning tests' outcomes are final by now, so failures go on whatever runs the deletions
+    # (the class cleanup, which unittest reports as the class's tearDownClass), naming their tests
+    if failures:
+        raise AssertionError('Deferred teardown failed:\n' + '\n'.join(f'{deletion.test.id()}: {failure}' for deletion, failure in failures))
+
+
+_queues: dict[type, TeardownQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def flush(cls: type) -> None:
+    with _queues_lock:
+        queue = _queues.pop(cls, None)
+    if queue is not None:
+        report_failures(run_deletions(queue.drain()))
+
+
+def defer(cls: type, deletion: Deletion) -> None:
+    with _queues_lock:
+        queue = _queues.get(cls)
+        if queue is None:
+            queue = _queues[cls] = TeardownQueue()
+            # the queue runs once the class is done, after tearDownClass
+            cls.addClassCleanup(flush, cls) # type: ignore
+    queue.add(deletion)
+
+
+def settle(cls: type, path: str) -> None:
+    # something wants to touch a fixture we haven't deleted yet, so delete it now
+    with _queues_lock:
+        queue = _queues.get(cls)
+    deletion = queue.take(path) if queue is not None else None
+    if deletion is not None:
+        report_failures(run_deletions([deletion]))
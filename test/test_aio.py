@@ -0,0 +1,45 @@
+import asyncio
+
+import api
+from api.aio import ThreadedAsyncClient
+from . import LalaTestCase, schema
+from .fake_server import FakeServer
+
+
+class AsyncClientTestCase(LalaTestCase):
+    
+    def test_concurrency_bound(self):
+        # the server turns away anything past two requests at once, so going over the bound fails a call
+        with FakeServer(capacity=2) as server:
+            server.fault('player', latency=0.05)
+            client = ThreadedAsyncClient(server.client(), max_concurrency=2)
+            
+            async def burst() -> list[api.DataType]:
+                return await asyncio.gather(*(client.get('player') for _ in range(6)))
+            
+            try:
+                for player in asyncio.run(burst()):
+                    schema.PLAYER.check(player)
+            finally:
+                client.close()
+    
+    
+    def test_cancelled_call(self):
+        with FakeServer(capacity=1) as server:
+            server.fault('player', latency=0.2)
+            client = ThreadedAsyncClient(server.client(), max_concurrency=1)
+            
+            async def cancel_then_call() -> api.DataType:
+                task = asyncio.ensure_future(client.get('player'))
+                await asyncio.sleep(0.05)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                # the cancelled call still finishes on its thread, which then takes the next one
+                return await asyncio.wait_for(client.get('player'), 2)
+            
+            try:
+                schema.PLAYER.check(asyncio.run(cancel_then_call()))
+                self.assertEqual(len(client.executor._threads), 1, 'Cancelling a call left a worker behind.') # type: ignore
+            finally:
+                client.close()
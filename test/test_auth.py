@@ -0,0 +1,42 @@
+import os
+import tempfile
+import threading
+
+import api
+from . import LalaTestCase, fake_server
+
+
+class AuthTestCase(LalaTestCase):
+    
+    def test_shared_token_file_refreshes_once(self):
+        if fake_server is None:
+            self.skipTest('Needs the fake server to hand out a fresh identity.')
+        
+        # a token the server doesn't know, and a refresh token it only takes once
+        credentials = fake_server.add_identity()
+        directory = tempfile.TemporaryDirectory(prefix='lala-auth-')
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, '.token')
+        with open(path, 'w') as f:
+            f.write(f'{credentials.client_id}\n{credentials.client_secret}\nexpired\n{credentials.refresh_token}\n')
+        
+        # separate clients on the same file, like the parallel runner's workers
+        clients = [api.Client(token_file=path) for _ in range(8)]
+        barrier = threading.Barrier(len(clients))
+        errors: list[Exception] = []
+        
+        def call(client: api.Client) -> None:
+            barrier.wait()
+            try:
+                client.get('player')
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=call, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [], 'Clients sharing a token file spent the same refresh token.')
+        self.assertEqual({client.token for client in clients}, {api.Credentials.from_file(path).token}, 'Clients didn\'t all end up with the refreshed token.')
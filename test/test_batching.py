@@ -0,0 +1,44 @@
+import threading
+
+import api
+from api.batching import WORKERS, Batch
+from . import LalaTestCase
+
+from typing import Any
+
+
+class NestingClient:
+    
+    # answers every call itself; a call under 'outer/' batches two more calls first, once every
+    # worker has one, so the inner batches find no worker free
+    def __init__(self) -> None:
+        self.barrier = threading.Barrier(WORKERS, timeout=5)
+    
+    
+    def call(self, method: str, url: str, data: dict[str, Any] | None = None) -> api.DataType:
+        if not url.startswith('outer/'):
+            return {'url': url}
+        if threading.current_thread().name.startswith('api-batch'):
+            self.barrier.wait()
+        with Batch(self) as batch: # type: ignore
+            futures = [batch.get(f'inner/{url}/{i}') for i in range(2)]
+        return {'url': url, 'inner': [future.result()['url'] for future in futures]} # type: ignore
+
+
+class BatchingTestCase(LalaTestCase):
+    
+    def test_nested_batches(self):
+        # the caller runs the first call itself and the workers take the rest
+        results: list[Any] = []
+        
+        def dispatch() -> None:
+            with Batch(NestingClient()) as batch: # type: ignore
+                futures = [batch.get(f'outer/{i}') for i in range(WORKERS + 1)]
+            results.extend(future.result() for future in futures)
+        
+        thread = threading.Thread(target=dispatch, daemon=True)
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive(), 'Nested batches deadlocked on the shared workers.')
+        self.assertEqual(len(results), WORKERS + 1)
+        self.assertEqual(results[3], {'url': 'outer/3', 'inner': ['inner/outer/3/0', 'inner/outer/3/1']})
@@ -0,0 +1,59 @@
+from uuid import uuid4
+
+from api.cache import ResponseCache, is_affected
+from . import LalaTestCase
+from .fake_server import FakeServer
+from .util import random_str
+
+
+class CacheTestCase(LalaTestCase):
+    
+    def test_writes_affect_what_is_under_them(self):
+        uuid = str(uuid4())
+        self.assertTrue(is_affected(f'quests/{uuid}', 'PATCH', f'quests/{uuid}'))
+        self.assertTrue(is_affected(f'quests/{uuid}/checkboxes/2', 'DELETE', f'quests/{uuid}/checkboxes/0'), 'Checkbox indices shift after a delete.')
+        self.assertTrue(is_affected(f'quests/{uuid}/checkboxes', 'PATCH', f'quests/{uuid}/checkboxes/0'))
+        self.assertTrue(is_affected(f'quests/{uuid}', 'POST', f'quests/{uuid}/complete'))
+        self.assertFalse(is_affected(f'quests/{uuid4()}', 'PATCH', f'quests/{uuid}'))
+    
+    
+    def test_writes_affect_lists(self):
+        uuid = str(uuid4())
+        self.assertTrue(is_affected('quests', 'POST', 'quests'))
+        self.assertTrue(is_affected('quests/active', 'PATCH', f'quests/{uuid}'))
+        # dailies and regulars are quests as well, as far as the quest lists go
+        self.assertTrue(is_affected('quests/daily', 'POST', 'dailies'))
+        self.assertTrue(is_affected('quests', 'DELETE', f'regulars/{uuid}'))
+        self.assertFalse(is_affected('dailies', 'PATCH', f'quests/{uuid}'))
+    
+    
+    def test_creates_and_deletes_affect_neighbours(self):
+        uuid, neighbour = str(uuid4()), str(uuid4())
+        self.assertTrue(is_affected(f'quests/{neighbour}/sequels', 'POST', 'quests'))
+        self.assertTrue(is_affected(f'quests/{neighbour}/prereqs', 'DELETE', f'quests/{uuid}'))
+        self.assertFalse(is_affected(f'quests/{neighbour}/prereqs', 'PATCH', f'quests/{uuid}'))
+    
+    
+    def test_writes_affect_player(self):
+        self.assertTrue(is_affected('player', 'POST', f'quests/{uuid4()}/complete'))
+        self.assertTrue(is_affected('player', 'PATCH', f'dailies/{uuid4()}'))
+    
+    
+    def test_cached_client(self):
+        with FakeServer() as server:
+            client = server.client(cache=ResponseCache(ttl=60))
+            before = client.get('quests')
+            requests = server.requests
+            
+            self.assertEqual(client.get('quests'), before, 'Cached list doesn\'t match the first read.')
+            self.assertEqual(server.requests, requests, 'Fresh cache entry went back to the server.')
+            
+            response = client.post('quests', {
+                'name': random_str(),
+                'description': random_str(),
+                'deadline': 9999999999.0,
+                'difficulty': 1,
+                'checkboxes': [],
+                'prereqs': [],
+            })
+            self.assertIn(response['uuid'], client.get('quests'), 'Quest list wasn\'t invalidated by a create.') # type: ignore
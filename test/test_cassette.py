@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+from api.cassette import Cassette, CassetteMiss
+from . import LalaTestCase
+
+
+class CassetteTestCase(LalaTestCase):
+    
+    def recording(self) -> str:
+        directory = tempfile.TemporaryDirectory(prefix='lala-cassette-')
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'test.cas')
+        
+        cassette = Cassette.record(path)
+        cassette.add('POST', 'http://lala/api/quests', b'{"name": "a"}', 200, 'OK', {}, b'{"ok": true, "data": "a"}')
+        cassette.close()
+        return path
+    
+    
+    def test_strict_replay(self):
+        cassette = Cassette.replay(self.recording())
+        self.addCleanup(cassette.close)
+        self.assertEqual(cassette.find('POST', 'http://lala/api/quests', b'{"name": "a"}').body, b'{"ok": true, "data": "a"}')
+        with self.assertRaises(CassetteMiss, msg='Drifted body was replayed without loose matching.'):
+            cassette.find('POST', 'http://lala/api/quests', b'{"name": "b"}')
+    
+    
+    def test_loose_replay(self):
+        cassette = Cassette.replay(self.recording(), loose=True)
+        self.addCleanup(cassette.close)
+        with self.assertWarns(UserWarning):
+            exchange = cassette.find('POST', 'http://lala/api/quests', b'{"name": "b"}')
+        self.assertEqual(exchange.body, b'{"ok": true, "data": "a"}')
+        self.assertEqual(cassette.loose_hits, 1)
+        
+        with self.assertRaises(CassetteMiss, msg='Another route matched loosely.'):
+            cassette.find('POST', 'http://lala/api/dailies', b'{"name": "b"}')
@@ -1,8 +1,6 @@
-import random
-
 import api
 from . import LalaTestCase
-from .util import random_bool, random_str
+from .util import generator, random_bool, random_str
 
 
 class CheckboxesTestCase(LalaTestCase):
@@ -13,13 +11,15 @@ class CheckboxesTestCase(LalaTestCase):
         expected = [{'name': i, 'checked': False} for i in checkboxes]
         
         with self.temp_quest(checkboxes=checkboxes) as (uuid, _, _):
-            response = api.get(f'quests/{uuid}/checkboxes')
-            self.assertEqual(response, expected,
+            with api.batch() as batch:
+                checkbox_list = batch.get(f'quests/{uuid}/checkboxes')
+                checkbox_items = [batch.get(f'quests/{uuid}/checkboxes/{i}') for i in range(N)]
+            
+            self.assertEqual(checkbox_list.result(), expected,
                              'Checkbox list has incorrect data.')
             
             for i in range(N):
-                response = api.get(f'quests/{uuid}/checkboxes/{i}')
-                self.assertEqual(response, expected[i],
+                self.assertEqual(checkbox_items[i].result(), expected[i],
                                  'Checkbox has incorrect data.')
     
     
@@ -30,7 +30,7 @@ class CheckboxesTestCase(LalaTestCase):
         data = {'names': names, 'checked': checked}
         expected = [{'name': names[i], 'checked': checked[i]} for i in range(N)]
         
-        with self.temp_quest() as (uuid, _, _):
+        with self.shared_quest(mutate=True) as (uuid, _, _):
             response = api.put(f'quests/{uuid}/checkboxes', data)
             self.assertEqual(response, expected,
                             'Checkbox list put has incorrect data.')
@@ -43,7 +43,7 @@ class CheckboxesTestCase(LalaTestCase):
     def test_checkbox_patch(self):
         N = 10
         checkboxes = [random_str() for _ in range(N)]
-        index = random.randrange(0, N)
+        index = generator.get().randrange(0, N)
         data = {'name': random_str(), 'checked': True}
         
         with self.temp_quest(checkboxes=checkboxes) as (uuid, _, _):
@@ -64,7 +64,7 @@ class CheckboxesTestCase(LalaTestCase):
         
         with self.temp_quest(checkboxes=checkboxes) as (uuid, _, _):
             for i in range(M):
-                index = random.randrange(0, N - i)
+                index = generator.get().randrange(0, N - i)
                 del expected[index]
                 response = api.delete(f'quests/{uuid}/checkboxes/{index}')
                 self.assertEqual(response, expected,
@@ -1,5 +1,6 @@
 import api
-from . import LalaTestCase
+from . import LalaTestCase, schema
+from .fake_server import FakeServer
 from .util import random_str
 
 from typing import Any
@@ -7,6 +8,12 @@ from typing import Any
 
 class DailiesTestCase(LalaTestCase):
     
+    @classmethod
+    def setUpClass(cls):
+        # for the patch test
+        cls.warm_pool('daily', 1)
+    
+    
     def test_multiple_deletion(self):
         with self.temp_daily() as (uuid, _):
             pass
@@ -29,7 +36,7 @@ class DailiesTestCase(LalaTestCase):
     
     
     def test_patch_daily(self):
-        with self.temp_daily() as (uuid, daily):
+        with self.shared_daily(mutate=True) as (uuid, daily):
             daily['name'] = random_str()
             
             response = api.patch('dailies/' + uuid, {
@@ -39,3 +46,22 @@ class DailiesTestCase(LalaTestCase):
                                 'Daily patch response is not a dictionary.')
             
             self.assertEqual(response, daily, 'Patched daily has incorrect data.')
+    
+    
+    def test_fake_daily_quests(self):
+        # the quest list tests check daily quests against the fake as well, so it has to list some
+        with FakeServer() as server:
+            client = server.client()
+            uuid = schema.CREATED_DAILY.parse(client.post('dailies', {'name': 'read', 'description': random_str()})).uuid
+            
+            daily_quests = self.cast(client.get('quests/daily'), dict[str, Any], 'Daily quest list is not a dictionary.')
+            self.assertEqual([quest['name'] for quest in daily_quests.values()], ['read'], 'Daily has no quest for today.')
+            quests = self.cast(client.get('quests'), dict[str, Any], 'Quest list is not a dictionary.')
+            self.assertLessEqual(daily_quests.keys(), quests.keys(), 'Daily quest not in quest list.')
+            
+            client.patch(f'dailies/{uuid}', {'name': 'write'})
+            daily_quests = self.cast(client.get('quests/daily'), dict[str, Any], 'Daily quest list is not a dictionary.')
+            self.assertEqual([quest['name'] for quest in daily_quests.values()], ['write'], 'Daily quest wasn\'t renamed with its daily.')
+            
+            client.delete(f'dailies/{uuid}')
+            self.assertEqual(client.get('quests/daily'), {}, 'Daily quest outlived its daily.')
@@ -0,0 +1,95 @@
+import threading
+from time import sleep
+
+from api.hedge import Hedger
+from . import LalaTestCase, schema
+from .fake_server import FakeServer
+
+from typing import Any, Callable
+
+
+class Response:
+    
+    # stands in for a requests.Response, which the hedger only ever closes
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = threading.Event()
+    
+    
+    def close(self) -> None:
+        self.closed.set()
+
+
+def primed(latency: float = 0.01, route: str = 'player', **options: Any) -> Hedger:
+    hedger = Hedger(**options)
+    for _ in range(hedger.min_samples):
+        hedger.observe(route, latency)
+    return hedger
+
+
+def sender(*steps: tuple[float, Response | Exception]) -> Callable[[], Any]:
+    # each call takes the next step, sleeping and then answering or failing
+    pending = iter(steps)
+    lock = threading.Lock()
+    
+    def send() -> Any:
+        with lock:
+            seconds, outcome = next(pending)
+        sleep(seconds)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    return send
+
+
+class HedgeTestCase(LalaTestCase):
+    
+    def test_delay(self):
+        hedger = Hedger(quantile=0.95, min_samples=20)
+        for i in range(19):
+            hedger.observe('player', i / 100)
+        self.assertIsNone(hedger.delay('player'), 'Hedged before there were enough samples.')
+        
+        hedger.observe('player', 0.19)
+        self.assertEqual(hedger.delay('player'), 0.18, 'Delay isn\'t the p95 of the samples.')
+        self.assertIsNone(hedger.delay('quests'), 'Samples leaked into another route.')
+    
+    
+    def test_fast_primary(self):
+        hedger = primed(0.2)
+        primary = Response('primary')
+        self.assertIs(hedger.run('player', sender((0.0, primary))), primary)
+        self.assertEqual(hedger.hedges, 0, 'Hedged a call that answered within the delay.')
+    
+    
+    def test_hedge_wins(self):
+        hedger = primed()
+        primary, hedge = Response('primary'), Response('hedge')
+        self.assertIs(hedger.run('player', sender((0.3, primary), (0.0, hedge))), hedge)
+        self.assertEqual((hedger.hedges, hedger.wins), (1, 1))
+        
+        # the slower copy is closed once it comes back, so its connection goes back to the pool
+        self.assertTrue(primary.closed.wait(2), 'Losing response wasn\'t closed.')
+        self.assertFalse(hedge.closed.is_set(), 'Winning response was closed.')
+    
+    
+    def test_failure_loses(self):
+        hedger = primed()
+        primary = Response('primary')
+        self.assertIs(hedger.run('player', sender((0.1, primary), (0.0, ConnectionError()))), primary, 'A failed hedge won over a response.')
+        self.assertEqual((hedger.hedges, hedger.wins), (1, 0))
+        self.assertFalse(primary.closed.is_set())
+    
+    
+    def test_hedged_client(self):
+        with FakeServer() as server:
+            hedger = primed(0.01, routes={'player'})
+            client = server.client(hedger=hedger)
+            server.fault('GET player', latency=0.2)
+            
+            schema.PLAYER.check(client.get('player'))
+            self.assertEqual(hedger.hedges, 1, 'Slow call wasn\'t hedged.')
+            
+            client.get('quests')
+            self.assertEqual(hedger.hedges, 1, 'Call to a route outside routes was hedged.')
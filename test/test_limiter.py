@@ -0,0 +1,102 @@
+from email.utils import formatdate
+from time import monotonic, time
+
+import requests
+
+from api import DeadlineExceeded
+from api.limiter import MAX_RETRY_AFTER, AdaptiveLimiter, retry_after
+from . import LalaTestCase
+from .fake_server import FakeServer
+
+
+class LimiterTestCase(LalaTestCase):
+    
+    def test_additive_increase(self):
+        limiter = AdaptiveLimiter(limit=4)
+        limiter.acquire()
+        limiter.release(0.1)
+        self.assertAlmostEqual(limiter.limit, 4.25, msg='Limit didn\'t grow by one over the limit.')
+        
+        limiter = AdaptiveLimiter(limit=8, max_limit=8)
+        limiter.acquire()
+        limiter.release(0.1)
+        self.assertEqual(limiter.limit, 8, 'Limit grew past max_limit.')
+    
+    
+    def test_multiplicative_decrease(self):
+        limiter = AdaptiveLimiter(limit=8)
+        for _ in range(2):
+            limiter.acquire()
+        limiter.release(0.1, overloaded=True)
+        self.assertEqual(limiter.limit, 4, 'Overload didn\'t halve the limit.')
+        
+        # the second response saw the same congestion, so it doesn't count again
+        limiter.release(0.1, overloaded=True)
+        self.assertEqual(limiter.limit, 4, 'Limit was decreased twice in one round trip.')
+        
+        limiter = AdaptiveLimiter(limit=1.5, min_limit=1)
+        limiter.acquire()
+        limiter.release(0.1, overloaded=True)
+        self.assertEqual(limiter.limit, 1, 'Limit fell below min_limit.')
+    
+    
+    def test_latency_decrease(self):
+        limiter = AdaptiveLimiter(limit=8, tolerance=2.0)
+        limiter.acquire()
+        limiter.release(0.01)
+        limiter.acquire()
+        limiter.release(0.05)
+        self.assertAlmostEqual(limiter.limit, (8 + 1 / 8) / 2, msg='Latency well over the baseline didn\'t decrease the limit.')
+    
+    
+    def test_delay(self):
+        limiter = AdaptiveLimiter()
+        limiter.acquire()
+        limiter.release(0.01, delay=0.2)
+        
+        start = monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(monotonic() - start, 0.15, 'Permit was handed out before Retry-After passed.')
+    
+    
+    def test_retry_after(self):
+        self.assertEqual(retry_after({'Retry-After': '3'}), 3.0)
+        self.assertEqual(retry_after({'Retry-After': '1.5'}), 1.5)
+        self.assertEqual(retry_after({'Retry-After': '-1'}), 0.0)
+        self.assertIsNone(retry_after({}))
+        self.assertIsNone(retry_after({'Retry-After': 'soon'}))
+        
+        self.assertAlmostEqual(retry_after({'Retry-After': formatdate(time() + 30, usegmt=True)}), 30, delta=2) # type: ignore
+        self.assertEqual(retry_after({'Retry-After': formatdate(time() - 30, usegmt=True)}), 0.0, 'Date in the past isn\'t clamped to no delay.')
+        
+        self.assertEqual(retry_after({'Retry-After': '86400'}), MAX_RETRY_AFTER, 'Retry-After isn\'t capped.')
+        self.assertEqual(retry_after({'Retry-After': formatdate(time() + 86400, usegmt=True)}), MAX_RETRY_AFTER, 'Retry-After date isn\'t capped.')
+    
+    
+    def test_failures(self):
+        # only the server timing out counts as overload
+        limiter = AdaptiveLimiter(limit=8)
+        with self.assertRaises(requests.ReadTimeout):
+            with limiter.permit():
+                raise requests.ReadTimeout()
+        self.assertEqual(limiter.limit, 4, 'Timeout didn\'t halve the limit.')
+        
+        limiter = AdaptiveLimiter(limit=8)
+        for error in (DeadlineExceeded('Out of time.'), ValueError('Bad request body.'), KeyboardInterrupt()):
+            with self.assertRaises(type(error)):
+                with limiter.permit():
+                    raise error
+        self.assertEqual(limiter.limit, 8, 'Failure on the client shrank the limit.')
+        self.assertEqual(limiter.in_flight, 0, 'Permit wasn\'t released after a failure.')
+    
+    
+    def test_overloaded_client(self):
+        with FakeServer() as server:
+            server.fault('GET player', error_rate=1.0, error_status=429, retry_after=0)
+            limiter = AdaptiveLimiter(limit=8)
+            client = server.client(limiter=limiter)
+            
+            with self.assertApiError(429, 'Fault wasn\'t passed on.'):
+                client.get('player')
+            self.assertEqual(limiter.limit, 4, '429 didn\'t halve the limit.')
+            self.assertEqual(limiter.in_flight, 0, 'Permit wasn\'t released.')
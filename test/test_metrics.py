@@ -0,0 +1,69 @@
+from uuid import uuid4
+
+from api.metrics import CallRecord, PrometheusSink, route_template
+from . import LalaTestCase
+from .fake_server import FakeServer
+
+
+def call_record(total: float, method: str = 'GET', url: str = 'player', status: int | None = 200, test: str | None = None) -> CallRecord:
+    return CallRecord(0.0, test, method, route_template(url), url, status, None, 10, 100, None, None, total / 2, total, 1, 0, 0)
+
+
+class MetricsTestCase(LalaTestCase):
+    
+    def test_route_template(self):
+        uuid = str(uuid4())
+        self.assertEqual(route_template('player'), 'player')
+        self.assertEqual(route_template(f'quests/{uuid}'), 'quests/{uuid}')
+        self.assertEqual(route_template(f'/quests/{uuid}/checkboxes/3/'), 'quests/{uuid}/checkboxes/{i}')
+        self.assertEqual(route_template(f'quests/{uuid}/checkboxes/-1'), 'quests/{uuid}/checkboxes/{i}')
+        self.assertEqual(route_template(f'regulars/{uuid.replace("-", "").upper()}'), 'regulars/{uuid}', 'Undashed uppercase uuid wasn\'t templated.')
+    
+    
+    def test_prometheus_histogram(self):
+        sink = PrometheusSink()
+        for total in (0.003, 0.02, 20.0):
+            sink.record(call_record(total))
+        lines = sink.render().splitlines()
+        
+        name = 'lala_api_request_duration_seconds'
+        labels = 'method="GET",route="player",status="200"'
+        self.assertIns([f'# HELP {name} Wall time of api calls, including retries and refreshes.', f'# TYPE {name} histogram'], lines)
+        # buckets are cumulative, and only +Inf has the call slower than the largest one
+        self.assertIns([
+            f'{name}_bucket{{{labels},le="0.0025"}} 0',
+            f'{name}_bucket{{{labels},le="0.005"}} 1',
+            f'{name}_bucket{{{labels},le="0.025"}} 2',
+            f'{name}_bucket{{{labels},le="10.0"}} 2',
+            f'{name}_bucket{{{labels},le="+Inf"}} 3',
+            f'{name}_sum{{{labels}}} {0.003 + 0.02 + 20.0!r}',
+            f'{name}_count{{{labels}}} 3',
+        ], lines)
+        self.assertIns([
+            f'lala_api_request_bytes_total{{{labels}}} 30',
+            f'lala_api_response_bytes_total{{{labels}}} 300',
+            f'lala_api_attempts_total{{{labels}}} 3',
+        ], lines)
+    
+    
+    def test_prometheus_labels(self):
+        sink = PrometheusSink()
+        sink.record(call_record(0.01, status=None, test='test "quoted"\\path'))
+        sink.record(call_record(0.01, 'DELETE', f'quests/{uuid4()}', 404))
+        text = sink.render()
+        
+        self.assertIn('lala_api_test_call_duration_seconds_count{test="test \\"quoted\\"\\\\path"} 1', text, 'Test label wasn\'t escaped.')
+        self.assertIn('lala_api_request_duration_seconds_count{method="GET",route="player",status="none"} 1', text)
+        self.assertIn('lala_api_request_duration_seconds_count{method="DELETE",route="quests/{uuid}",status="404"} 1', text)
+        self.assertTrue(text.endswith('\n'), 'Exposition doesn\'t end with a newline.')
+    
+    
+    def test_measured_client(self):
+        with FakeServer() as server:
+            sink = PrometheusSink()
+            server.client(sinks=[sink]).get('player')
+        
+        text = sink.render()
+        self.assertIn('lala_api_request_duration_seconds_count{method="GET",route="player",status="200"} 1', text)
+        self.assertIn(f'lala_api_test_call_duration_seconds_count{{test="{self.id()}"}} 1', text, 'Call wasn\'t attributed to the test.')
+        self.assertIn('lala_api_connections_total{method="GET",route="player",status="200"} 1', text)
@@ -0,0 +1,58 @@
+import api
+from api.pool import ClientPool
+from . import LalaTestCase
+from .fake_server import FakeServer
+from .util import random_str
+
+
+class PoolTestCase(LalaTestCase):
+    
+    def test_round_robin(self):
+        pool = ClientPool([api.Client() for _ in range(3)])
+        leased: list[int] = []
+        for _ in range(7):
+            with pool.lease() as client:
+                leased.append(pool.clients.index(client))
+        self.assertEqual(leased, [0, 1, 2, 0, 1, 2, 0])
+        self.assertEqual(pool.in_flight, [0, 0, 0], 'Leases weren\'t released.')
+    
+    
+    def test_least_loaded(self):
+        pool = ClientPool([api.Client() for _ in range(3)], 'least-loaded')
+        with pool.lease() as first, pool.lease() as second:
+            self.assertNotEqual(first, second)
+            with pool.lease() as third:
+                self.assertNotIn(third, (first, second), 'Busy client was leased over an idle one.')
+                with pool.lease():
+                    self.assertEqual(pool.in_flight.count(2), 1)
+            with pool.lease() as client:
+                self.assertEqual(client, third, 'Released client wasn\'t the least loaded.')
+        self.assertEqual(pool.in_flight, [0, 0, 0])
+    
+    
+    def test_pin(self):
+        pool = ClientPool([api.Client() for _ in range(3)])
+        pinned = [pool.pin(f'user-{i}') for i in range(6)]
+        self.assertEqual([pool.clients.index(client) for client in pinned], [0, 1, 2, 0, 1, 2], 'New keys weren\'t spread evenly.')
+        self.assertIs(pool.pin('user-4'), pinned[4], 'Key moved to another client.')
+        self.assertEqual(pool.pinned, [2, 2, 2], 'Repeated pin counted again.')
+    
+    
+    def test_invalid_pool(self):
+        with self.assertRaises(ValueError):
+            ClientPool([])
+        with self.assertRaises(ValueError):
+            ClientPool([api.Client()], 'random')
+    
+    
+    def test_identities(self):
+        with FakeServer() as server:
+            pool = ClientPool.from_credentials([server.add_identity() for _ in range(3)], base_url=server.base_url)
+            for _ in range(6):
+                pool.post('dailies', {'name': random_str(), 'description': random_str()})
+            
+            # each identity is its own account, so round robin leaves two dailies on each
+            self.assertEqual([len(client.get('dailies')) for client in pool.clients], [2, 2, 2]) # type: ignore
+            
+            uuid = pool.pin('user').post('dailies', {'name': random_str(), 'description': random_str()})['uuid'] # type: ignore
+            pool.pin('user').get(f'dailies/{uuid}')
@@ -1,5 +1,9 @@
+from unittest import mock
+
 import api
-from . import LalaTestCase
+from api.graph import QuestGraph
+from . import RUN, LalaTestCase, sweep
+from .fake_server import FakeServer
 from .util import random_str, random_float, random_int
 
 from typing import Any
@@ -7,6 +11,13 @@ from typing import Any
 
 class QuestsTestCase(LalaTestCase):
     
+    @classmethod
+    def setUpClass(cls):
+        # for the patch and completion tests
+        cls.warm_pool('quest', 1)
+        cls.warm_pool('quest', 1, deadline=9999999999.0)
+    
+    
     def test_multiple_deletion(self):
         with self.temp_quest() as (uuid, _, _):
             pass
@@ -38,7 +49,7 @@ class QuestsTestCase(LalaTestCase):
     
     
     def test_patch_quest(self):
-        with self.temp_quest() as (uuid, quest, _):
+        with self.shared_quest(mutate=True) as (uuid, quest, _):
             quest['name'] = random_str()
             
             response = api.patch('quests/' + uuid, {
@@ -66,14 +77,26 @@ class QuestsTestCase(LalaTestCase):
         return all_quests, active_quests, daily_quests
     
     
+    def get_quest_list_uuids(self) -> tuple[set[str], set[str], set[str]]:
+        # streamed, since membership is all that's needed and the lists grow with the account
+        lists: list[set[str]] = []
+        for url in ('quests', 'quests/active', 'quests/daily'):
+            uuids: set[str] = set()
+            for uuid, quest in api.stream_items(url):
+                self.assertIsInstance(quest, dict, f'Quest in "{url}" is not a dictionary.')
+                uuids.add(uuid)
+            lists.append(uuids)
+        return lists[0], lists[1], lists[2]
+    
+    
     def test_quest_lists_are_subsets(self):
         all_quests, active_quests, daily_quests = self.get_quest_lists()
         self.assertEqual(all_quests, all_quests | active_quests | daily_quests)
     
     
     def test_quest_complete(self):
-        with self.temp_quest(deadline=9999999999.0) as (uuid, quest, _):
-            all_quests, active_quests, daily_quests = self.get_quest_lists()
+        with self.shared_quest(deadline=9999999999.0, mutate=True) as (uuid, quest, _):
+            all_quests, active_quests, daily_quests = self.get_quest_list_uuids()
             self.assertIn(uuid, all_quests, 'Quest not in quest list.')
             self.assertIn(uuid, active_quests, 'Quest not in active quest list.')
             self.assertNotIn(uuid, daily_quests, 'Normal quest is in daily quest list.')
@@ -91,7 +114,7 @@ class QuestsTestCase(LalaTestCase):
             self.cast(rewards, dict[str, Any],
                       'Quest reward is not a dictionary.')
             
-            all_quests, active_quests, daily_quests = self.get_quest_lists()
+            all_quests, active_quests, daily_quests = self.get_quest_list_uuids()
             self.assertIn(uuid, all_quests, 'Quest not in quest list.')
             self.assertNotIn(uuid, active_quests, 'Completed quest in active quest list.')
             self.assertNotIn(uuid, daily_quests, 'Normal quest is in daily quest list.')
@@ -100,23 +123,22 @@ class QuestsTestCase(LalaTestCase):
     def test_quest_chaining(self):
         with self.temp_quest(deadline=9999999999.0) as (uuid1, _, _):
             with self.temp_quest(prereqs=[uuid1], deadline=9999999999.0) as (uuid2, _, _):
-                active_quests = api.get('quests/active')
-                active_quests = self.cast(active_quests, dict[str, Any], 'Active quest list is not a dictionary.')
+                with api.batch() as batch:
+                    active_quests = batch.get('quests/active')
+                    prereqs1 = batch.get(f'quests/{uuid1}/prereqs')
+                    sequels1 = batch.get(f'quests/{uuid1}/sequels')
+                    prereqs2 = batch.get(f'quests/{uuid2}/prereqs')
+                    sequels2 = batch.get(f'quests/{uuid2}/sequels')
+                
+                active_quests = self.cast(active_quests.result(), dict[str, Any], 'Active quest list is not a dictionary.')
                 
                 self.assertIn(uuid1, active_quests, 'Quest not in active quest list.')
                 self.assertNotIn(uuid2, active_quests, 'Quest with prereq in active quest list.')
                 
-                response = api.get(f'quests/{uuid1}/prereqs')
-                self.assertEqual(response, [], 'Quest prereqs list incorrect.')
-                
-                response = api.get(f'quests/{uuid1}/sequels')
-                self.assertEqual(response, [uuid2], 'Quest sequels list incorrect.')
-                
-                response = api.get(f'quests/{uuid2}/prereqs')
-                self.assertEqual(response, [uuid1], 'Quest prereqs list incorrect.')
-                
-                response = api.get(f'quests/{uuid2}/sequels')
-                self.assertEqual(response, [], 'Quest sequels list incorrect.')
+                self.assertEqual(prereqs1.result(), [], 'Quest prereqs list incorrect.')
+                self.assertEqual(sequels1.result(), [uuid2], 'Quest sequels list incorrect.')
+                self.assertEqual(prereqs2.result(), [uuid1], 'Quest prereqs list incorrect.')
+                self.assertEqual(sequels2.result(), [], 'Quest sequels list incorrect.')
                 
                 api.post(f'quests/{uuid1}/complete')
                 
@@ -125,3 +147,83 @@ class QuestsTestCase(LalaTestCase):
                 
                 self.assertNotIn(uuid1, active_quests, 'Completed quest in active quest list.')
                 self.assertIn(uuid2, active_quests, 'Quest not in active quest list.')
+    
+    
+    def test_quest_graph(self):
+        with self.temp_quest(deadline=9999999999.0) as (uuid1, _, _):
+            with self.temp_quest(prereqs=[uuid1], deadline=9999999999.0) as (uuid2, _, _):
+                with self.temp_quest(prereqs=[uuid2], deadline=9999999999.0) as (uuid3, _, _):
+                    graph = QuestGraph.fetch()
+                    
+                    with api.batch() as batch:
+                        prereqs = {uuid: batch.get(f'quests/{uuid}/prereqs') for uuid in (uuid1, uuid2, uuid3)}
+                        sequels = {uuid: batch.get(f'quests/{uuid}/sequels') for uuid in (uuid1, uuid2, uuid3)}
+                    for uuid in (uuid1, uuid2, uuid3):
+                        self.assertEqual(graph.get_prereqs(uuid), prereqs[uuid].result(), 'Quest graph prereqs incorrect.')
+                        self.assertEqual(graph.get_sequels(uuid), sequels[uuid].result(), 'Quest graph sequels incorrect.')
+                    
+                    self.assertEqual(graph.ancestors(uuid3), {uuid1, uuid2}, 'Quest graph ancestors incorrect.')
+                    self.assertEqual(graph.descendants(uuid1), {uuid2, uuid3}, 'Quest graph descendants incorrect.')
+                    self.assertEqual(graph.unlocks(uuid1), {uuid2}, 'Quest graph unlocks incorrect.')
+                    
+                    predicted = graph.active_after(uuid1)
+                    graph.completed(uuid1, api.post(f'quests/{uuid1}/complete')) # type: ignore
+                    active_quests = self.cast(api.get('quests/active'), dict[str, Any], 'Active quest list is not a dictionary.')
+                    
+                    ours = {uuid1, uuid2, uuid3}
+                    self.assertEqual(predicted & ours, set(active_quests) & ours, 'Quest graph predicted the wrong active quests.')
+                    self.assertEqual(graph.active() & ours, set(active_quests) & ours, 'Quest graph active quests incorrect after completion.')
+                    
+                    uuid4 = graph.created(api.post('quests', {
+                        'name': random_str(),
+                        'description': self.describe(),
+                        'deadline': 9999999999.0,
+                        'difficulty': random_int(),
+                        'prereqs': [uuid3],
+                    })) # type: ignore
+                    self.assertEqual(graph.get_sequels(uuid3), [uuid4], 'Quest graph sequels incorrect after creation.')
+                    
+                    self.delete_quest(uuid4)
+                    graph.deleted(uuid4)
+                    self.assertEqual(graph.get_sequels(uuid3), [], 'Quest graph sequels incorrect after deletion.')
+    
+    
+    def test_quest_graph_deletion_during_fetch(self):
+        with FakeServer() as server:
+            client = server.client()
+            kept = client.post('quests', self.quest_fields())['uuid'] # type: ignore
+            gone = client.post('quests', self.quest_fields())['uuid'] # type: ignore
+            
+            # deleted by someone else between reading the list and asking for its prereqs
+            listed = list(client.stream_items('quests'))
+            client.delete(f'quests/{gone}')
+            with mock.patch.object(client, 'stream_items', return_value=iter(listed)):
+                graph = QuestGraph.fetch(client)
+            
+            self.assertIn(kept, graph.quests, 'Quest graph lost a quest that still exists.')
+            self.assertNotIn(gone, graph.quests, 'Quest graph kept a quest deleted during the fetch.')
+    
+    
+    def test_sweep_orphans(self):
+        # one run that crashed long ago, and one that may well still be going
+        crashed, running = f'crashed-{random_int()}', f'running-{random_int()}'
+        old, _, _ = self.make_quest(description=f'{random_str()} [lala-run 0 {crashed}]')
+        new, _, _ = self.make_quest(description=f'{random_str()} [lala-run 9999999999 {running}]')
+        try:
+            orphans = {orphan.path for orphan in sweep.find_orphans()}
+            self.assertIn(f'quests/{old}', orphans, 'Sweep missed a quest from a finished run.')
+            self.assertNotIn(f'quests/{new}', orphans, 'Sweep took a quest from a run that may still be going.')
+            
+            if self.run_tag is not None:
+                with self.temp_quest() as (uuid, _, _):
+                    self.assertIn(f'quests/{uuid}', {orphan.path for orphan in sweep.find_orphans({RUN})}, 'Fixture isn\'t tagged with its run.')
+            
+            self.assertEqual(sweep.sweep({crashed}), (1, []), 'Sweep of a finished run failed.')
+            with self.assertApiError(404, 'Orphaned quest still exists after sweep.'):
+                api.get(f'quests/{old}')
+        finally:
+            for uuid in (old, new):
+                try:
+                    api.delete(f'quests/{uuid}')
+                except api.ApiException:
+                    pass
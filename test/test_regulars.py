@@ -7,6 +7,12 @@ from typing import Any
 
 class RegularTestCase(LalaTestCase):
     
+    @classmethod
+    def setUpClass(cls):
+        # for the patch test
+        cls.warm_pool('regular', 1)
+    
+    
     def test_multiple_deletion(self):
         with self.temp_regular() as (uuid, _):
             pass
@@ -59,7 +65,7 @@ class RegularTestCase(LalaTestCase):
     
     
     def test_patch_regular(self):
-        with self.temp_regular() as (uuid, regular):
+        with self.shared_regular(mutate=True) as (uuid, regular):
             regular['max_cooldown'] += 1
             regular['quest']['name'] = random_str()
             
@@ -0,0 +1,15 @@
+from . import LalaTestCase, schema
+
+
+class SchemaTestCase(LalaTestCase):
+    
+    def test_optional_fields(self):
+        # the baseline tests never required these, so a response without them still passes
+        self.assertEqual(schema.CHECKBOX.check({'name': 'a'}), {'name': 'a'})
+        self.assertIsNone(schema.CHECKBOX.parse({'name': 'a'}).checked)
+        self.assertIs(schema.CHECKBOX.parse({'name': 'a', 'checked': True}).checked, True)
+        
+        with self.assertRaises(schema.SchemaError):
+            schema.CHECKBOX.check({'name': 'a', 'checked': 1})
+        with self.assertRaises(schema.SchemaError):
+            schema.CHECKBOX.check({'checked': True})
@@ -0,0 +1,20 @@
+from load.stats import percentile
+from . import LalaTestCase
+
+
+class StatsTestCase(LalaTestCase):
+    
+    def test_percentile(self):
+        samples = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(samples, 50), 50.0)
+        self.assertEqual(percentile(samples, 95), 95.0)
+        self.assertEqual(percentile(samples, 99), 99.0, 'p99 of 100 samples isn\'t the 99th.')
+        self.assertEqual(percentile(samples, 100), 100.0)
+        self.assertEqual(percentile(samples, 0), 1.0)
+        
+        # the textbook nearest rank example
+        samples = [15.0, 20.0, 35.0, 40.0, 50.0]
+        self.assertEqual([percentile(samples, p) for p in (5, 30, 40, 50, 100)], [15.0, 20.0, 20.0, 35.0, 50.0])
+        
+        self.assertEqual(percentile([], 50), 0.0)
+        self.assertEqual(percentile([7.0], 99), 7.0)
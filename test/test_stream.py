@@ -0,0 +1,73 @@
+import json
+from unittest import mock
+from uuid import uuid4
+
+from api import stream
+from api.stream import iter_json_items
+from . import LalaTestCase
+from .fake_server import FakeServer
+from .util import random_str
+
+from typing import Any
+
+
+def chunked(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StreamTestCase(LalaTestCase):
+    
+    def test_every_chunk_boundary(self):
+        data: dict[str, Any] = {
+            str(uuid4()): {'name': 'braces {"}: and \\"quotes\\"', 'difficulty': 12345, 'deadline': 1.5e10, 'checkboxes': []},
+            str(uuid4()): {'name': 'ünïcödé ✓', 'difficulty': -7, 'deadline': 0.25, 'checkboxes': [{'name': 'x', 'checked': True}]},
+            str(uuid4()): 123456789,
+            str(uuid4()): -2.5e-3,
+        }
+        text = json.dumps({'ok': True, 'status': 200, 'data': data}, indent=1)
+        for size in range(1, len(text) + 1):
+            self.assertEqual(list(iter_json_items(chunked(text, size))), list(data.items()), f'Items differ when chunked every {size} characters.')
+    
+    
+    def test_number_across_chunks(self):
+        # a number that ends its chunk mustn't be taken as finished
+        self.assertEqual(list(iter_json_items(['{"ok": true, "data": {"a": 12', '345}}'])), [('a', 12345)])
+        self.assertEqual(list(iter_json_items(['{"ok": true, "data": {"a": 1.', '5e3', '}}'])), [('a', 1500.0)])
+    
+    
+    def test_empty_data(self):
+        self.assertEqual(list(iter_json_items(['{"ok": true, "data": {', ' }}'])), [])
+    
+    
+    def test_failed_envelope(self):
+        text = json.dumps({'ok': False, 'status': 404, 'message': 'Not found.', 'data': {'a': 1}})
+        with self.assertRaises(Exception, msg='Failed response wasn\'t raised.'):
+            for item in iter_json_items(chunked(text, 4)):
+                self.fail(f'Item {item} was streamed from a failed response.')
+        
+        with self.assertRaises(Exception, msg='List data wasn\'t refused.'):
+            list(iter_json_items(chunked('{"ok": true, "data": [1, 2]}', 3)))
+    
+    
+    def test_truncated(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_items(chunked('{"ok": true, "data": {"a": {"b": 1}, "c": ', 5)))
+    
+    
+    def test_streamed_client(self):
+        with FakeServer() as server:
+            client = server.client()
+            for name in ('ünïcödé ✓', '日本語のクエスト', random_str()):
+                client.post('quests', {
+                    'name': name,
+                    'description': random_str(),
+                    'deadline': 9999999999.0,
+                    'difficulty': 1,
+                    'checkboxes': [],
+                    'prereqs': [],
+                })
+            
+            # small enough that multibyte characters land across chunks
+            with mock.patch.object(stream, 'CHUNK_SIZE', 7):
+                streamed = dict(client.stream_items('quests'))
+            self.assertEqual(streamed, client.get('quests'), 'Streamed quests don\'t match the decoded list.')
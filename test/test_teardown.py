@@ -0,0 +1,30 @@
+import unittest
+
+import api
+from . import LalaTestCase
+from .fake_server import FakeServer
+
+
+class TeardownTestCase(LalaTestCase):
+    
+    def test_failure_names_owning_test(self):
+        with FakeServer() as server:
+            server.fault('DELETE quests/{uuid}', error_rate=1.0, error_status=500)
+            
+            class Deferred(LalaTestCase):
+                deferred_teardown = True
+                
+                def test_owner(self):
+                    with self.temp_quest():
+                        pass
+            
+            result = unittest.TestResult()
+            with api.use_client(server.client()):
+                unittest.defaultTestLoader.loadTestsFromTestCase(Deferred).run(result)
+        
+        # the test itself passed, and stays passed; the class's cleanup is what fails
+        self.assertEqual((result.testsRun, result.failures), (1, []), 'Deferred teardown changed the outcome of a finished test.')
+        self.assertEqual(len(result.errors), 1, 'Deferred teardown failure wasn\'t reported once.')
+        holder, error = result.errors[0]
+        self.assertIn('tearDownClass', str(holder), 'Deferred teardown failure wasn\'t reported against the class.')
+        self.assertIn(f'{Deferred.__qualname__}.test_owner: Failed to delete', error, 'Deferred teardown failure doesn\'t name its test.')
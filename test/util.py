@@ -1,17 +1,172 @@
 import random
+import re
+from array import array
+from contextvars import ContextVar, Token
+from itertools import chain
+
+from typing import Any, Generator, Iterable, Iterator
+
+
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._'
+
+# tests swap in a generator seeded from their id, so a run can be repeated (and replayed) exactly
+generator: ContextVar[random.Random] = ContextVar('generator', default=random.Random())
+
+
+def seed(value: str | int) -> Token[random.Random]:
+    return generator.set(random.Random(value))
 
 
 def random_str(len: int = 10) -> str:
-    return ''.join(random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._') for _ in range(len))
+    rng = generator.get()
+    return ''.join(rng.choice(ALPHABET) for _ in range(len))
 
 
 def random_int(len: int = 8) -> int:
-    return random.randrange(0, 10 ** len)
+    return generator.get().randrange(0, 10 ** len)
 
 
 def random_float(len: int = 6) -> float:
-    return random_int(len) + random.random()
+    return random_int(len) + generator.get().random()
 
 
 def random_bool() -> bool:
-    return random.choice((True, False))
+    return generator.get().choice((True, False))
+
+
+#
+# RUNS
+#
+
+# the session's own run is set up by the test package, which is where sessions start
+RUN_TAG_PATTERN = re.compile(r'\[lala-run (\d+) ([^\]\s]+)\]')
+
+
+def run_tag(run: str, started: int) -> str:
+    return f'[lala-run {started} {run}]'
+
+
+#
+# BULK DATA
+#
+
+# every byte maps onto one of 64 characters, so a whole batch of strings is one randbytes call and
+# one translate, without the bias a 65 character alphabet would have
+BULK_TABLE = bytes.maketrans(bytes(range(256)), ALPHABET[:64].encode() * 4)
+BATCH_SIZE = 1024
+
+
+class BulkGenerator:
+    
+    # the random_* helpers a batch at a time, for datasets big enough that a python call per
+    # character is what limits them; unseeded, it draws its seed from the current test's generator.
+    # descriptions end in the tag, if there is one, so a sweep can find what's sent to the server
+    def __init__(self, seed: int | str | None = None, batch_size: int = BATCH_SIZE, tag: str | None = None):
+        self.random = random.Random(generator.get().getrandbits(64) if seed is None else seed)
+        self.batch_size = batch_size
+        self.tag = tag
+        self.feeds: dict[str, Iterator[dict[str, Any]]] = {}
+    
+    
+    def strings(self, count: int, length: int = 10) -> list[str]:
+        text = self.random.randbytes(count * length).translate(BULK_TABLE).decode('ascii')
+        return [text[i:i + length] for i in range(0, count * length, length)]
+    
+    
+    def words(self, count: int) -> 'array[int]':
+        return array('Q', self.random.randbytes(count * 8))
+    
+    
+    def ints(self, count: int, length: int = 8) -> list[int]:
+        # the modulo bias against 2 ** 64 is far too small to matter for test data
+        limit = 10 ** length
+        return [word % limit for word in self.words(count)]
+    
+    
+    def floats(self, count: int, length: int = 6) -> list[float]:
+        scale = 2.0 ** -64
+        return [whole + word * scale for whole, word in zip(self.ints(count, length), self.words(count))]
+    
+    
+    def bools(self, count: int) -> list[bool]:
+        return [byte > 127 for byte in self.random.randbytes(count)]
+    
+    
+    def descriptions(self, count: int) -> list[str]:
+        descriptions = self.strings(count)
+        return descriptions if self.tag is None else [f'{description} {self.tag}' for description in descriptions]
+    
+    
+    def quests(self, count: int, checkboxes: int = 0) -> list[dict[str, Any]]:
+        names = self.strings(count * checkboxes)
+        return [
+            {
+                'name': name,
+                'description': description,
+                'deadline': deadline,
+                'difficulty': difficulty,
+                'checkboxes': names[i * checkboxes:(i + 1) * checkboxes],
+                'prereqs': []
+            }
+            for i, (name, description, deadline, difficulty) in enumerate(zip(
+                self.strings(count), self.descriptions(count), self.floats(count), self.ints(count)
+            ))
+        ]
+    
+    
+    def dailies(self, count: int) -> list[dict[str, Any]]:
+        return [{'name': name, 'description': description} for name, description in zip(self.strings(count), self.descriptions(count))]
+    
+    
+    def regulars(self, count: int) -> list[dict[str, Any]]:
+        return [
+            {
+                'name': name,
+                'description': description,
+                'difficulty': difficulty,
+                'min_cooldown': min_cooldown,
+                'max_cooldown': min_cooldown + extra
+            }
+            for name, description, difficulty, min_cooldown, extra in zip(
+                self.strings(count), self.descriptions(count), self.ints(count), self.floats(count), self.floats(count)
+            )
+        ]
+    
+    
+    def checkboxes(self, count: int, size: int = 5) -> list[dict[str, Any]]:
+        # bodies for put(f'quests/{uuid}/checkboxes')
+        names, checked = self.strings(count * size), self.bools(count * size)
+        return [{'names': names[i:i + size], 'checked': checked[i:i + size]} for i in range(0, count * size, size)]
+    
+    
+    def batches(self, kind: str, total: int | None = None, **options: Any) -> Generator[list[dict[str, Any]], None, None]:
+        # kind is one of the payload methods above; without a total it goes on for as long as it's asked
+        make = getattr(self, kind)
+        left = total
+        while left is None or left > 0:
+            count = self.batch_size if left is None else min(self.batch_size, left)
+            yield make(count, **options)
+            if left is not None:
+                left -= count
+    
+    
+    def records(self, kind: str, total: int | None = None, **options: Any) -> Iterator[dict[str, Any]]:
+        return chain.from_iterable(self.batches(kind, total, **options))
+    
+    
+    def next(self, kind: str, **overrides: Any) -> dict[str, Any]:
+        # one payload at a time out of an endless feed of batches, with some fields pinned
+        if kind not in self.feeds:
+            self.feeds[kind] = self.records(kind)
+        return next(self.feeds[kind]) | overrides
+
+
+def write_jsonl(path: str, batches: Iterable[list[dict[str, Any]]]) -> int:
+    from api.codec import json_codec
+    encode = json_codec().encode
+    written = 0
+    with open(path, 'wb') as f:
+        for batch in batches:
+            f.write(b''.join(encode(record) + b'\n' for record in batch))
+            written += len(batch)
+    return written